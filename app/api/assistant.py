@@ -1,28 +1,92 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+import json
+import time
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from app.schemas.chat import ChatRequest, ChatResponse
-from app.schemas.diagnosis import DiagnoseRequest, DiagnoseResponse
+from app.schemas.diagnosis import BodyResultRequest, DiagnoseRequest, DiagnoseResponse
 from app.schemas.content import CreateContentRequest
-from app.services.assistant_service import diagnose_body_type_with_assistant, create_content, chat_body_assistant, \
-    chat_body_result, chat_body_result_soft, get_run_status, get_run_result
+from app.services.assistant_service import diagnose_body_type_with_assistant_async, create_content_async, \
+    stream_content_async, chat_body_assistant_async, chat_body_result_async, get_run_status_async, \
+    get_run_result_async, prefetch_body_result, prefetched_body_result_async, fallback_diagnosis, SOFT_WAIT_SEC, \
+    CHAT_ASSISTANT_ID
+from app.services.batch_diagnosis import BATCH_CONCURRENCY, get_batch_store, parse_jsonl, run_batch
+from app.services.body_type_classifier import BODY_TYPE_FALLBACK_ENABLED, body_type_classifier
+from app.services.chat_index import chat_index
+from app.services.chat_sessions import chat_sessions
+from app.services.circuit_breaker import CircuitOpen, circuit_breaker
+from app.services.deadline import DeadlineExceeded, clamp
+from app.services.hedging import chat_hedger
+from app.services.job_queue import job_queue
+from app.services.openai_client import pool_stats
+from app.services.rate_limiter import UpstreamBusy, upstream_limiter
+from app.services.run_poller import completion_stats
+from app.services.result_cache import result_cache
+from app.services.singleflight import inflight
+from app.services.speculation import speculations
+from app.services.standby_threads import standby_threads
 
 router = APIRouter()
 
 
+def _fallback_response(request: DiagnoseRequest) -> Optional[JSONResponse]:
+    """
+    BODY_TYPE_FALLBACK_ENABLED 면 OpenAI 실패/지연 시 규칙 분류 + 템플릿 진단을 200 으로 (X-Diagnosis-Fallback 헤더).
+    꺼져 있거나 규칙 분류의 확신도가 낮으면(BODY_TYPE_FALLBACK_MIN_CONFIDENCE) None → 원래 오류 그대로.
+    """
+    if not BODY_TYPE_FALLBACK_ENABLED:
+        return None
+    data = fallback_diagnosis(request.answers)
+    if data is None:
+        return None
+    return JSONResponse(content=data, headers={"X-Diagnosis-Fallback": body_type_classifier.version})
+
+
 @router.post("/diagnosis", description="체형 진단", response_model=DiagnoseResponse)
-def diagnose_body_type(request: DiagnoseRequest):
-    return diagnose_body_type_with_assistant(
-        answers=request.answers,
-        height=request.height,
-        weight=request.weight,
-        gender=request.gender,
+async def diagnose_body_type(request: DiagnoseRequest):
+    try:
+        return await diagnose_body_type_with_assistant_async(
+            answers=request.answers,
+            height=request.height,
+            weight=request.weight,
+            gender=request.gender,
+        )
+    except Exception:
+        fallback = _fallback_response(request)
+        if fallback is None:
+            raise
+        return fallback
+
+
+@router.post("/diagnosis/batch", description="체형 진단 일괄 처리 (JSONL 입력 → JSONL 스트리밍 출력)")
+async def diagnose_body_type_batch(
+    request: Request, concurrency: int = BATCH_CONCURRENCY, batch_id: Optional[str] = None, use_cache: bool = False
+):
+    """
+    본문: 한 줄에 DiagnoseRequest 하나(+ 선택 "id")인 JSONL.
+    응답: 끝나는 순서대로 {"id", "ok", "result" | "error"} JSONL (항목별 실패는 error 로, 배치는 계속 진행).
+    항목별 성공 결과를 X-Batch-Id 로 저장해 두므로, 중간에 끊기면 같은 batch_id 로 다시 보내 이어서 처리한다.
+    기본은 결과 캐시를 거치지 않고 항목마다 assistant 를 호출한다 (?use_cache=true 면 캐시 재사용).
+    """
+    lines = (await request.body()).decode("utf-8").splitlines()
+    batch_id = batch_id or uuid.uuid4().hex
+    store = get_batch_store()
+    results = run_batch(
+        parse_jsonl(lines),
+        concurrency=concurrency,
+        done=store.done(batch_id),
+        on_success=lambda item_id, result: store.save(batch_id, item_id, result),
+        use_cache=use_cache,
     )
+    return StreamingResponse(results, media_type="application/x-ndjson", headers={"X-Batch-Id": batch_id})
 
 
 @router.post("/create-content", description="콘텐츠 초안 작성")
-def recommend_content(request: CreateContentRequest):
-    return create_content(
+async def recommend_content(request: CreateContentRequest):
+    return await create_content_async(
         name=request.name,
         body_type=request.body_type,
         height=request.height,
@@ -36,9 +100,49 @@ def recommend_content(request: CreateContentRequest):
     )
 
 
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/create-content/stream", description="콘텐츠 초안 작성 (SSE 스트리밍)")
+async def recommend_content_stream(request: CreateContentRequest):
+    """
+    초안이 생성되는 대로 text/event-stream 으로 전달.
+    - event: delta  data: {"text": "..."}  (여러 번)
+    - event: done   data: {}
+    - event: error  data: {"message": "..."}  (헤더가 이미 나간 뒤라 상태코드 대신 이벤트로 알림)
+    ※ Mangum(Lambda)은 응답을 버퍼링하므로 실제 스트리밍은 uvicorn 컨테이너에서만 동작한다.
+    """
+    async def events():
+        try:
+            async for delta in stream_content_async(
+                name=request.name,
+                body_type=request.body_type,
+                height=request.height,
+                weight=request.weight,
+                body_feature=request.body_feature,
+                recommendation_items=request.recommendation_items,
+                recommended_situation=request.recommended_situation,
+                recommended_style=request.recommended_style,
+                avoid_style=request.avoid_style,
+                budget=request.budget
+            ):
+                yield _sse("delta", {"text": delta})
+        except Exception as e:
+            yield _sse("error", {"message": f"assistants error: {e}"})
+            return
+        yield _sse("done", {})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},  # 프록시 버퍼링 방지
+    )
+
+
 @router.post("/chat", description="체형 진단 개별 질문에 대한 응답", response_model=ChatResponse)
-def chat(request: ChatRequest):
-    return chat_body_assistant(request.question, request.answer)
+async def chat(request: ChatRequest):
+    return await chat_body_assistant_async(request.question, request.answer, request.session_id)
 
 
 # @router.post("/body-result", response_model=DiagnoseResponse)
@@ -50,38 +154,119 @@ def chat(request: ChatRequest):
 #         gender=request.gender,
 #     )
 
+@router.post("/body-result/prefetch", status_code=202, description="채팅 설문 중 최종 진단 미리 시작 (opt-in)")
+async def prefetch_result(request: BodyResultRequest):
+    """
+    설문 응답이 쌓일 때마다(또는 마지막 질문 직후) 보내면, 응답이 충분히 모였을 때 진단 run 을 미리 시작한다.
+    같은 session_id 로 온 /body-result 가 같은 입력이면 결과를 바로 받고, 입력이 바뀌었으면 미리 돌린 run 은 취소된다.
+    """
+    if not request.session_id:
+        raise HTTPException(422, "session_id 가 필요합니다")
+    status = prefetch_body_result(
+        request.answers, request.height, request.weight, request.gender, request.session_id
+    )
+    return {"status": status}
+
+
 @router.post("/body-result")
-def post_body_result(request: DiagnoseRequest):
-    try:
-        out = chat_body_result(
-            answers=request.answers,
-            height=request.height,
-            weight=request.weight,
-            gender=request.gender,
+async def post_body_result(request: BodyResultRequest):
+    soft_wait = SOFT_WAIT_SEC
+    if request.session_id:
+        started = time.monotonic()
+        data = await prefetched_body_result_async(
+            request.answers, request.height, request.weight, request.gender, request.session_id,
+            wait_sec=clamp(SOFT_WAIT_SEC),
         )
-    except Exception as e:
-        raise HTTPException(502, f"assistants error: {e}")
+        if data is not None:
+            return data
+        # 미리 시작한 run 을 기다린 만큼은 소프트 대기에서 뺀다
+        soft_wait = max(0.0, SOFT_WAIT_SEC - (time.monotonic() - started))
+
+    # 작업 큐가 꺼져 있으면(Lambda) 기존처럼 요청 안에서 끝까지 실행
+    if job_queue is None:
+        try:
+            return await chat_body_result_async(
+                answers=request.answers,
+                height=request.height,
+                weight=request.weight,
+                gender=request.gender,
+            )
+        except (UpstreamBusy, DeadlineExceeded):
+            fallback = _fallback_response(request)
+            if fallback is None:
+                raise  # 503/504 는 app 의 예외 핸들러가 처리
+            return fallback
+        except Exception as e:
+            fallback = _fallback_response(request)
+            if fallback is None:
+                raise HTTPException(502, f"assistants error: {e}")
+            return fallback
+
+    # 서킷이 열려 있으면 큐에 넣어도 워커가 재시도만 반복하므로 바로 대체 응답(또는 503)
+    retry_after = circuit_breaker.retry_after(CHAT_ASSISTANT_ID)
+    if retry_after > 0:
+        fallback = _fallback_response(request)
+        if fallback is None:
+            raise CircuitOpen(CHAT_ASSISTANT_ID, retry_after)
+        return fallback
+
+    job = await job_queue.submit("body_result", request.model_dump(exclude={"session_id"}))
+    # 작업은 마감과 무관하게 계속 돌고, 이 요청은 마감 전에 202 로 돌려준다
+    job = await job_queue.wait(job["id"], clamp(soft_wait))
 
     # 완료면 dict(결과) → 200
-    if "thread_id" not in out:
-        return out  # DiagnoseResponse 스키마와 매칭됨
+    if job["status"] == "completed":
+        return job["result"]  # DiagnoseResponse 스키마와 매칭됨
+    if job["status"] == "failed":
+        fallback = _fallback_response(request)
+        if fallback is None:
+            raise HTTPException(502, f"assistants error: {job['error']}")
+        return fallback
+
+    # 미완료면 202로 job 식별자 반환 (이후 /run-status, /run-result 에 job_id 로 조회)
+    return JSONResponse(status_code=202, content={"job_id": job["id"], "status": job["status"]})
+
+
+def _get_job(job_id: str):
+    job = job_queue.store.get(job_id) if job_queue is not None else None
+    if job is None:
+        raise HTTPException(404, f"job not found: {job_id}")
+    return job
 
-    # 미완료면 202로 run 식별자 반환
-    return JSONResponse(status_code=202, content=out)
 
 # --- 폴링: 상태 조회 ---
+# job_id 는 로컬 저장소만 읽는다. thread_id/run_id 는 이전 클라이언트 호환용(OpenAI 직접 조회)
 @router.get("/run-status")
-def run_status(thread_id: str, run_id: str):
+async def run_status(job_id: Optional[str] = None, thread_id: Optional[str] = None, run_id: Optional[str] = None):
+    if job_id:
+        job = _get_job(job_id)
+        return {"job_id": job_id, "status": job["status"], "last_error": job["error"]}
+    if not (thread_id and run_id):
+        raise HTTPException(422, "job_id 또는 thread_id/run_id 가 필요합니다")
     try:
-        return get_run_status(thread_id, run_id)
+        return await get_run_status_async(thread_id, run_id)
+    except (UpstreamBusy, DeadlineExceeded):
+        raise
     except Exception as e:
         raise HTTPException(502, f"assistants status error: {e}")
 
 # --- 폴링: 결과 조회 ---
 @router.get("/run-result", response_model=DiagnoseResponse)
-def run_result(thread_id: str, run_id: str):
+async def run_result(job_id: Optional[str] = None, thread_id: Optional[str] = None, run_id: Optional[str] = None):
+    if job_id:
+        job = _get_job(job_id)
+        if job["status"] == "failed":
+            raise HTTPException(502, f"assistants result error: {job['error']}")
+        if job["status"] != "completed":
+            raise HTTPException(425, f"run not completed: {job['status']}")
+        return job["result"]
+    if not (thread_id and run_id):
+        raise HTTPException(422, "job_id 또는 thread_id/run_id 가 필요합니다")
+
     try:
-        data = get_run_result(thread_id, run_id)
+        data = await get_run_result_async(thread_id, run_id)
+    except (UpstreamBusy, DeadlineExceeded):
+        raise
     except Exception as e:
         raise HTTPException(502, f"assistants result error: {e}")
 
@@ -91,4 +276,30 @@ def run_result(thread_id: str, run_id: str):
 
     # completed이면 DiagnoseResponse 스키마로 반환
     data.pop("status", None)
-    return data
\ No newline at end of file
+    return data
+
+
+# --- 진단 결과 캐시 / 채팅 응답 인덱스 / single-flight 통계 ---
+@router.get("/cache-stats", description="진단 결과 캐시, 채팅 응답 인덱스, 중복 요청 병합, 미리 시작한 진단, 규칙 분류기 통계")
+async def cache_stats():
+    return {
+        "result_cache": result_cache.stats(),
+        "chat_index": chat_index.stats(),
+        "chat_sessions": chat_sessions.stats(),
+        "singleflight": inflight.stats(),
+        "prefetch": speculations.stats(),
+        "body_type_classifier": body_type_classifier.stats(),
+    }
+
+
+# --- upstream 호출 제한 / 폴링 통계 ---
+@router.get("/upstream-stats", description="OpenAI 동시 실행/요청 수 제한, 폴링, 커넥션 풀, 채팅 hedging, 대기 thread, 서킷 브레이커 통계")
+async def upstream_stats():
+    return {
+        "limiter": upstream_limiter.stats(),
+        "poller": completion_stats.stats(),
+        "pool": pool_stats.stats(),
+        "hedge": chat_hedger.stats(),
+        "standby_threads": standby_threads.stats(),
+        "circuit_breaker": circuit_breaker.stats(),
+    }
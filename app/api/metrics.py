@@ -0,0 +1,168 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.services.body_type_classifier import body_type_classifier
+from app.services.chat_index import chat_index
+from app.services.chat_sessions import chat_sessions
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, circuit_breaker
+from app.services.compression import compression_stats
+from app.services.hedging import chat_hedger
+from app.services.job_queue import job_queue
+from app.services.metrics import registry
+from app.services.openai_client import pool_stats
+from app.services.rate_limiter import upstream_limiter
+from app.services.result_cache import result_cache
+from app.services.run_poller import completion_stats
+from app.services.singleflight import inflight
+from app.services.speculation import speculations
+from app.services.standby_threads import standby_threads
+
+router = APIRouter()
+
+_CIRCUIT_STATE_VALUE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+@registry.collector
+def _cache_samples():
+    # 기존 stats() 값을 그대로 노출 (/assistant/cache-stats 와 같은 숫자)
+    cache = result_cache.stats()
+    index = chat_index.stats()
+    sessions = chat_sessions.stats()
+    flight = inflight.stats()
+    prefetch = speculations.stats()
+    classifier = body_type_classifier.stats()
+    return [
+        ("cache_requests_total", "counter", "Result cache and chat index lookups", [
+            ({"cache": "result_cache", "result": "hit"}, cache["hits"]),
+            ({"cache": "result_cache", "result": "miss"}, cache["misses"]),
+            ({"cache": "chat_index", "result": "hit"}, index["hits"]),
+            ({"cache": "chat_index", "result": "miss"}, index["misses"]),
+        ]),
+        ("chat_index_entries", "gauge", "Known (question, answer) pairs", [({}, index["size"])]),
+        ("chat_sessions", "gauge", "Live chat sessions mapped to a thread", [({}, sessions["size"])]),
+        ("chat_session_turns_total", "counter", "Chat turns by thread reuse", [
+            ({"thread": "new"}, sessions["started"]),
+            ({"thread": "reused"}, sessions["reused"]),
+        ]),
+        ("singleflight_calls_total", "counter", "Coalesced upstream calls", [
+            ({"result": "started"}, flight["started"]),
+            ({"result": "shared"}, flight["shared"]),
+        ]),
+        ("singleflight_inflight", "gauge", "Calls currently in flight", [({}, flight["inflight"])]),
+        ("body_result_prefetch_total", "counter", "Speculative body-result runs by outcome", [
+            ({"result": "started"}, prefetch["started"]),
+            ({"result": "hit"}, prefetch["hits"]),
+            ({"result": "miss"}, prefetch["misses"]),
+            ({"result": "wasted"}, prefetch["wasted"]),
+        ]),
+        ("body_type_local_total", "counter", "Diagnoses served by the rule-based body type classifier", [
+            ({"path": "fast_path"}, classifier["fast_path"]),
+            ({"path": "fallback"}, classifier["fallback"]),
+        ]),
+    ]
+
+
+@registry.collector
+def _upstream_samples():
+    limiter = upstream_limiter.stats()
+    poller = completion_stats.stats()
+    hedge = chat_hedger.stats()
+    standby = standby_threads.stats()
+    samples = [
+        ("upstream_runs_in_flight", "gauge", "Runs holding a concurrency slot",
+         [({"assistant": k}, v) for k, v in limiter["in_flight"].items()]),
+        ("upstream_slot_waiting", "gauge", "Requests waiting for a run slot", [({}, limiter["waiting"])]),
+        ("upstream_slot_requests_total", "counter", "Run slot admissions and rejections", [
+            ({"result": "admitted"}, limiter["admitted"]),
+            ({"result": "shed"}, limiter["shed"]),
+        ]),
+        ("upstream_throttled_total", "counter", "Follow-up calls delayed by the rate limit",
+         [({}, limiter["throttled"])]),
+        ("run_poll_completion_seconds", "gauge", "Observed run completion time quantiles", [
+            ({"assistant": aid, "quantile": q}, s[f"p{int(float(q) * 100)}"])
+            for aid, s in poller["assistants"].items()
+            for q in ("0.1", "0.5", "0.9")
+            if s[f"p{int(float(q) * 100)}"] is not None
+        ]),
+        ("chat_hedge_total", "counter", "Chat turns by hedging outcome", [
+            ({"result": "call"}, hedge["calls"]),
+            ({"result": "hedged"}, hedge["hedged"]),
+            ({"result": "hedge_won"}, hedge["hedge_wins"]),
+            ({"result": "skipped_budget"}, hedge["skipped_budget"]),
+            ({"result": "skipped_busy"}, hedge["skipped_busy"]),
+        ]),
+        ("chat_hedge_delay_seconds", "gauge", "Current delay before a hedged chat run", [({}, hedge["delay_sec"])]),
+        ("standby_threads_idle", "gauge", "Pre-created empty threads waiting for a run",
+         [({"assistant": k}, v) for k, v in standby["idle"].items()]),
+        ("standby_threads_total", "counter", "Standby thread pool events", [
+            ({"result": "hit"}, standby["hits"]),
+            ({"result": "miss"}, standby["misses"]),
+            ({"result": "created"}, standby["created"]),
+            ({"result": "evicted"}, standby["evicted"]),
+            ({"result": "error"}, standby["errors"]),
+        ]),
+    ]
+    circuits = circuit_breaker.stats()["assistants"]
+    samples += [
+        ("circuit_state", "gauge", "Circuit breaker state per assistant (0 closed, 1 half-open, 2 open)",
+         [({"assistant": k}, _CIRCUIT_STATE_VALUE[c["state"]]) for k, c in circuits.items()]),
+        ("circuit_failure_ratio", "gauge", "Failed share of upstream runs in the breaker window",
+         [({"assistant": k}, c["failure_rate"]) for k, c in circuits.items()]),
+        ("circuit_opened_total", "counter", "Times the circuit opened",
+         [({"assistant": k}, c["opened"]) for k, c in circuits.items()]),
+        ("circuit_rejected_total", "counter", "Upstream calls rejected by an open circuit",
+         [({"assistant": k}, c["rejected"]) for k, c in circuits.items()]),
+    ]
+    if job_queue is not None:
+        samples.append(("job_queue_depth", "gauge", "Jobs waiting for a worker", [({}, job_queue.depth)]))
+    return samples
+
+
+@registry.collector
+def _pool_samples():
+    pool = pool_stats.stats()
+    return [
+        ("openai_pool_max_connections", "gauge", "Connection limit per OpenAI client", [({}, pool["max_connections"])]),
+        ("openai_pool_connections", "gauge", "Open OpenAI connections", [
+            ({"state": "active"}, pool["open"] - pool["idle"]),
+            ({"state": "idle"}, pool["idle"]),
+        ]),
+        ("openai_pool_requests_in_flight", "gauge", "Requests waiting for response headers",
+         [({}, pool["in_flight"])]),
+        ("openai_pool_requests_total", "counter", "HTTP requests sent to OpenAI", [({}, pool["requests"])]),
+        ("openai_pool_saturated_total", "counter", "Requests that found every pooled connection busy",
+         [({}, pool["saturated"])]),
+        ("openai_pool_connections_opened_total", "counter", "New connections (TLS handshakes)",
+         [({}, pool["connections_opened"])]),
+    ]
+
+
+@registry.collector
+def _compression_samples():
+    compression = compression_stats.stats()
+    return [
+        ("response_compression_total", "counter", "Compressed responses by encoding", [
+            *(({"encoding": k}, v) for k, v in compression["responses"].items()),
+            ({"encoding": "identity_small"}, compression["skipped_small"]),
+        ]),
+        ("response_compression_bytes_total", "counter", "Response body bytes before and after compression", [
+            *(({"encoding": k, "stage": "raw"}, v) for k, v in compression["raw_bytes"].items()),
+            *(({"encoding": k, "stage": "sent"}, v) for k, v in compression["sent_bytes"].items()),
+        ]),
+    ]
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/health", include_in_schema=False)
+async def health():
+    """
+    로드밸런서/모니터링용. 프로세스가 살아 있으면 항상 200 이고, 서킷이 하나라도 닫혀 있지 않으면 status=degraded.
+    (OpenAI 장애로 인스턴스를 내리지 않도록 상태 코드는 바꾸지 않는다)
+    """
+    circuits = {aid: c["state"] for aid, c in circuit_breaker.stats()["assistants"].items()}
+    status = "ok" if all(state == CLOSED for state in circuits.values()) else "degraded"
+    return {"status": status, "circuits": circuits}
@@ -0,0 +1,110 @@
+"""
+저장된 설문 응답을 한꺼번에 다시 진단하는 CLI.
+
+    python -m app.cli.batch_diagnosis submissions.jsonl -o results.jsonl --concurrency 8
+    python -m app.cli.batch_diagnosis submissions.jsonl -o results.jsonl --mode openai-batch
+
+입력: 한 줄에 DiagnoseRequest 하나(+ 선택 "id"), 출력: {"id", "ok", "result" | "error"} JSONL.
+direct 모드는 결과 캐시를 거치지 않고 항상 assistant 를 호출한다 (프롬프트 변경 후 재진단, --use-cache 로 재사용).
+출력 파일에 이미 성공으로 기록된 id 는 건너뛰므로, 중간에 죽으면 같은 명령을 다시 실행하면 이어서 처리한다.
+openai-batch 모드는 제출한 batch id 를 <출력>.batch 에 적어 두고, 다시 실행하면 새로 제출하지 않고 그 배치를 기다린다.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import Dict
+
+from app.services.batch_diagnosis import (
+    BATCH_API_POLL_SEC,
+    BATCH_CONCURRENCY,
+    collect_openai_batch,
+    parse_jsonl,
+    run_batch,
+    submit_openai_batch,
+)
+
+
+def _completed_ids(path: str) -> Dict[str, bool]:
+    done: Dict[str, bool] = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue  # 죽으면서 반쯤 쓴 마지막 줄
+            if row.get("ok"):
+                done[str(row["id"])] = True
+    return done
+
+
+async def _direct(args, done, out) -> int:
+    failed = 0
+    with open(args.input, encoding="utf-8") as f:
+        records = ((i, p, e) for i, p, e in parse_jsonl(f) if i not in done)
+        async for line in run_batch(records, concurrency=args.concurrency, use_cache=args.use_cache):
+            out.write(line)
+            out.flush()
+            failed += not json.loads(line)["ok"]
+    return failed
+
+
+async def _openai_batch(args, done, out) -> int:
+    state_path = args.output + ".batch"
+    if os.path.exists(state_path):
+        with open(state_path, encoding="utf-8") as f:
+            batch_id = f.read().strip()
+        print(f"resuming batch {batch_id}", file=sys.stderr)
+    else:
+        with open(args.input, encoding="utf-8") as f:
+            items = []
+            for item_id, payload, error in parse_jsonl(f):
+                if item_id in done:
+                    continue
+                if error is not None:
+                    out.write(json.dumps({"id": item_id, "ok": False, "error": error}, ensure_ascii=False) + "\n")
+                    continue
+                items.append((item_id, payload))
+        if not items:
+            return 0
+        batch_id = await submit_openai_batch(items)
+        with open(state_path, "w", encoding="utf-8") as f:
+            f.write(batch_id)
+        print(f"submitted batch {batch_id} ({len(items)} items)", file=sys.stderr)
+
+    failed = 0
+    async for line in collect_openai_batch(batch_id, poll_sec=args.poll_sec):
+        out.write(line)
+        out.flush()
+        failed += not json.loads(line)["ok"]
+    os.remove(state_path)
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-run body type diagnoses for a JSONL of DiagnoseRequest records")
+    parser.add_argument("input")
+    parser.add_argument("-o", "--output", required=True, help="JSONL results (appended; used to resume)")
+    parser.add_argument("--mode", choices=("direct", "openai-batch"), default="direct")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument("--use-cache", action="store_true",
+                        help="direct mode: reuse cached results (default: always call the assistant)")
+    parser.add_argument("--poll-sec", type=float, default=BATCH_API_POLL_SEC, help="openai-batch status interval")
+    args = parser.parse_args(argv)
+
+    done = _completed_ids(args.output)
+    if done:
+        print(f"skipping {len(done)} already completed items", file=sys.stderr)
+    with open(args.output, "a", encoding="utf-8") as out:
+        run = _direct if args.mode == "direct" else _openai_batch
+        failed = asyncio.run(run(args, done, out))
+    if failed:
+        print(f"{failed} items failed (re-run to retry them)", file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+컨테이너용 운영 서버: uvicorn 워커 프로세스 여러 개로 app.main:app 을 띄운다.
+
+    python -m app.cli.serve                      # 워커 수 = 이 컨테이너가 쓸 수 있는 CPU 수
+    python -m app.cli.serve --workers 4 --port 8000
+
+요청 처리는 대부분 OpenAI 응답 대기(I/O)지만 JSON/pydantic 직렬화, 응답 파싱은 CPU 를 쓰므로
+프로세스 하나(GIL 하나)로는 코어 하나까지만 쓴다. 워커는 코어당 하나면 충분하다 (비동기라 그 이상은 이득이 없음).
+
+워커가 둘 이상이면:
+- 프로세스별로 따로 세는 upstream 제한(UPSTREAM_MAX_CONCURRENT_RUNS, UPSTREAM_RPM, UPSTREAM_BURST)과
+  OpenAI 연결 수 예산(OPENAI_POOL_TOTAL_CONNECTIONS)을 컨테이너 전체 값으로 보고 워커 수로 나눠 각 워커에 준다
+- 결과 캐시/채팅 세션은 따로 지정하지 않았으면 SQLite 파일로 바꿔 워커끼리 공유한다 (작업 저장소는 원래 SQLite)
+- /metrics 는 워커별 스냅숏 디렉터리(METRICS_MULTIPROC_DIR)를 합쳐 컨테이너 전체 값으로 보여 준다
+- single-flight, 미리 시작한 진단, hedging 예산, 대기 thread 풀, 서킷 브레이커, 채팅 인덱스 학습분은 워커별로 둔다
+  (프로세스 메모리의 task/카운터라 공유 저장소로 옮기면 매 요청에 저장소 왕복이 붙는다. README 🏭 참고)
+- SIGTERM 을 받으면 새 연결을 받지 않고 진행 중인 요청을 SERVER_GRACEFUL_SHUTDOWN_SEC 동안 마저 처리한 뒤,
+  작업 큐가 JOB_DRAIN_SEC 동안 실행 중인 작업을 끝낸다 (남은 작업은 queued 로 되돌림)
+"""
+import argparse
+import logging
+import math
+import os
+from typing import Dict, Optional
+
+import uvicorn
+
+from app.services.metrics import clear_snapshots
+
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+# 0 이면 CPU 수. uvicorn/gunicorn 관례의 WEB_CONCURRENCY 도 읽는다
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", os.getenv("WEB_CONCURRENCY", "0")))
+SERVER_GRACEFUL_SHUTDOWN_SEC = float(os.getenv("SERVER_GRACEFUL_SHUTDOWN_SEC", "20"))
+# 로드밸런서 idle timeout(ALB 기본 60s)보다 길게 둬야 LB 가 재사용하려던 연결을 서버가 먼저 끊지 않는다
+SERVER_KEEPALIVE_SEC = int(os.getenv("SERVER_KEEPALIVE_SEC", "75"))
+SERVER_LOG_LEVEL = os.getenv("SERVER_LOG_LEVEL", "info")
+
+logger = logging.getLogger("app.serve")
+
+# 컨테이너 전체 값을 워커 수로 나눠 줄 설정과 기본값 (app.services.rate_limiter 와 같은 기본값)
+_PER_PROCESS_LIMITS = {
+    "UPSTREAM_MAX_CONCURRENT_RUNS": "0",
+    "UPSTREAM_RPM": "0",
+    "UPSTREAM_BURST": None,  # 없으면 워커별 UPSTREAM_RPM / 6 (rate_limiter 기본 규칙)
+    "OPENAI_POOL_TOTAL_CONNECTIONS": "200",  # app.services.openai_client 와 같은 기본값
+}
+# 개수라 올림한 정수로 나눠 주는 설정
+_INTEGER_LIMITS = ("UPSTREAM_MAX_CONCURRENT_RUNS", "OPENAI_POOL_TOTAL_CONNECTIONS")
+
+
+def cpu_count() -> int:
+    """이 프로세스가 쓸 수 있는 CPU 수: CPU affinity 와 cgroup CPU 제한(docker --cpus, ECS cpu) 중 작은 값."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS
+        cpus = os.cpu_count() or 1
+    quota = _cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return max(1, cpus)
+
+
+def _cgroup_cpu_quota() -> Optional[float]:
+    try:
+        # cgroup v2: "<quota> <period>" 또는 "max <period>"
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        return quota / period if quota > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def worker_env(workers: int, environ: Dict[str, str]) -> Dict[str, str]:
+    """워커 프로세스에 물려줄 환경 변수 변경분 (environ 은 바꾸지 않는다)."""
+    if workers <= 1:
+        return {}
+    env: Dict[str, str] = {}
+    for key, default in _PER_PROCESS_LIMITS.items():
+        value = environ.get(key, default)
+        if value is None or float(value) <= 0:
+            continue  # 0 = 제한 없음
+        per_worker = float(value) / workers
+        env[key] = str(max(1, math.ceil(per_worker))) if key in _INTEGER_LIMITS else f"{per_worker:g}"
+    if environ.get("RESULT_CACHE_BACKEND", "memory") == "memory":
+        env["RESULT_CACHE_BACKEND"] = "sqlite"
+        env["RESULT_CACHE_URL"] = environ.get("RESULT_CACHE_URL") or "result_cache.sqlite3"
+    if not environ.get("CHAT_SESSION_PATH"):
+        env["CHAT_SESSION_PATH"] = "chat_sessions.sqlite3"
+    if not environ.get("METRICS_MULTIPROC_DIR"):
+        env["METRICS_MULTIPROC_DIR"] = "metrics_multiproc"
+    return env
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run app.main:app with multiple uvicorn worker processes")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS, help="0 = number of usable CPUs")
+    parser.add_argument("--graceful-shutdown-sec", type=float, default=SERVER_GRACEFUL_SHUTDOWN_SEC)
+    parser.add_argument("--keepalive-sec", type=int, default=SERVER_KEEPALIVE_SEC)
+    parser.add_argument("--log-level", default=SERVER_LOG_LEVEL)
+    args = parser.parse_args(argv)
+
+    workers = args.workers or cpu_count()
+    env = worker_env(workers, dict(os.environ))
+    os.environ.update(env)  # 워커 프로세스는 이 환경을 물려받아 app 을 import 한다
+    if workers > 1:
+        # 이전 실행의 워커 스냅숏이 이번 /metrics 합계에 섞이지 않게
+        clear_snapshots(os.environ["METRICS_MULTIPROC_DIR"])
+    # uvicorn 은 자기 로거만 설정하므로 이 프로세스의 로그 출력은 여기서 (trace 는 logging 에 없어 DEBUG)
+    logging.basicConfig(
+        level=getattr(logging, args.log_level.upper(), logging.DEBUG),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    logger.info(
+        "%d worker(s) on %s:%d%s", workers, args.host, args.port,
+        "".join(f"\n  {k}={v}" for k, v in sorted(env.items())),
+    )
+
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        timeout_graceful_shutdown=args.graceful_shutdown_sec,
+        timeout_keep_alive=args.keepalive_sec,
+        log_level=args.log_level,
+        # ALB/프록시 뒤: X-Forwarded-For/Proto 를 믿는다
+        proxy_headers=True,
+        forwarded_allow_ips="*",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,101 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 from app.api.assistant import router as assistant_router
+from app.api.metrics import router as metrics_router
+from app.services.assistant_backend import drain_cancels
+from app.services.assistant_service import BODY_ASSISTANT_ID, CHAT_ASSISTANT_ID, STYLE_ASSISTANT_ID
+from app.services.compression import RESPONSE_COMPRESSION_ENABLED, CompressionMiddleware
+from app.services.deadline import DeadlineExceeded, deadline_scope, detached_task, request_timeout
+from app.services.job_queue import job_queue
+from app.services.metrics import METRICS_MULTIPROC_DIR, registry, request_scope
+from app.services.openai_client import prewarm, prewarm_blocking, should_prewarm
+from app.services.rate_limiter import UpstreamBusy
+from app.services.response_text import orjson
+from app.services.standby_threads import STANDBY_THREADS_ENABLED, standby_threads
 from mangum import Mangum
 import logging
 
-app = FastAPI()
+
+# 블로킹 호출용 스레드 수 (sync 라우트/의존성 = anyio, asyncio.to_thread = 기본 executor). 0 이면 라이브러리 기본값
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "0"))
+_executor = ThreadPoolExecutor(THREADPOOL_SIZE, thread_name_prefix="app") if THREADPOOL_SIZE > 0 else None
+# 종료 시 이미 보낸 runs.cancel 요청이 끝나기를 기다리는 시간
+SHUTDOWN_CANCEL_WAIT_SEC = float(os.getenv("SHUTDOWN_CANCEL_WAIT_SEC", "3"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if _executor is not None:
+        # 루프마다 설정 (Lambda 는 lifespan 이 호출마다 돈다). executor 는 프로세스에 하나
+        anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+        asyncio.get_running_loop().set_default_executor(_executor)
+    # 저장소에 남은 미완료 작업을 다시 큐에 넣고 워커 시작
+    if job_queue is not None:
+        await job_queue.start()
+    if should_prewarm(at_init=False):
+        await prewarm()
+    # Lambda 는 lifespan 이 호출마다 돌아 매번 비우게 되므로 컨테이너에서만 미리 채우고 종료 시 정리 (Lambda 는 첫 요청부터 채움)
+    manage_standby = STANDBY_THREADS_ENABLED and os.getenv("AWS_LAMBDA_FUNCTION_NAME") is None
+    if manage_standby:
+        standby_threads.start([BODY_ASSISTANT_ID, STYLE_ASSISTANT_ID, CHAT_ASSISTANT_ID])
+    # 워커가 여럿이면(app.cli.serve) /metrics 를 합칠 수 있게 이 워커의 값을 공유 디렉터리에 주기적으로 남긴다
+    snapshots = detached_task(registry.snapshot_loop(), name="metrics-snapshots") if METRICS_MULTIPROC_DIR else None
+    yield
+    if manage_standby:
+        await standby_threads.stop()
+    if job_queue is not None:
+        await job_queue.stop()  # 실행 중인 작업은 JOB_DRAIN_SEC 동안 마저 끝낸다
+    await drain_cancels(SHUTDOWN_CANCEL_WAIT_SEC)
+    if snapshots is not None:
+        snapshots.cancel()  # 취소되며 마지막 값을 한 번 더 쓴다
+        await asyncio.gather(snapshots, return_exceptions=True)
+
+
+# 응답 직렬화는 orjson (한글 긴 문자열 기준 표준 json 대비 수 배 빠름, 출력은 같은 UTF-8 JSON)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse if orjson is not None else JSONResponse)
 logger = logging.getLogger("app.logger")
 
+@app.exception_handler(UpstreamBusy)
+async def upstream_busy_handler(request: Request, exc: UpstreamBusy):
+    # 큐 대기 예산 초과 → 오래 붙잡지 않고 바로 503 (클라이언트는 Retry-After 후 재시도)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(int(max(1, round(exc.retry_after))))},
+    )
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+    # 게이트웨이 타임아웃 직전에 먼저 포기하고 응답 (run 은 upstream 에서 취소됨)
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+
 @app.middleware("http")
 async def log_path(request: Request, call_next):
     logger.info(f"▶▶ Raw request path: {request.url.path}")
     return await call_next(request)
 
+
+@app.middleware("http")
+async def record_timing(request: Request, call_next):
+    # 라우트별 지연 히스토그램 + 요청 하나의 단계별 span 을 JSON 한 줄로 기록 (app.timing 로거)
+    with request_scope(request.method) as info:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            info["route"] = route.path
+        info["status"] = response.status_code
+    return response
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["https://style-me-wine.vercel.app", "http://localhost:3000", "http://localhost:5173", "https://spring.yourmode.co.kr", "https://yourmode.co.kr/"],  # 허용할 프론트 도메인
@@ -20,5 +103,63 @@ app.add_middleware(
     allow_headers=["*"],   # 모든 헤더 허용 (Content-Type 등)
 )
 
+class DeadlineMiddleware:
+    """
+    요청마다 마감 시각을 정해(헤더 / Lambda 남은 시간 / 기본값) 서비스 계층까지 전달하고,
+    응답 전에 클라이언트가 연결을 끊으면 핸들러를 취소한다. 취소는 진행 중인 run 의 runs.cancel 로 이어진다.
+    (Lambda 는 API Gateway 뒤라 끊김을 알 수 없으므로 마감만 적용된다)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with deadline_scope(request_timeout(scope)):
+            # receive 는 여기서만 읽고 앱에는 큐로 넘긴다 (앱이 본문을 다 읽은 뒤에도 끊김을 감지하기 위해)
+            messages: asyncio.Queue = asyncio.Queue()
+            response_done = False
+
+            async def app_send(message):
+                nonlocal response_done
+                if message["type"] == "http.response.body" and not message.get("more_body", False):
+                    response_done = True
+                await send(message)
+
+            app_task = asyncio.ensure_future(self.app(scope, messages.get, app_send))
+
+            async def watch():
+                while True:
+                    message = await receive()
+                    messages.put_nowait(message)
+                    if message["type"] == "http.disconnect":
+                        if not response_done:
+                            app_task.cancel()
+                        return
+
+            watcher = asyncio.ensure_future(watch())
+            try:
+                await app_task
+            except asyncio.CancelledError:
+                if not watcher.done() or asyncio.current_task().cancelling():
+                    raise
+                # 클라이언트가 끊어서 취소됨: 보낼 곳이 없으므로 조용히 끝낸다
+            finally:
+                watcher.cancel()
+
+
+# 큰 JSON 응답(콘텐츠 초안, 진단 8개 필드) gzip/br 압축 (opt-in, 스트리밍 응답은 제외)
+if RESPONSE_COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+app.add_middleware(DeadlineMiddleware)
+
 app.include_router(assistant_router, prefix="/assistant")
+app.include_router(metrics_router)
 handler = Mangum(app, api_gateway_base_path="/prod")
+
+# provisioned concurrency: 초기화 단계에서 openai import/클라이언트 생성을 끝내 첫 요청 지연을 없앤다
+if should_prewarm(at_init=True):
+    prewarm_blocking()
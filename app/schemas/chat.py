@@ -1,15 +1,19 @@
+from typing import Optional
+
 from pydantic import Field, BaseModel, ConfigDict
 
 
 class ChatRequest(BaseModel):
     question: str = Field(..., description="질문"),
     answer: str = Field(..., description="응답")
+    session_id: Optional[str] = Field(None, description="설문 세션 id (같은 값이면 같은 thread 에 이어서 대화)")
 
     model_config = ConfigDict(
         json_schema_extra={
             "example": {
                 "question": "1. 전체적인 골격의 인상은 어떠한가요?",
                 "answer": "두께감이 있고, 육감적입니다.",
+                "session_id": "3f2b8c1e-session",
             }
         }
     )
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel, Field, ConfigDict
 
 class DiagnoseRequest(BaseModel):
@@ -37,6 +37,10 @@ class DiagnoseRequest(BaseModel):
     )
 
 
+class BodyResultRequest(DiagnoseRequest):
+    session_id: Optional[str] = Field(None, description="채팅 설문 세션 id (미리 시작해 둔 진단 결과를 이어받음)")
+
+
 class DiagnoseResponse(BaseModel):
     body_type: str
     type_description: str
@@ -0,0 +1,313 @@
+import abc
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+
+from app.services.circuit_breaker import circuit_breaker
+from app.services.deadline import DeadlineExceeded, budget, detached_task
+from app.services.metrics import record_run_status, span
+from app.services.openai_client import call_timeout, get_async_client
+from app.services.rate_limiter import upstream_limiter
+from app.services.response_text import latest_assistant_text
+from app.services.run_poller import get_run_poller
+from app.services.standby_threads import STANDBY_THREADS_ENABLED, standby_threads
+
+# 기존 동작(폴링)이 기본. 스트리밍(stream)/Responses API(responses)는 ASSISTANT_BACKEND 로 opt-in
+DEFAULT_BACKEND = "poll"
+
+logger = logging.getLogger("app.assistant")
+
+
+async def wait_for_run(
+    thread_id: str,
+    run_id: str,
+    *,
+    assistant_id: str = "",
+    timeout_sec: Optional[float] = None,
+    started_at: Optional[float] = None,
+):
+    """
+    run이 completed 될 때까지 공용 poller 로 대기.
+    failed/cancelled/expired 면 RuntimeError, timeout_sec 초과 시 TimeoutError(RunTimeout).
+    """
+    return await get_run_poller().wait(
+        thread_id, run_id, assistant_id=assistant_id, timeout_sec=timeout_sec, started_at=started_at
+    )
+
+
+_cancelling: Set[asyncio.Task] = set()
+
+
+def cancel_run_later(thread_id: str, run_id: str, assistant_id: str = "") -> None:
+    """
+    결과를 기다리지 않게 된 run(클라이언트 연결 끊김, 요청 마감 초과)을 upstream 에서도 취소해 토큰 낭비를 막는다.
+    호출부는 보통 취소되는 중이므로 기다리지 않고 마감 없는 별도 task 로 보낸다.
+    """
+    task = detached_task(_cancel_run(thread_id, run_id, assistant_id), name="runs-cancel")
+    _cancelling.add(task)
+    task.add_done_callback(_cancelling.discard)
+
+
+async def drain_cancels(timeout_sec: float) -> None:
+    """종료 직전: 보내 둔 runs.cancel 이 끝나기를 잠시 기다린다 (루프가 닫히면 취소 요청도 사라지므로)."""
+    pending = [t for t in _cancelling if t.get_loop() is asyncio.get_running_loop()]
+    if pending:
+        await asyncio.wait(pending, timeout=timeout_sec)
+
+
+async def _cancel_run(thread_id: str, run_id: str, assistant_id: str) -> None:
+    try:
+        with span("runs_cancel", assistant_id, upstream=True):
+            await get_async_client().beta.threads.runs.cancel(
+                run_id=run_id, thread_id=thread_id, timeout=call_timeout("poll")
+            )
+    except Exception as e:
+        # 그 사이 끝난 run 이면 400 이 온다
+        logger.info("runs.cancel %s/%s failed: %s", thread_id, run_id, e)
+        return
+    record_run_status(assistant_id, "abandoned")
+
+
+def _start_thread(assistant_id: str, conversation: Optional[str]) -> Optional[str]:
+    """이어 쓸 thread: 기존 대화가 있으면 그 thread, 없으면 미리 만들어 둔 빈 thread (없으면 None → create_and_run)."""
+    if conversation is not None or not STANDBY_THREADS_ENABLED:
+        return conversation
+    return standby_threads.acquire(assistant_id)
+
+
+class AssistantBackend(abc.ABC):
+    """assistant 호출 한 번(프롬프트 → 최종 텍스트)을 수행하는 백엔드의 공통 인터페이스. 구현은 _run 만 채운다."""
+
+    name = ""
+
+    async def run(
+        self,
+        assistant_id: str,
+        prompt: str,
+        *,
+        response_format: Optional[Dict[str, Any]] = None,
+        timeout_sec: Optional[float] = None,
+    ) -> str:
+        text, _ = await self.run_turn(assistant_id, prompt, response_format=response_format, timeout_sec=timeout_sec)
+        return text
+
+    async def run_turn(
+        self,
+        assistant_id: str,
+        prompt: str,
+        *,
+        conversation: Optional[str] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+        timeout_sec: Optional[float] = None,
+    ) -> Tuple[str, str]:
+        """
+        conversation(이전 턴이 돌려준 핸들)이 있으면 그 대화에 이어서 새 메시지만 보낸다.
+        (최종 텍스트, 다음 턴에 넘길 핸들) 을 반환.
+        timeout_sec 은 요청 마감(deadline)까지 남은 시간으로 줄어들고, 그 때문에 끝나면 DeadlineExceeded.
+        """
+        # 서킷이 열려 있으면 CircuitOpen. 동시 run 수/분당 요청 수 제한. 대기 예산을 넘기면 UpstreamBusy
+        with span("run", assistant_id):
+            async with circuit_breaker.guard(assistant_id), upstream_limiter.run_slot(assistant_id):
+                run_timeout = budget(timeout_sec)
+                try:
+                    return await self._run(
+                        assistant_id, prompt,
+                        conversation=conversation, response_format=response_format, timeout_sec=run_timeout,
+                    )
+                except TimeoutError as e:
+                    record_run_status(assistant_id, "timeout")
+                    if run_timeout != timeout_sec and not isinstance(e, DeadlineExceeded):
+                        raise DeadlineExceeded() from e
+                    raise
+
+    @abc.abstractmethod
+    async def _run(
+        self, assistant_id, prompt, *, conversation=None, response_format=None, timeout_sec=None
+    ) -> Tuple[str, str]:
+        """upstream 호출 한 번. (최종 텍스트, 다음 턴 핸들) 을 반환하고 timeout_sec 을 넘기면 TimeoutError."""
+
+
+class PollingBackend(AssistantBackend):
+    """
+    기존 방식: create_and_run → runs.retrieve 폴링 → messages.list.
+    이어지는 턴(과 대기 중인 빈 thread 를 받은 첫 턴)은 그 thread 에 runs.create(additional_messages=새 메시지) 로 실행.
+    핸들 = thread id.
+    """
+
+    name = "poll"
+
+    async def _run(self, assistant_id, prompt, *, conversation=None, response_format=None, timeout_sec=None):
+        client = get_async_client()
+        kwargs = {"response_format": response_format} if response_format else {}
+        started_at = time.monotonic()
+        thread_id = _start_thread(assistant_id, conversation)
+        if thread_id is None:
+            with span("create_and_run", assistant_id, upstream=True):
+                run = await client.beta.threads.create_and_run(
+                    assistant_id=assistant_id,
+                    thread={"messages": [{"role": "user", "content": prompt}]},
+                    **kwargs,
+                )
+        else:
+            with span("runs_create", assistant_id, upstream=True):
+                run = await client.beta.threads.runs.create(
+                    thread_id=thread_id,
+                    assistant_id=assistant_id,
+                    additional_messages=[{"role": "user", "content": prompt}],
+                    **kwargs,
+                )
+        try:
+            with span("wait_for_run", assistant_id):
+                await wait_for_run(
+                    run.thread_id, run.id, assistant_id=assistant_id, timeout_sec=timeout_sec, started_at=started_at
+                )
+        except (asyncio.CancelledError, TimeoutError):
+            cancel_run_later(run.thread_id, run.id, assistant_id)
+            raise
+
+        await upstream_limiter.throttle()
+        with span("messages_list", assistant_id, upstream=True):
+            # 이 run 이 만든 메시지 중 최신 1개만 (응답 크기/파싱 비용 최소화)
+            msgs = (await client.beta.threads.messages.list(
+                thread_id=run.thread_id, run_id=run.id, order="desc", limit=1, timeout=call_timeout("poll")
+            )).data
+        return latest_assistant_text(msgs), run.thread_id
+
+
+class StreamBackend(AssistantBackend):
+    """
+    create_and_run_stream 한 번으로 run 완료까지 받아 최종 메시지를 꺼낸다 (폴링/목록 조회 없음).
+    이어지는 턴(과 대기 중인 빈 thread 를 받은 첫 턴)은 그 thread 에 runs.stream(additional_messages=새 메시지).
+    핸들 = thread id.
+    """
+
+    name = "stream"
+
+    async def _run(self, assistant_id, prompt, *, conversation=None, response_format=None, timeout_sec=None):
+        client = get_async_client()
+        kwargs = {"response_format": response_format} if response_format else {}
+        thread_id = _start_thread(assistant_id, conversation)
+        if thread_id is None:
+            manager = client.beta.threads.create_and_run_stream(
+                assistant_id=assistant_id,
+                thread={"messages": [{"role": "user", "content": prompt}]},
+                **kwargs,
+            )
+        else:
+            manager = client.beta.threads.runs.stream(
+                thread_id=thread_id,
+                assistant_id=assistant_id,
+                additional_messages=[{"role": "user", "content": prompt}],
+                **kwargs,
+            )
+
+        async def _consume():
+            async with manager as stream:
+                try:
+                    await stream.until_done()
+                except asyncio.CancelledError:
+                    # 시간 초과/연결 끊김: 스트림을 닫아도 run 은 upstream 에서 계속 돌기 때문에 따로 취소
+                    run = stream.current_run
+                    if run is not None:
+                        cancel_run_later(run.thread_id, run.id, assistant_id)
+                    raise
+                run = stream.current_run
+                status = getattr(run, "status", None)
+                record_run_status(assistant_id, status)
+                if status != "completed":
+                    raise RuntimeError(
+                        f"Assistants run ended with status={status}, "
+                        f"last_error={getattr(run, 'last_error', None)}"
+                    )
+                return latest_assistant_text(await stream.get_final_messages()), run.thread_id
+
+        try:
+            with span("create_and_run_stream", assistant_id, upstream=True):
+                return await asyncio.wait_for(_consume(), timeout_sec)
+        except asyncio.TimeoutError:
+            raise TimeoutError("Assistants run timed out")
+
+
+class ResponsesBackend(AssistantBackend):
+    """
+    Assistants 대신 Responses API 한 번 호출. 취소되면 HTTP 연결을 끊는 것으로 생성을 멈춘다 (run 같은 취소 API 없음).
+    assistant 의 model/instructions 는 처음 한 번 조회해 캐시하고, 같은 JSON 스키마를 text.format 으로 전달한다.
+    이어지는 턴은 previous_response_id 로 연결. 핸들 = 마지막 response id.
+    """
+
+    name = "responses"
+
+    def __init__(self):
+        self._assistants: Dict[str, Any] = {}
+
+    async def _assistant(self, assistant_id: str):
+        assistant = self._assistants.get(assistant_id)
+        if assistant is None:
+            await upstream_limiter.throttle()
+            with span("assistants_retrieve", assistant_id, upstream=True):
+                assistant = await get_async_client().beta.assistants.retrieve(
+                    assistant_id, timeout=call_timeout("poll")
+                )
+            self._assistants[assistant_id] = assistant
+        return assistant
+
+    async def build_request(
+        self,
+        assistant_id: str,
+        prompt: str,
+        *,
+        conversation: Optional[str] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """assistant 설정을 옮긴 responses.create 인자. Batch API 요청 본문으로도 그대로 쓴다."""
+        assistant = await self._assistant(assistant_id)
+        body: Dict[str, Any] = {"model": assistant.model, "instructions": assistant.instructions, "input": prompt}
+        if conversation is not None:
+            body["previous_response_id"] = conversation
+        if response_format and response_format.get("type") == "json_schema":
+            body["text"] = {"format": {"type": "json_schema", **response_format["json_schema"]}}
+        if getattr(assistant, "temperature", None) is not None:
+            body["temperature"] = assistant.temperature
+        if getattr(assistant, "top_p", None) is not None:
+            body["top_p"] = assistant.top_p
+        return body
+
+    async def _run(self, assistant_id, prompt, *, conversation=None, response_format=None, timeout_sec=None):
+        client = get_async_client()
+        body = await self.build_request(
+            assistant_id, prompt, conversation=conversation, response_format=response_format
+        )
+
+        try:
+            with span("responses_create", assistant_id, upstream=True):
+                resp = await asyncio.wait_for(client.responses.create(**body), timeout_sec)
+        except asyncio.TimeoutError:
+            raise TimeoutError("Responses call timed out")
+
+        record_run_status(assistant_id, resp.status or "completed")
+        if resp.status not in (None, "completed"):
+            raise RuntimeError(f"Responses call ended with status={resp.status}, error={resp.error}")
+        text = resp.output_text
+        if not text:
+            raise ValueError("Response has no text output")
+        return text.strip(), resp.id
+
+
+BACKENDS: Dict[str, AssistantBackend] = {
+    b.name: b for b in (PollingBackend(), StreamBackend(), ResponsesBackend())
+}
+
+
+def get_backend(endpoint: str) -> AssistantBackend:
+    """
+    엔드포인트(diagnosis/content/chat/body_result)별 백엔드 선택.
+    ASSISTANT_BACKEND_<ENDPOINT> → ASSISTANT_BACKEND → "poll" 순으로 찾는다 (값: poll|stream|responses).
+    호출 시점에 읽으므로 재시작 없이 두 경로를 비교할 수 있다.
+    """
+    name = os.getenv(f"ASSISTANT_BACKEND_{endpoint.upper()}") or os.getenv("ASSISTANT_BACKEND", DEFAULT_BACKEND)
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown assistant backend: {name} (choices: {', '.join(BACKENDS)})")
@@ -1,38 +1,45 @@
-import re
-import json
+import asyncio
 import time
 import os
-from openai import OpenAI
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 
-if os.getenv("AWS_LAMBDA_FUNCTION_NAME") is None:
-    from dotenv import load_dotenv
-
-    load_dotenv()
-
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Lambda 는 환경변수를 런타임이 넣어 주므로 .env 를 읽지 않는다 (python-dotenv 도 배포에 포함되지 않음)
+if os.getenv("AWS_LAMBDA_FUNCTION_NAME") is None and os.getenv("SKIP_DOTENV") != "1":
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        pass
+    else:
+        load_dotenv()
+
+from app.services.assistant_backend import cancel_run_later, get_backend, wait_for_run
+from app.services.body_type_classifier import (
+    BODY_TYPE_FALLBACK_MIN_CONFIDENCE, BODY_TYPE_FAST_PATH, body_type_classifier,
+)
+from app.services.chat_index import CHAT_INDEX_ENABLED, chat_index
+from app.services.chat_sessions import CHAT_SESSION_ENABLED, chat_sessions
+from app.services.circuit_breaker import circuit_breaker
+from app.services.deadline import DeadlineExceeded, clamp, remaining
+from app.services.diagnosis_templates import (
+    DELTA_RESPONSE_FORMAT, DIAGNOSIS_TEMPLATE_VERSION, DIAGNOSIS_TEMPLATES_ENABLED, build_delta_prompt, merge,
+)
+from app.services.hedging import CHAT_HEDGE_ENABLED, chat_hedger
+from app.services.metrics import record_run_status, span
+from app.services.openai_client import call_timeout, get_async_client, run_sync
+from app.services.rate_limiter import UpstreamBusy, upstream_limiter
+from app.services.response_text import extract_json, latest_assistant_text, loads
+from app.services.result_cache import make_key, result_cache
+from app.services.run_poller import RunTimeout
+from app.services.singleflight import inflight
+from app.services.speculation import BODY_RESULT_PREFETCH_ENABLED, BODY_RESULT_PREFETCH_MIN_ANSWERS, speculations
 
 BODY_ASSISTANT_ID = os.getenv("OPENAI_BODY_ASSISTANT_ID")
 STYLE_ASSISTANT_ID = os.getenv("OPENAI_STYLE_ASSISTANT_ID")
 CHAT_ASSISTANT_ID = os.getenv("OPENAI_CHAT_ASSISTANT_ID")
 SOFT_WAIT_SEC = 25  # API GW(29~30s)보다 짧게
-
-
-def _extract_json(raw: str) -> dict:
-    """
-    raw 에서 ```json ... ``` 블록 안의 순수 JSON만 꺼내서 dict로 반환.
-    ```json
-    { ... }
-    ```
-    코드블록이 없으면 raw 전체를 json.loads 시도.
-    """
-    # 1) ```json … ``` 코드블록 추출
-    m = re.search(r"```json\s*(\{.*?\})\s*```", raw, re.DOTALL)
-    json_str = m.group(1) if m else raw
-    # 2) 불필요한 ``` 제거 (혹시 raw에만 있을 때)
-    json_str = json_str.strip().lstrip("```").rstrip("```").strip()
-    # 3) 파싱
-    return json.loads(json_str, strict=False)
+# 템플릿 모드/유형 힌트 결과는 캐시를 나눈다 (전체 생성 결과, 다른 템플릿 버전과 섞이지 않게)
+_RESULT_KEY_TAG = (f":tpl-{DIAGNOSIS_TEMPLATE_VERSION}" if DIAGNOSIS_TEMPLATES_ENABLED else "") + \
+    (":bt-hint" if BODY_TYPE_FAST_PATH == "hint" else "")
 
 
 RESULT_SCHEMA = {
@@ -60,14 +67,31 @@ RESULT_SCHEMA = {
     "additionalProperties": False,
 }
 
-def _build_prompt(answers: list[str], height: float, weight: float, gender: str) -> str:
+DIAGNOSIS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "BodyDiagnosisResult",
+        "strict": True,
+        "schema": RESULT_SCHEMA,
+    },
+}
+
+def _body_type_line(body_type: Optional[str]) -> str:
+    # 규칙 분류기가 확신한 유형은 모델이 다시 판단하지 않도록 고정 (BODY_TYPE_FAST_PATH=hint)
+    return f"- 골격 유형: {body_type} (확정, body_type 은 이 값 그대로)\n" if body_type else ""
+
+
+def _build_prompt(
+    answers: list[str], height: float, weight: float, gender: str, body_type: Optional[str] = None
+) -> str:
     return (
         "당신은 골격 진단 및 패션 스타일리스트입니다.\n"
         "아래 사용자 정보를 바탕으로 체형을 진단하고, 반드시 JSON으로만 응답하세요.\n"
         "출력은 다음 스키마의 각 필드를 한국어로 충실히 채우세요. 모든 값은 문자열입니다.\n"
         "필드: body_type, type_description, detailed_features, attraction_points, "
         "recommended_styles, avoid_styles, styling_fixes, styling_tips\n\n"
-        f"- 성별: {gender}\n"
+        + _body_type_line(body_type)
+        + f"- 성별: {gender}\n"
         f"- 키: {height}cm\n"
         f"- 체중: {weight}kg\n"
         "- 설문 응답:\n"
@@ -75,129 +99,142 @@ def _build_prompt(answers: list[str], height: float, weight: float, gender: str)
         + "\n\n주의: 코드블록 없이 순수 JSON만 출력하세요."
     )
 
-# ---------- 안전한 메시지 텍스트 추출기 ----------
-def _as_dict(obj):
+def local_diagnosis(answers: list[str]) -> Optional[Dict[str, Any]]:
+    """
+    규칙 분류기로 유형만 정하고 템플릿으로 채운 진단 (모델 호출 없음).
+    확신도가 BODY_TYPE_FALLBACK_MIN_CONFIDENCE 미만이거나 단서가 없으면 None.
+    """
+    guess = body_type_classifier.confident(answers, BODY_TYPE_FALLBACK_MIN_CONFIDENCE)
+    if guess is None:
+        return None
+    return merge({"body_type": guess.body_type})
+
+
+def fallback_diagnosis(answers: list[str]) -> Optional[Dict[str, Any]]:
+    """
+    OpenAI 실패/지연 시 502·503·504 대신 내려줄 진단 (BODY_TYPE_FALLBACK_ENABLED 일 때 라우트에서 사용).
+    None 이면 라우트는 원래 오류를 그대로 보낸다.
+    """
+    data = local_diagnosis(answers)
+    if data is not None:
+        body_type_classifier.count("fallback")
+    return data
+
+
+def _fast_path(answers: list[str]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    BODY_TYPE_FAST_PATH 에 따라 (바로 반환할 결과, 프롬프트에 고정할 유형).
+    확신도가 낮거나 off 면 (None, None) → 평소처럼 모델이 전부 판단.
+    """
+    if BODY_TYPE_FAST_PATH == "off":
+        return None, None
+    guess = body_type_classifier.confident(answers)
+    if guess is None:
+        return None, None
+    body_type_classifier.count("fast_path")
+    if BODY_TYPE_FAST_PATH == "skip":
+        return merge({"body_type": guess.body_type}), None
+    return None, guess.body_type
+
+
+async def _templated_diagnosis_async(
+    endpoint: str,
+    assistant_id: str,
+    answers: list[str],
+    height: float,
+    weight: float,
+    gender: str,
+    *,
+    timeout_sec: float,
+    body_type: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    2단계 진단: 모델은 body_type 과 사용자별 문장(delta)만 짧게 생성하고,
+    나머지 공통 문단은 버전 관리되는 로컬 템플릿에서 채운다 (출력 토큰 = 지연의 대부분을 줄임).
+    """
+    with span("prompt_build", assistant_id):
+        prompt = build_delta_prompt(answers, height, weight, gender, body_type=body_type)
+
+    raw = await get_backend(endpoint).run(
+        assistant_id, prompt, response_format=DELTA_RESPONSE_FORMAT, timeout_sec=timeout_sec
+    )
+
     try:
-        if hasattr(obj, "model_dump"):
-            return obj.model_dump()
-        if hasattr(obj, "dict"):
-            return obj.dict()
-    except Exception:
-        pass
-    return obj if isinstance(obj, dict) else json.loads(json.dumps(obj, default=str))
-
-def _extract_first_text_from_content_items(items):
-    for item in items or []:
-        d = _as_dict(item)
-        itype = d.get("type")
-
-        # 중첩 content(tool_result 등)
-        if isinstance(d.get("content"), list):
-            inner = _extract_first_text_from_content_items(d["content"])
-            if inner:
-                return inner
-
-        if itype in ("output_text", "text", "input_text"):
-            t = d.get("text")
-            if isinstance(t, str):
-                return t
-            if isinstance(t, dict) and isinstance(t.get("value"), str):
-                return t["value"]
-
-        for key in ("output_text", "value"):
-            if isinstance(d.get(key), str):
-                return d[key]
-    return None
-
-def _extract_first_text_from_message(msg):
-    m = _as_dict(msg)
-    for key in ("text", "output_text"):
-        v = m.get(key)
-        if isinstance(v, str):
-            return v
-        if isinstance(v, dict) and isinstance(v.get("value"), str):
-            return v["value"]
-    content = m.get("content") or []
-    if isinstance(content, list):
-        return _extract_first_text_from_content_items(content)
-    return None
+        with span("json_parse", assistant_id):
+            delta = extract_json(raw)
+        if body_type:
+            delta["body_type"] = body_type
+        with span("template_merge", assistant_id):
+            return merge(delta)
+    except Exception as e:
+        raise ValueError(f"JSON 파싱 실패: {e}")
 
-def diagnose_body_type_with_assistant(
+
+async def diagnose_body_type_with_assistant_async(
     answers: list[str],
     height: float,
     weight: float,
     gender: str,
     *,
     timeout_sec: int = 60,
+    use_cache: bool = True,
 ) -> Dict[str, Any]:
     """
     1) 사용자 정보로 prompt 구성
-    2) create_and_run 으로 assistant 호출 (JSON 스키마 강제)
-    3) 폴링하여 run 완료 대기(타임아웃/에러 처리)
-    4) 마지막 어시스턴트 메시지(raw)에서 JSON 파싱 → dict 반환
+    2) 선택된 백엔드로 assistant 호출 (JSON 스키마 강제, 타임아웃/에러 처리)
+    3) 마지막 어시스턴트 메시지(raw)에서 JSON 파싱 → dict 반환
+    같은 (정규화된) 입력의 결과는 result_cache 에서 바로 반환한다.
+    use_cache=False 면 규칙 분류기 빠른 경로, 캐시, single-flight 를 모두 건너뛰고 항상 assistant 를 호출한다
+    (프롬프트를 바꾼 뒤 일괄 재진단). 새 결과는 캐시에 덮어쓴다.
     """
-    prompt = _build_prompt(answers, height, weight, gender)
-
-    run = client.beta.threads.create_and_run(
-        assistant_id=BODY_ASSISTANT_ID,
-        thread={"messages": [{"role": "user", "content": prompt}]},
-        response_format={
-            "type": "json_schema",
-            "json_schema": {
-                "name": "BodyDiagnosisResult",
-                "strict": True,
-                "schema": RESULT_SCHEMA,
-            },
-        },
-    )
+    body_type = None
+    if use_cache:
+        local, body_type = _fast_path(answers)
+        if local is not None:
+            return local
+
+    cache_key = make_key(f"diagnosis:{BODY_ASSISTANT_ID}{_RESULT_KEY_TAG}", answers, height, weight, gender)
+    if use_cache:
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    async def _run() -> Dict[str, Any]:
+        if DIAGNOSIS_TEMPLATES_ENABLED:
+            data = await _templated_diagnosis_async(
+                "diagnosis", BODY_ASSISTANT_ID, answers, height, weight, gender,
+                timeout_sec=timeout_sec, body_type=body_type,
+            )
+            result_cache.set(cache_key, data)
+            return data
 
-    thread_id = run.thread_id
-    run_id = run.id
+        with span("prompt_build", BODY_ASSISTANT_ID):
+            prompt = _build_prompt(answers, height, weight, gender, body_type=body_type)
 
-    # 상태 폴링 (에러/타임아웃 처리)
-    deadline = time.time() + timeout_sec
-    while True:
-        status = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run_id)
-        if status.status == "completed":
-            break
-        if status.status in {"failed", "cancelled", "expired"}:
-            raise RuntimeError(
-                f"Assistants run ended with status={status.status}, "
-                f"last_error={getattr(status, 'last_error', None)}"
-            )
-        if time.time() > deadline:
-            raise TimeoutError("Assistants run timed out")
-        time.sleep(0.3)
-
-    # 최신 assistant 메시지 안전 추출
-    # (일반적으로 list()는 최신이 앞에 오지만, role/시간 기준으로 한 번 더 필터)
-    messages = client.beta.threads.messages.list(thread_id=thread_id).data
-    assistant_msgs = [m for m in messages if getattr(m, "role", "") == "assistant"]
-    if not assistant_msgs:
-        raise ValueError("No assistant message found")
-
-    # created_at이 있다면 최신 정렬, 없다면 그대로 첫 번째 사용
-    try:
-        assistant_msgs.sort(key=lambda m: getattr(m, "created_at", 0), reverse=True)
-    except Exception:
-        pass
+        raw = await get_backend("diagnosis").run(
+            BODY_ASSISTANT_ID,
+            prompt,
+            response_format=DIAGNOSIS_RESPONSE_FORMAT,
+            timeout_sec=timeout_sec,
+        )
 
-    first = assistant_msgs[0]
-    if not first.content or getattr(first.content[0], "type", "text") != "text":
-        # 도구 호출 등 다른 타입이 섞였을 가능성 방어
-        raise ValueError(f"Unexpected message content type: {getattr(first.content[0], 'type', 'unknown')}")
+        try:
+            # strict json_schema 덕분에 대부분 안전하지만, 혹시 모를 포맷 이슈 방어
+            with span("json_parse", BODY_ASSISTANT_ID):
+                data = extract_json(raw)
+        except Exception as e:
+            raise ValueError(f"JSON 파싱 실패: {e}")
 
-    raw = first.content[0].text.value.strip()
+        result_cache.set(cache_key, data)
+        return data
 
-    try:
-        # strict json_schema 덕분에 대부분 안전하지만, 혹시 모를 포맷 이슈 방어
-        return json.loads(raw)
-    except Exception as e:
-        print("🛠️ [DEBUG] raw from assistant:\n", raw)
-        raise ValueError(f"JSON 파싱 실패: {e}")
+    if not use_cache:
+        return await _run()
+    # 같은 입력으로 이미 진행 중인 run 이 있으면 새로 시작하지 않고 그 결과를 함께 기다림
+    return await inflight.do(cache_key, _run)
 
 
-def create_content(
+def _build_content_prompt(
         name: str,
         body_type: str,
         height: int,
@@ -208,9 +245,9 @@ def create_content(
         recommended_style: str,
         avoid_style: str,
         budget: str,
-):
+) -> str:
     items_section = "\n".join(f"{i + 1}. {item}" for i, item in enumerate(recommendation_items))
-    prompt = (
+    return (
         "다음 정보를 바탕으로 **스타일 추천 콘텐츠 초안**을 작성해줘.\n\n"
         f"- 이름: {name}\n"
         f"- 체형 타입: {body_type}\n"
@@ -226,83 +263,195 @@ def create_content(
         "↳ 초안 작성."
     )
 
-    run = client.beta.threads.create_and_run(
-        assistant_id=STYLE_ASSISTANT_ID,
-        thread={"messages": [{"role": "user", "content": prompt}]}
-    )
-    thread_id = run.thread_id
-    run_id = run.id
 
-    while True:
-        status = client.beta.threads.runs.retrieve(
-            thread_id=thread_id,
-            run_id=run_id
+async def create_content_async(
+        name: str,
+        body_type: str,
+        height: int,
+        weight: int,
+        body_feature: str,
+        recommendation_items: list[str],
+        recommended_situation: str,
+        recommended_style: str,
+        avoid_style: str,
+        budget: str,
+):
+    with span("prompt_build", STYLE_ASSISTANT_ID):
+        prompt = _build_content_prompt(
+            name, body_type, height, weight, body_feature, recommendation_items,
+            recommended_situation, recommended_style, avoid_style, budget,
         )
-        if status.status == "completed":
-            break
-        time.sleep(0.3)
 
-    msgs = client.beta.threads.messages.list(thread_id=thread_id).data
-    raw = msgs[0].content[0].text.value  # 어시스턴트가 첫 번째 메시지로 보낸 응답
+    raw = await get_backend("content").run(STYLE_ASSISTANT_ID, prompt)
 
     return raw
 
 
-def chat_body_assistant(question: str, answer: str):
-    schema = {
-        "type": "object",
-        "properties": {
-            "isSuccess": {"type": "boolean"},
-            "selected": {"type": ["string", "null"]},
-            "message": {"type": "string"},
-            "nextQuestion": {"type": ["string", "null"]},
-        },
-        # ← 키는 모두 존재해야 함(값은 string 또는 null 허용)
-        "required": ["isSuccess", "selected", "message", "nextQuestion"],
-        "additionalProperties": False,
-    }
-
-    prompt = (
-        f"{question}에 대한 응답입니다.\n"
-        f"- 응답: {answer}\n"
-        "응답을 위 JSON 형식에 맞춰서만 반환하세요."
+async def stream_content_async(
+        name: str,
+        body_type: str,
+        height: int,
+        weight: int,
+        body_feature: str,
+        recommendation_items: list[str],
+        recommended_situation: str,
+        recommended_style: str,
+        avoid_style: str,
+        budget: str,
+) -> AsyncIterator[str]:
+    """
+    create_content 와 같은 프롬프트로 STYLE assistant 를 스트리밍 실행하고,
+    생성되는 텍스트 조각(delta)을 순서대로 yield.
+    run 이 completed 가 아니면 마지막에 RuntimeError, 요청 마감이 지나면 DeadlineExceeded.
+    """
+    prompt = _build_content_prompt(
+        name, body_type, height, weight, body_feature, recommendation_items,
+        recommended_situation, recommended_style, avoid_style, budget,
     )
 
-    run = client.beta.threads.create_and_run(
-        assistant_id=CHAT_ASSISTANT_ID,
-        thread={"messages": [{"role": "user", "content": prompt}]},
-        response_format={
-            "type": "json_schema",
-            "json_schema": {
-                "name": "BodyQuestionAnswer",
-                "strict": True,  # ← 엄격 모드 유지
-                "schema": schema,
-            },
-        },
-    )
+    client = get_async_client()
+    async with circuit_breaker.guard(STYLE_ASSISTANT_ID), upstream_limiter.run_slot(STYLE_ASSISTANT_ID), \
+            client.beta.threads.create_and_run_stream(
+                assistant_id=STYLE_ASSISTANT_ID,
+                thread={"messages": [{"role": "user", "content": prompt}]},
+            ) as stream:
+        try:
+            with span("create_and_run_stream", STYLE_ASSISTANT_ID, upstream=True):
+                async for delta in stream.text_deltas:
+                    left = remaining()
+                    if left is not None and left <= 0:
+                        raise DeadlineExceeded()
+                    yield delta
+        except (asyncio.CancelledError, GeneratorExit, DeadlineExceeded):
+            # 클라이언트가 끊었거나 마감이 지남: 스트림을 닫아도 run 은 계속 돌기 때문에 따로 취소
+            run = stream.current_run
+            if run is not None:
+                cancel_run_later(run.thread_id, run.id, STYLE_ASSISTANT_ID)
+            raise
+
+        run = stream.current_run
+        record_run_status(STYLE_ASSISTANT_ID, getattr(run, "status", None))
+        if run is None or run.status != "completed":
+            raise RuntimeError(
+                f"Assistants run ended with status={getattr(run, 'status', None)}, "
+                f"last_error={getattr(run, 'last_error', None)}"
+            )
 
-    thread_id = run.thread_id
-    run_id = run.id
 
-    while True:
-        status = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run_id)
-        if status.status == "completed":
-            break
-        time.sleep(0.3)
+CHAT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "isSuccess": {"type": "boolean"},
+        "selected": {"type": ["string", "null"]},
+        "message": {"type": "string"},
+        "nextQuestion": {"type": ["string", "null"]},
+    },
+    # ← 키는 모두 존재해야 함(값은 string 또는 null 허용)
+    "required": ["isSuccess", "selected", "message", "nextQuestion"],
+    "additionalProperties": False,
+}
 
-    msgs = client.beta.threads.messages.list(thread_id=thread_id).data
-    assistant_msg = next((m for m in msgs if getattr(m, "role", "") == "assistant"), None)
-    if assistant_msg is None:
-        raise ValueError("No assistant message found")
+CHAT_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "BodyQuestionAnswer",
+        "strict": True,  # ← 엄격 모드 유지
+        "schema": CHAT_SCHEMA,
+    },
+}
 
-    parts = [p for p in getattr(assistant_msg, "content", []) if getattr(p, "type", "") == "text"]
-    if not parts:
-        raise ValueError("Assistant message has no text content")
 
-    text_obj = parts[0].text
-    raw = (text_obj.value if hasattr(text_obj, "value") else str(text_obj)).strip()
+# 설문 응답 판정 규칙. 모든 사용자/턴에서 글자 하나 다르지 않은 고정 문구라 프롬프트 맨 앞에 둔다:
+# OpenAI 프롬프트 캐시는 앞부분이 일치하는 1024 토큰 이상의 접두사에만 걸리므로 assistant instructions 와 합쳐 그 길이를 넘기고,
+# 턴마다 바뀌는 질문/응답은 항상 이 뒤에 붙인다. 세션 thread 에는 첫 턴에 한 번만 넣는다 (이후 턴은 thread 에 이미 있음)
+CHAT_INSTRUCTIONS = (
+    "당신은 골격 진단 설문을 진행하는 스타일리스트입니다. 사용자는 17문항으로 된 골격 진단 설문에 한 문항씩 답합니다.\n"
+    "매 턴마다 '질문'과 사용자의 '응답'이 주어집니다. 응답이 그 질문의 보기 중 어느 것에 해당하는지 판정하고,\n"
+    "다음 규칙에 따라 JSON 하나만 반환하세요. 코드블록, 설명 문장, 키 이외의 값은 출력하지 않습니다.\n"
+    "\n"
+    "[판정 규칙]\n"
+    "1. 응답이 보기 하나와 같은 뜻이면 그 보기를 고릅니다. 맞춤법, 띄어쓰기, 존댓말/반말, 조사 차이는 무시합니다.\n"
+    "   예: '두께감이 있고 육감적입니다', '두께감 있고 육감적임' 은 모두 '두께감이 있고 육감적이다' 입니다.\n"
+    "2. 보기의 문구를 그대로 쓰지 않았더라도 뜻이 분명히 한 보기를 가리키면 그 보기를 고릅니다.\n"
+    "   예: '살이 잘 안 빠지고 말랑한 편' 처럼 특징을 풀어 쓴 응답은 가장 가까운 보기로 판정합니다.\n"
+    "3. 부정어와 반의어에 주의합니다. '있다/없다', '높다/낮다', '넓다/좁다', '길다/짧다', '크다/작다',\n"
+    "   '두껍다/얇다', '않다', '안', '못' 이 들어가면 글자가 비슷해도 반대 보기일 수 있으니 뜻으로 판단합니다.\n"
+    "4. 응답이 두 보기에 걸쳐 있거나 '잘 모르겠다', '중간이다' 처럼 하나로 정할 수 없으면 고르지 않습니다.\n"
+    "5. 질문과 관계없는 응답(인사, 다른 질문, 장난, 빈 응답)은 고르지 않습니다.\n"
+    "6. 설문 문항 순서와 보기 문구는 바꾸지 않습니다. 이미 지난 문항을 다시 묻지 않습니다.\n"
+    "\n"
+    "[출력 필드]\n"
+    "- isSuccess: 보기 하나로 판정했으면 true, 고르지 못했으면 false.\n"
+    "- selected: 판정한 보기의 원래 문구를 그대로 씁니다 (사용자 응답을 옮겨 쓰지 않음). 고르지 못했으면 null.\n"
+    "- message: 사용자에게 보여 줄 한두 문장의 안내입니다.\n"
+    "    성공이면 어떤 보기로 기록했는지 짧게 확인합니다. 예: '두께감이 있고 육감적인 편으로 기록했어요.'\n"
+    "    실패면 왜 고르지 못했는지와 함께 보기를 짧게 다시 알려 주고 다시 답해 달라고 요청합니다.\n"
+    "    진단 결과, 체형 유형 이름(스트레이트/웨이브/내추럴), 스타일 추천은 message 에 쓰지 않습니다.\n"
+    "- nextQuestion: 성공이면 다음 문항의 번호와 질문 문구(예: '2. 피부의 질감은 어떠한가요?')를,\n"
+    "    실패면 같은 문항을 다시, 마지막 문항(17번)에 성공했으면 null 을 씁니다.\n"
+    "\n"
+    "[말투]\n"
+    "- 존댓말(해요체)로, 친절하지만 짧게 씁니다. 이모지와 느낌표 남용은 피합니다.\n"
+    "- 사용자의 외모를 평가하거나 특정 체형이 더 낫다고 말하지 않습니다.\n"
+    "- 의학적 판단, 다이어트나 체중 감량 조언은 하지 않습니다.\n"
+    "\n"
+    "응답을 JSON 형식에 맞춰서만 반환하세요.\n"
+    "\n"
+)
+
+
+def _build_chat_prompt(question: str, answer: str, *, with_instructions: bool = True) -> str:
+    # 고정 문구(CHAT_INSTRUCTIONS)를 앞에, 턴마다 바뀌는 질문/응답을 뒤에 둬야 프롬프트 캐시(접두사 일치)에 잘 걸린다
+    return (
+        (CHAT_INSTRUCTIONS if with_instructions else "")
+        + f"{question}에 대한 응답입니다.\n"
+        f"- 응답: {answer}"
+    )
 
-    data = json.loads(raw)
+
+async def chat_body_assistant_async(question: str, answer: str, session_id: Optional[str] = None):
+    """
+    session_id 가 있으면 같은 세션의 턴을 하나의 thread 에 이어 붙인다 (이번 턴 메시지만 전송).
+    세션이 없거나 만료됐으면 새 thread 로 시작하고, 실패하면 세션을 버려 다음 턴은 새 thread 로 간다.
+    CHAT_HEDGE_ENABLED 면 세션 없는 턴만 느릴 때 같은 요청을 하나 더 보내 먼저 끝난 쪽을 쓴다 (chat_hedger).
+    세션 턴은 hedge 하지 않는다: thread 하나에는 run 을 하나만 돌릴 수 있어 hedge 는 이전 대화가 없는 새 thread 가
+    되고, 그쪽이 이기면 세션 맥락이 사라지거나(세션을 옮길 때) 원래 thread 에 답 없는 메시지가 남는다(취소될 때).
+    세션 턴은 채팅 응답 인덱스로 건너뛰지 않는다: 건너뛴 턴은 thread 에 남지 않아 이후 턴이 맥락 없이 돈다.
+    """
+    backend = get_backend("chat")
+
+    if session_id and CHAT_SESSION_ENABLED:
+        async with chat_sessions.turn_lock(session_id):
+            conversation = chat_sessions.get(session_id)
+            # 이어지는 턴의 thread 에는 첫 턴에 보낸 고정 지시문이 이미 있으므로 이번 질문/응답만 보낸다
+            prompt = _build_chat_prompt(question, answer, with_instructions=conversation is None)
+
+            try:
+                raw, next_conversation = await backend.run_turn(
+                    CHAT_ASSISTANT_ID, prompt, conversation=conversation, response_format=CHAT_RESPONSE_FORMAT
+                )
+            except UpstreamBusy:
+                raise
+            except Exception:
+                chat_sessions.forget(session_id)
+                raise
+            chat_sessions.save(session_id, next_conversation, reused=conversation is not None)
+    else:
+        # 알려진 (질문, 보기) 조합은 로컬 인덱스에서 바로 응답, 없을 때만 LLM 호출
+        if CHAT_INDEX_ENABLED:
+            hit = chat_index.lookup(question, answer)
+            if hit is not None:
+                return hit
+
+        prompt = _build_chat_prompt(question, answer)
+
+        def run():
+            return backend.run(CHAT_ASSISTANT_ID, prompt, response_format=CHAT_RESPONSE_FORMAT)
+
+        raw = await (chat_hedger.call(run, run, assistant_id=CHAT_ASSISTANT_ID) if CHAT_HEDGE_ENABLED else run())
+
+    with span("json_parse", CHAT_ASSISTANT_ID):
+        data = loads(raw)
 
     # (선택) 서버에서 일관 포맷으로 정규화: null -> ""
     #  - FastAPI response_model이 selected/nextQuestion를 str로 요구한다면 필수
@@ -312,10 +461,60 @@ def chat_body_assistant(question: str, answer: str):
     if data.get("nextQuestion") is None:
         data["nextQuestion"] = ""
 
+    if CHAT_INDEX_ENABLED:
+        chat_index.learn(question, answer, data)
     return data
 
 
-def chat_body_result(
+def body_result_key(answers: list[str], height: float, weight: float, gender: str) -> str:
+    return make_key(f"body_result:{CHAT_ASSISTANT_ID}{_RESULT_KEY_TAG}", answers, height, weight, gender)
+
+
+def prefetch_body_result(answers: list[str], height: float, weight: float, gender: str, session_id: str) -> str:
+    """
+    채팅 설문 도중 최종 진단을 미리 시작한다 (이벤트 루프 안에서 호출).
+    같은 세션이 나중에 같은 입력으로 /body-result 를 부르면 그 결과를 이어받는다.
+    반환: started | running | ready | disabled | too_few_answers | busy
+    """
+    if not BODY_RESULT_PREFETCH_ENABLED:
+        return "disabled"
+    if len(answers) < BODY_RESULT_PREFETCH_MIN_ANSWERS:
+        return "too_few_answers"
+    # 실제 요청이 슬롯을 기다리는 중이면 투기적 실행으로 자리를 뺏지 않는다
+    if upstream_limiter.saturated(CHAT_ASSISTANT_ID):
+        return "busy"
+    return speculations.start(
+        session_id,
+        body_result_key(answers, height, weight, gender),
+        lambda: chat_body_result_async(answers, height, weight, gender),
+    )
+
+
+async def prefetched_body_result_async(
+    answers: list[str],
+    height: float,
+    weight: float,
+    gender: str,
+    session_id: str,
+    *,
+    wait_sec: float,
+) -> Optional[Dict[str, Any]]:
+    """
+    세션에 미리 시작해 둔 진단이 같은 입력이면 최대 wait_sec 동안 기다려 결과를 반환.
+    없거나 입력이 다르거나(이 경우 취소) 실패/시간 초과면 None → 호출부가 평소대로 실행한다.
+    시간 초과여도 run 은 계속 돌고, 평소 경로가 single-flight 로 같은 run 에 합류한다.
+    """
+    task = speculations.take(session_id, body_result_key(answers, height, weight, gender))
+    if task is None:
+        return None
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), wait_sec)
+    except Exception:
+        # 시간 초과, 미리 실행하다 난 실패(UpstreamBusy 포함)는 평소 경로에서 다시 시도
+        return None
+
+
+async def chat_body_result_async(
         answers: list[str],
         height: float,
         weight: float,
@@ -346,127 +545,117 @@ def chat_body_result(
         "additionalProperties": False
     }
 
-    prompt = (
-            f"다음 응답 내용을 바탕으로 골격 진단 결과를 알려줘\n"
-            f"- 성별: {gender}\n"
-            f"- 키: {height}cm\n"
-            f"- 체중: {weight}kg\n"
-            f"- 설문 응답:\n"
-            + "\n".join(f"{i + 1}. {a}" for i, a in enumerate(answers))
-            + "\n\n"
-              "체형 진단"
-    )
-
-    run = client.beta.threads.create_and_run(
-        assistant_id=CHAT_ASSISTANT_ID,
-        thread={"messages": [{"role": "user", "content": prompt}]},
-        response_format={
-            "type": "json_schema",
-            "json_schema": {
-                "name": "BodyDiagnosisResult",
-                "strict": True,
-                "schema": schema
-            }
-        },
-    )
+    local, body_type = _fast_path(answers)
+    if local is not None:
+        return local
 
-    thread_id = run.thread_id
-    run_id = run.id
+    cache_key = body_result_key(answers, height, weight, gender)
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
-    deadline = time.time() + 60
-
-    while True:
-        status = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run_id)
-        if status.status == "completed":
-            break
-        if status.status in {"failed", "cancelled", "expired"}:
-            raise RuntimeError(
-                f"Run ended with status={status.status}, last_error={getattr(status, 'last_error', None)}")
-        if time.time() > deadline:
-            raise TimeoutError("Assistants run timed out")
-        time.sleep(0.3)
-
-    msgs = client.beta.threads.messages.list(thread_id=thread_id).data
-
-    # 최신 assistant 메시지 선택 (created_at 기준 내림차순)
-    assistant_msgs = [m for m in msgs if getattr(m, "role", "") == "assistant"]
-    if not assistant_msgs:
-        raise ValueError("No assistant message found")
-    assistant_msgs.sort(key=lambda m: getattr(m, "created_at", 0), reverse=True)
-    msg = assistant_msgs[0]
+    async def _run() -> Dict[str, Any]:
+        if DIAGNOSIS_TEMPLATES_ENABLED:
+            data = await _templated_diagnosis_async(
+                "body_result", CHAT_ASSISTANT_ID, answers, height, weight, gender,
+                timeout_sec=60, body_type=body_type,
+            )
+            result_cache.set(cache_key, data)
+            return data
+
+        with span("prompt_build", CHAT_ASSISTANT_ID):
+            prompt = (
+                    f"다음 응답 내용을 바탕으로 골격 진단 결과를 알려줘\n"
+                    + _body_type_line(body_type)
+                    + f"- 성별: {gender}\n"
+                    f"- 키: {height}cm\n"
+                    f"- 체중: {weight}kg\n"
+                    f"- 설문 응답:\n"
+                    + "\n".join(f"{i + 1}. {a}" for i, a in enumerate(answers))
+                    + "\n\n"
+                      "체형 진단"
+            )
 
-    # content 에서 text 파트만 안전하게 추출
-    text_parts = [p for p in getattr(msg, "content", []) if getattr(p, "type", "") == "text"]
-    if not text_parts:
-        raise ValueError("Assistant message has no text content")
+        raw = await get_backend("body_result").run(
+            CHAT_ASSISTANT_ID,
+            prompt,
+            response_format={
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "BodyDiagnosisResult",
+                    "strict": True,
+                    "schema": schema
+                }
+            },
+            timeout_sec=60,
+        )
 
-    raw = text_parts[0].text.value.strip()
+        # JSON 파싱 후 반환 (여기서 반드시 dict를 return)
+        try:
+            with span("json_parse", CHAT_ASSISTANT_ID):
+                data = extract_json(raw)
+        except Exception as e:
+            raise ValueError(f"JSON 파싱 실패: {e}")
 
-    # JSON 파싱 후 반환 (여기서 반드시 dict를 return)
-    try:
-        data = json.loads(raw)
-    except Exception as e:
-        print("🛠️ [DEBUG] raw from assistant:\n", raw)
-        raise ValueError(f"JSON 파싱 실패: {e}")
+        result_cache.set(cache_key, data)
+        return data
 
-    return data
+    # 같은 입력으로 이미 진행 중인 run 이 있으면 새로 시작하지 않고 그 결과를 함께 기다림
+    return await inflight.do(cache_key, _run)
 
-def chat_body_result_soft(
+async def chat_body_result_soft_async(
     answers: list[str],
     height: float,
     weight: float,
     gender: str,
 ) -> Dict[str, Any]:
     """
-    1) 최대 SOFT_WAIT_SEC 동안만 동기 대기
+    1) 최대 SOFT_WAIT_SEC 동안만 비동기 대기
     2) 완료되면 결과 JSON(dict) 반환
     3) 미완료면 {"thread_id","run_id","status"} 반환(컨트롤러에서 202로 내려주기)
     """
-    prompt = _build_prompt(answers, height, weight, gender)
-
-    run = client.beta.threads.create_and_run(
-        assistant_id=BODY_ASSISTANT_ID,
-        thread={"messages": [{"role": "user", "content": prompt}]},
-        response_format={
-            "type": "json_schema",
-            "json_schema": {
-                "name": "BodyDiagnosisResult",
-                "strict": True,
-                "schema": RESULT_SCHEMA,
-            },
-        },
-    )
+    client = get_async_client()
+    with span("prompt_build", BODY_ASSISTANT_ID):
+        prompt = _build_prompt(answers, height, weight, gender)
+
+    # 슬롯은 소프트 대기 동안만 잡는다 (202 이후 run 은 upstream 에서 계속 진행).
+    # 소프트 대기 안에 끝나지 않은 run 은 upstream 이 받아 처리 중이므로 서킷에는 성공으로 남는다
+    async with circuit_breaker.guard(BODY_ASSISTANT_ID), upstream_limiter.run_slot(BODY_ASSISTANT_ID):
+        started_at = time.monotonic()
+        with span("create_and_run", BODY_ASSISTANT_ID, upstream=True):
+            run = await client.beta.threads.create_and_run(
+                assistant_id=BODY_ASSISTANT_ID,
+                thread={"messages": [{"role": "user", "content": prompt}]},
+                response_format=DIAGNOSIS_RESPONSE_FORMAT,
+            )
+
+        thread_id = run.thread_id
+        run_id = run.id
 
-    thread_id = run.thread_id
-    run_id = run.id
-
-    # 소프트 대기
-    deadline = time.time() + SOFT_WAIT_SEC
-    status = run.status
-    while time.time() < deadline:
-        st = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run_id)
-        status = st.status
-        if status == "completed":
-            break
-        if status in {"failed", "cancelled", "expired"}:
-            last_err = getattr(st, "last_error", None)
-            raise RuntimeError(f"assistants run {status}: {last_err}")
-        time.sleep(0.3)
+        # 소프트 대기 (공용 poller, 실패 상태면 RuntimeError). 요청 마감이 더 가까우면 그때까지만
+        try:
+            st = await wait_for_run(
+                thread_id, run_id, assistant_id=BODY_ASSISTANT_ID, timeout_sec=clamp(SOFT_WAIT_SEC),
+                started_at=started_at,
+            )
+            status = st.status
+        except RunTimeout as e:
+            status = e.status or run.status
+        except asyncio.CancelledError:
+            # 202 를 받을 클라이언트가 없으므로 run 도 취소
+            cancel_run_later(thread_id, run_id, BODY_ASSISTANT_ID)
+            raise
 
     if status == "completed":
         # 결과 바로 파싱해서 반환
-        msgs = client.beta.threads.messages.list(thread_id=thread_id, order="desc", limit=20).data
-        raw: Optional[str] = None
-        for m in msgs:
-            if getattr(m, "role", "") != "assistant":
-                continue
-            raw = _extract_first_text_from_message(m)
-            if raw:
-                break
-        if not raw:
-            raise RuntimeError("assistant message has no extractable text")
-
-        data = json.loads(raw.strip())
+        await upstream_limiter.throttle()
+        with span("messages_list", BODY_ASSISTANT_ID, upstream=True):
+            msgs = (await client.beta.threads.messages.list(
+                thread_id=thread_id, run_id=run_id, order="desc", limit=1, timeout=call_timeout("poll")
+            )).data
+
+        with span("json_parse", BODY_ASSISTANT_ID):
+            data = loads(latest_assistant_text(msgs))
 
         # 필드 정규화(혹시 None/누락 방어)
         for k in ("body_type","type_description","detailed_features","attraction_points",
@@ -478,28 +667,41 @@ def chat_body_result_soft(
     # 미완료면 run 식별자 반환 (컨트롤러가 202로 내려줌)
     return {"thread_id": thread_id, "run_id": run_id, "status": status}
 
-def get_run_status(thread_id: str, run_id: str) -> Dict[str, Any]:
-    st = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run_id)
-    return {"status": st.status, "last_error": getattr(st, "last_error", None)}
+async def get_run_status_async(thread_id: str, run_id: str) -> Dict[str, Any]:
+    async def _run() -> Dict[str, Any]:
+        client = get_async_client()
+        await upstream_limiter.throttle()
+        with span("runs_retrieve", upstream=True):
+            st = await client.beta.threads.runs.retrieve(
+                thread_id=thread_id, run_id=run_id, timeout=call_timeout("poll")
+            )
+        return {"status": st.status, "last_error": getattr(st, "last_error", None)}
 
-def get_run_result(thread_id: str, run_id: str) -> Dict[str, Any]:
-    st = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run_id)
+    # 같은 run 에 대한 동시 폴링은 retrieve 한 번으로 합침
+    return await inflight.do(f"run_status:{thread_id}:{run_id}", _run)
+
+async def get_run_result_async(thread_id: str, run_id: str) -> Dict[str, Any]:
+    return await inflight.do(f"run_result:{thread_id}:{run_id}", lambda: _get_run_result(thread_id, run_id))
+
+async def _get_run_result(thread_id: str, run_id: str) -> Dict[str, Any]:
+    client = get_async_client()
+    await upstream_limiter.throttle()
+    with span("runs_retrieve", upstream=True):
+        st = await client.beta.threads.runs.retrieve(
+            thread_id=thread_id, run_id=run_id, timeout=call_timeout("poll")
+        )
     if st.status != "completed":
         # 컨트롤러에서 425로 매핑하기 좋게 상태만 던짐
         return {"status": st.status}
 
-    msgs = client.beta.threads.messages.list(thread_id=thread_id, order="desc", limit=20).data
-    raw: Optional[str] = None
-    for m in msgs:
-        if getattr(m, "role", "") != "assistant":
-            continue
-        raw = _extract_first_text_from_message(m)
-        if raw:
-            break
-    if not raw:
-        raise RuntimeError("assistant message has no extractable text")
-
-    data = json.loads(raw.strip())
+    await upstream_limiter.throttle()
+    with span("messages_list", upstream=True):
+        msgs = (await client.beta.threads.messages.list(
+            thread_id=thread_id, run_id=run_id, order="desc", limit=1, timeout=call_timeout("poll")
+        )).data
+
+    with span("json_parse"):
+        data = loads(latest_assistant_text(msgs))
     for k in ("body_type","type_description","detailed_features","attraction_points",
               "recommended_styles","avoid_styles","styling_fixes","styling_tips"):
         if data.get(k) is None:
@@ -507,3 +709,64 @@ def get_run_result(thread_id: str, run_id: str) -> Dict[str, Any]:
     data["status"] = "completed"
     return data
 
+
+# ---------- 동기 래퍼 (Mangum/Lambda, 스크립트 등 sync 호출부용) ----------
+def diagnose_body_type_with_assistant(
+    answers: list[str],
+    height: float,
+    weight: float,
+    gender: str,
+    *,
+    timeout_sec: int = 60,
+) -> Dict[str, Any]:
+    return run_sync(diagnose_body_type_with_assistant_async(
+        answers, height, weight, gender, timeout_sec=timeout_sec
+    ))
+
+
+def create_content(
+        name: str,
+        body_type: str,
+        height: int,
+        weight: int,
+        body_feature: str,
+        recommendation_items: list[str],
+        recommended_situation: str,
+        recommended_style: str,
+        avoid_style: str,
+        budget: str,
+):
+    return run_sync(create_content_async(
+        name, body_type, height, weight, body_feature, recommendation_items,
+        recommended_situation, recommended_style, avoid_style, budget,
+    ))
+
+
+def chat_body_assistant(question: str, answer: str, session_id: Optional[str] = None):
+    return run_sync(chat_body_assistant_async(question, answer, session_id))
+
+
+def chat_body_result(
+        answers: list[str],
+        height: float,
+        weight: float,
+        gender: str
+):
+    return run_sync(chat_body_result_async(answers, height, weight, gender))
+
+
+def chat_body_result_soft(
+    answers: list[str],
+    height: float,
+    weight: float,
+    gender: str,
+) -> Dict[str, Any]:
+    return run_sync(chat_body_result_soft_async(answers, height, weight, gender))
+
+
+def get_run_status(thread_id: str, run_id: str) -> Dict[str, Any]:
+    return run_sync(get_run_status_async(thread_id, run_id))
+
+
+def get_run_result(thread_id: str, run_id: str) -> Dict[str, Any]:
+    return run_sync(get_run_result_async(thread_id, run_id))
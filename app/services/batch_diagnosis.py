@@ -0,0 +1,263 @@
+import asyncio
+import io
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.schemas.diagnosis import DiagnoseRequest
+from app.services.assistant_backend import BACKENDS
+from app.services.assistant_service import (
+    BODY_ASSISTANT_ID,
+    DIAGNOSIS_RESPONSE_FORMAT,
+    _build_prompt,
+    diagnose_body_type_with_assistant_async,
+)
+from app.services.deadline import detached_task
+from app.services.openai_client import call_timeout, get_async_client
+from app.services.rate_limiter import UpstreamBusy
+from app.services.response_text import loads
+
+logger = logging.getLogger("app.batch")
+
+# 한 배치 안에서 동시에 진행하는 진단 수 (upstream 동시 실행 상한은 rate_limiter 가 따로 건다)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "32"))
+# upstream 이 바쁠 때(UpstreamBusy) 실패 처리 전 재시도 횟수
+BATCH_BUSY_RETRIES = int(os.getenv("BATCH_BUSY_RETRIES", "20"))
+BATCH_STORE_PATH = os.getenv("BATCH_STORE_PATH", os.getenv("JOB_STORE_PATH", "jobs.sqlite3"))
+# 재개용 항목 결과 보관 기간
+BATCH_RETENTION_SEC = float(os.getenv("BATCH_RETENTION_SEC", "604800"))
+# Batch API 상태 확인 간격
+BATCH_API_POLL_SEC = float(os.getenv("BATCH_API_POLL_SEC", "30"))
+
+Item = Tuple[str, Dict[str, Any]]
+
+
+def parse_jsonl(lines: Iterable[str]) -> Iterable[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    JSONL 한 줄 = DiagnoseRequest (+ 선택 "id"). id 가 없으면 줄 번호(1부터).
+    (id, 검증된 요청 dict, 에러) 를 순서대로 돌려준다. 잘못된 줄은 배치 전체가 아니라 그 항목만 실패.
+    """
+    for n, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        item_id = str(n)
+        try:
+            obj = json.loads(line)
+            if isinstance(obj, dict) and obj.get("id") is not None:
+                item_id = str(obj.pop("id"))
+            yield item_id, DiagnoseRequest.model_validate(obj).model_dump(), None
+        except (ValueError, ValidationError) as e:
+            yield item_id, None, f"invalid record: {e}"
+
+
+def result_line(item_id: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> str:
+    record = {"id": item_id, "ok": error is None}
+    if error is None:
+        record["result"] = result
+    else:
+        record["error"] = error
+    return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+class BatchStore:
+    """
+    배치 항목별 성공 결과 저장소 (SQLite). 같은 batch_id 로 다시 요청하면 끝난 항목은 다시 실행하지 않는다.
+    실패한 항목은 저장하지 않으므로 재개 시 다시 시도된다.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS batch_items ("
+            " batch_id TEXT NOT NULL, item_id TEXT NOT NULL, result TEXT NOT NULL, updated_at REAL NOT NULL,"
+            " PRIMARY KEY (batch_id, item_id))"
+        )
+
+    def done(self, batch_id: str) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item_id, result FROM batch_items WHERE batch_id = ?", (batch_id,)
+            ).fetchall()
+        return {item_id: json.loads(result) for item_id, result in rows}
+
+    def save(self, batch_id: str, item_id: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO batch_items (batch_id, item_id, result, updated_at) VALUES (?, ?, ?, ?)",
+                (batch_id, item_id, json.dumps(result, ensure_ascii=False), time.time()),
+            )
+
+    def purge(self, older_than_sec: float) -> int:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM batch_items WHERE updated_at < ?", (time.time() - older_than_sec,))
+        return cur.rowcount
+
+
+_store: Optional[BatchStore] = None
+
+
+def get_batch_store() -> BatchStore:
+    global _store
+    if _store is None:
+        _store = BatchStore(BATCH_STORE_PATH)
+        _store.purge(BATCH_RETENTION_SEC)
+    return _store
+
+
+async def _diagnose(payload: Dict[str, Any], use_cache: bool) -> Dict[str, Any]:
+    for attempt in range(BATCH_BUSY_RETRIES + 1):
+        try:
+            return await diagnose_body_type_with_assistant_async(**payload, use_cache=use_cache)
+        except UpstreamBusy as e:
+            # 대량 처리는 급하지 않으므로 버리지 않고 기다렸다 다시 시도
+            if attempt == BATCH_BUSY_RETRIES:
+                raise
+            await asyncio.sleep(e.retry_after)
+
+
+async def run_batch(
+    records: Iterable[Tuple[str, Optional[Dict[str, Any]], Optional[str]]],
+    *,
+    concurrency: int = BATCH_CONCURRENCY,
+    done: Optional[Dict[str, Dict[str, Any]]] = None,
+    on_success=None,
+    use_cache: bool = False,
+) -> AsyncIterator[str]:
+    """
+    parse_jsonl 결과를 concurrency 개 워커로 진단하고 끝나는 순서대로 JSONL 한 줄씩 yield.
+    done(이미 끝난 id → 결과) 에 있는 항목은 다시 실행하지 않고 저장된 결과를 그대로 내보낸다.
+    on_success(item_id, result) 는 성공할 때마다 호출 (진행 상황 저장용).
+    일괄 진단은 보통 프롬프트를 바꾼 뒤의 재진단이라 기본은 결과 캐시/빠른 경로 없이 항상 assistant 를 호출한다.
+    use_cache=True 면 온라인 요청과 같이 캐시된 결과를 재사용한다.
+    """
+    done = done or {}
+    concurrency = max(1, min(concurrency, BATCH_MAX_CONCURRENCY))
+    pending: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    out: asyncio.Queue = asyncio.Queue()
+
+    async def feed():
+        for item_id, payload, error in records:
+            if error is not None:
+                out.put_nowait(result_line(item_id, error=error))
+            elif item_id in done:
+                out.put_nowait(result_line(item_id, done[item_id]))
+            else:
+                await pending.put((item_id, payload))
+        for _ in range(concurrency):
+            await pending.put(None)
+
+    async def worker():
+        while True:
+            item = await pending.get()
+            if item is None:
+                return
+            item_id, payload = item
+            try:
+                result = await _diagnose(payload, use_cache)
+            except Exception as e:
+                out.put_nowait(result_line(item_id, error=f"{type(e).__name__}: {e}"))
+                continue
+            if on_success is not None:
+                on_success(item_id, result)
+            out.put_nowait(result_line(item_id, result))
+
+    async def run_all():
+        try:
+            await asyncio.gather(feed(), *(worker() for _ in range(concurrency)))
+        finally:
+            out.put_nowait(None)
+
+    # 배치는 요청 하나의 마감보다 오래 걸린다. 항목별 시간 제한은 진단 함수의 timeout 으로
+    task = detached_task(run_all())
+    try:
+        while True:
+            line = await out.get()
+            if line is None:
+                break
+            yield line
+        await task  # feed/worker 의 예외가 있으면 여기서 올라온다
+    finally:
+        # 클라이언트 연결이 끊기는 등 소비가 중단되면 남은 작업도 멈춘다
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+# ---------- OpenAI Batch API (오프라인, 최대 24h) ----------
+# Assistants 는 Batch API 를 지원하지 않으므로 responses 백엔드와 같은 방식으로
+# assistant 의 model/instructions 를 옮겨 /v1/responses 요청으로 제출한다.
+
+async def submit_openai_batch(items: List[Item]) -> str:
+    """/v1/responses 요청 JSONL 을 업로드하고 배치를 만들어 batch id 를 반환."""
+    backend = BACKENDS["responses"]
+    buf = io.StringIO()
+    for item_id, payload in items:
+        prompt = _build_prompt(payload["answers"], payload["height"], payload["weight"], payload["gender"])
+        body = await backend.build_request(BODY_ASSISTANT_ID, prompt, response_format=DIAGNOSIS_RESPONSE_FORMAT)
+        buf.write(json.dumps(
+            {"custom_id": item_id, "method": "POST", "url": "/v1/responses", "body": body}, ensure_ascii=False
+        ) + "\n")
+
+    client = get_async_client()
+    file = await client.files.create(file=("diagnosis_batch.jsonl", buf.getvalue().encode("utf-8")), purpose="batch")
+    batch = await client.batches.create(
+        input_file_id=file.id,
+        endpoint="/v1/responses",
+        completion_window="24h",
+        metadata={"kind": "diagnosis", "assistant_id": BODY_ASSISTANT_ID or ""},
+    )
+    return batch.id
+
+
+def _response_text(body: Dict[str, Any]) -> str:
+    for output in body.get("output") or []:
+        for part in output.get("content") or []:
+            if part.get("type") == "output_text" and part.get("text"):
+                return part["text"]
+    raise ValueError("response has no output_text")
+
+
+async def collect_openai_batch(batch_id: str, poll_sec: float = BATCH_API_POLL_SEC) -> AsyncIterator[str]:
+    """배치가 끝날 때까지 기다렸다가 항목별 결과를 JSONL 한 줄씩 yield."""
+    client = get_async_client()
+    while True:
+        batch = await client.batches.retrieve(batch_id, timeout=call_timeout("poll"))
+        if batch.status in ("completed", "failed", "expired", "cancelled"):
+            break
+        counts = batch.request_counts
+        logger.info("batch %s %s (%s/%s)", batch_id, batch.status,
+                    getattr(counts, "completed", "?"), getattr(counts, "total", "?"))
+        await asyncio.sleep(poll_sec)
+
+    if batch.status == "failed":
+        raise RuntimeError(f"batch {batch_id} failed: {batch.errors}")
+
+    # expired/cancelled 여도 끝난 항목의 결과는 output 파일에 있다
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if not file_id:
+            continue
+        content = await client.files.content(file_id)
+        for line in content.text.splitlines():
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            item_id = row.get("custom_id")
+            response = row.get("response") or {}
+            if row.get("error") or response.get("status_code", 200) != 200:
+                error = row.get("error") or (response.get("body") or {}).get("error")
+                yield result_line(item_id, error=f"batch item failed: {error}")
+                continue
+            try:
+                yield result_line(item_id, loads(_response_text(response.get("body") or {})))
+            except ValueError as e:
+                yield result_line(item_id, error=f"JSON 파싱 실패: {e}")
@@ -0,0 +1,105 @@
+import os
+import re
+import threading
+import unicodedata
+from operator import mul
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from app.services.response_text import loads
+
+# 설문 응답 → 골격 유형 로컬 규칙 분류기. 규칙 파일은 app/data/body_type_rules/<버전>.json
+BODY_TYPE_RULES_VERSION = os.getenv("BODY_TYPE_RULES_VERSION", "v1")
+BODY_TYPE_RULES_DIR = os.getenv(
+    "BODY_TYPE_RULES_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "body_type_rules"),
+)
+# 확신도가 높은 입력의 처리: off(기본) | hint = 유형을 프롬프트에 고정해 모델은 설명만 | skip = 모델 호출 없이 템플릿 결과
+BODY_TYPE_FAST_PATH = os.getenv("BODY_TYPE_FAST_PATH", "off")
+BODY_TYPE_FAST_PATH_MIN_CONFIDENCE = float(os.getenv("BODY_TYPE_FAST_PATH_MIN_CONFIDENCE", "0.6"))
+# OpenAI 실패/시간 초과/혼잡 시 502·503·504 대신 규칙 분류 + 템플릿으로 만든 결과를 200 으로 (opt-in)
+BODY_TYPE_FALLBACK_ENABLED = os.getenv("BODY_TYPE_FALLBACK_ENABLED", "0") == "1"
+# 대체 결과도 확신도가 이 값 이상일 때만 (동점에 가까운 추측을 진단처럼 내보내지 않도록). 기본은 빠른 경로와 같은 값
+BODY_TYPE_FALLBACK_MIN_CONFIDENCE = float(
+    os.getenv("BODY_TYPE_FALLBACK_MIN_CONFIDENCE", str(BODY_TYPE_FAST_PATH_MIN_CONFIDENCE))
+)
+
+# 공백/문장부호 제거 (응답 구분용 줄바꿈은 남긴다). 규칙은 이렇게 정규화된 문자열 기준으로 쓴다
+_NON_WORD = re.compile(r"[^\w\n]+|_")
+
+
+class Classification(NamedTuple):
+    body_type: Optional[str]  # 단서가 하나도 없으면 None
+    confidence: float          # (1위 점수 - 2위 점수) / 총점, 0~1
+    scores: Dict[str, float]
+
+
+class BodyTypeClassifier:
+    """
+    규칙 = (정규식 단서, 유형별 가중치). 규칙마다 정규식을 따로 컴파일해 두고(리터럴 접두사 검색이라 하나로 합친
+    alternation 보다 빠름), 응답 전체를 줄바꿈으로 이어 규칙별 등장 횟수 벡터를 구한 뒤 가중치 행렬과 곱한다.
+    단서는 응답 경계를 넘지 않는다. 규칙끼리는 독립이므로 부정형은 lookahead 로 배제한다 ("부각(?!되지않)").
+    numpy 없이 순수 파이썬으로, 17문항 기준 수십 µs.
+    """
+
+    def __init__(self, types: Sequence[str], rules: List[Dict[str, Any]], version: str = ""):
+        self.types = tuple(types)
+        self.version = version
+        self._patterns = []
+        rows = []
+        for i, rule in enumerate(rules):
+            weights = tuple(float(w) for w in rule["weights"])
+            if len(weights) != len(self.types):
+                raise ValueError(f"body type rule {i}: expected {len(self.types)} weights")
+            self._patterns.append(re.compile(rule["pattern"]))
+            rows.append(weights)
+        # 유형별 열: columns[t][r] = 규칙 r 의 유형 t 가중치
+        self._columns = tuple(zip(*rows)) if rows else tuple(() for _ in self.types)
+        self._lock = threading.Lock()
+        self.fast_path = 0
+        self.fallback = 0
+
+    @classmethod
+    def load(cls, version: str = BODY_TYPE_RULES_VERSION) -> "BodyTypeClassifier":
+        with open(os.path.join(BODY_TYPE_RULES_DIR, f"{version}.json"), "rb") as f:
+            data = loads(f.read())
+        return cls(data["types"], data["rules"], version=data.get("version", version))
+
+    def classify(self, answers: Sequence[str]) -> Classification:
+        text = _NON_WORD.sub("", unicodedata.normalize("NFC", "\n".join(answers)).lower())
+        counts = [len(p.findall(text)) for p in self._patterns]
+        totals = [sum(map(mul, counts, column)) for column in self._columns]
+        total = sum(totals)
+        scores = dict(zip(self.types, totals))
+        if total <= 0:
+            return Classification(None, 0.0, scores)
+        ranked = sorted(range(len(totals)), key=totals.__getitem__, reverse=True)
+        top, second = totals[ranked[0]], totals[ranked[1]] if len(ranked) > 1 else 0.0
+        return Classification(self.types[ranked[0]], round((top - second) / total, 4), scores)
+
+    def confident(
+        self, answers: Sequence[str], min_confidence: float = BODY_TYPE_FAST_PATH_MIN_CONFIDENCE
+    ) -> Optional[Classification]:
+        """확신도가 min_confidence(기본: 빠른 경로 기준) 이상이면 분류 결과, 아니면 None."""
+        guess = self.classify(answers)
+        if guess.body_type is None or guess.confidence < min_confidence:
+            return None
+        return guess
+
+    def count(self, kind: str) -> None:
+        with self._lock:
+            setattr(self, kind, getattr(self, kind) + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "fast_path_mode": BODY_TYPE_FAST_PATH,
+            "min_confidence": BODY_TYPE_FAST_PATH_MIN_CONFIDENCE,
+            "fallback_enabled": BODY_TYPE_FALLBACK_ENABLED,
+            "fallback_min_confidence": BODY_TYPE_FALLBACK_MIN_CONFIDENCE,
+            "fast_path": self.fast_path,
+            "fallback": self.fallback,
+        }
+
+
+# 기동 시 한 번 읽어 컴파일해 둔다
+body_type_classifier = BodyTypeClassifier.load()
@@ -0,0 +1,189 @@
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import Any, Dict, Optional, Tuple
+
+# 설문은 질문/보기가 고정이라 (질문, 응답) → ChatResponse 를 로컬에서 바로 돌려줄 수 있다.
+CHAT_INDEX_ENABLED = os.getenv("CHAT_INDEX_ENABLED", "1") == "1"
+# jsonl: {"question": ..., "answer": ..., "response": {isSuccess, selected, message, nextQuestion}}
+# 이 파일에 있는 질문들이 고정 설문이다 (학습도 이 질문들에 대해서만 한다)
+CHAT_INDEX_PATH = os.getenv("CHAT_INDEX_PATH", "")
+# LLM 이 성공적으로 매칭한 응답을 메모리 인덱스에 추가 (설문 파일에 있는 질문만, 최대 CHAT_INDEX_LEARN_MAX 개 LRU)
+CHAT_INDEX_LEARN = os.getenv("CHAT_INDEX_LEARN", "1") == "1"
+CHAT_INDEX_LEARN_MAX = int(os.getenv("CHAT_INDEX_LEARN_MAX", "2000"))
+# 기본은 정규화 후 정확히 일치할 때만. 유사도 매칭은 opt-in:
+# "…있고"/"…없고"(0.91), "높은"/"낮은"(0.9)처럼 반대 답도 점수가 높아 잘못된 응답을 돌려줄 수 있다
+CHAT_INDEX_FUZZY = os.getenv("CHAT_INDEX_FUZZY", "0") == "1"
+# 같은 질문 내 보기와의 유사도가 이 값 이상이면 같은 응답으로 간주 (CHAT_INDEX_FUZZY 일 때만)
+CHAT_INDEX_MATCH_THRESHOLD = float(os.getenv("CHAT_INDEX_MATCH_THRESHOLD", "0.9"))
+
+_NON_WORD = re.compile(r"[\s\W_]+")
+# 존댓말/평서형 어미 차이는 같은 보기로 본다 ("육감적입니다" == "육감적이다")
+_ENDINGS = (("입니다", "이다"), ("습니다", "다"), ("합니다", "하다"), ("이에요", "이다"), ("예요", "이다"), ("에요", "이다"))
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFC", text or "").lower()
+    text = _NON_WORD.sub("", text)
+    for polite, plain in _ENDINGS:
+        if text.endswith(polite):
+            return text[: -len(polite)] + plain
+    return text
+
+
+# 유사도 매칭에서 두 응답이 달라진 부분에 이 중 하나라도 있으면 뜻이 반대일 수 있으므로 매칭하지 않는다
+_POLARITY_TOKENS = (
+    "없", "있", "않", "안", "못", "아니", "높", "낮", "넓", "좁", "길", "짧", "크", "작",
+    "많", "적", "굵", "가늘", "두껍", "두꺼", "얇", "무겁", "가볍", "강", "약",
+)
+
+
+def polarity_differs(a: str, b: str) -> bool:
+    """정규화된 두 응답의 다른 부분에 부정어/반의어 토큰이 들어 있는지."""
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b).get_opcodes():
+        if tag == "equal":
+            continue
+        # 토큰이 경계에 걸쳐 바뀐 경우("두껍"→"두꺼")도 잡도록 앞뒤 한 글자씩 넓혀 본다
+        for segment in (a[max(0, i1 - 1):i2 + 1], b[max(0, j1 - 1):j2 + 1]):
+            if any(token in segment for token in _POLARITY_TOKENS):
+                return True
+    return False
+
+
+class ChatAnswerIndex:
+    def __init__(
+        self,
+        threshold: float = CHAT_INDEX_MATCH_THRESHOLD,
+        fuzzy: bool = CHAT_INDEX_FUZZY,
+        learn_max: int = CHAT_INDEX_LEARN_MAX,
+    ):
+        self.threshold = threshold
+        self.fuzzy = fuzzy
+        self.learn_max = learn_max
+        self.hits = 0
+        self.misses = 0
+        self.refused = 0  # 유사도는 넘었지만 부정어/반의어 차이로 거절한 횟수
+        # 정규화된 질문 → {정규화된 응답: payload}. 정확 일치는 dict 조회 한 번
+        self._by_question: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # 학습으로 추가된 (질문, 응답) 키, 오래 안 쓴 순 (설문 파일에서 읽은 항목은 내보내지 않는다)
+        self._learned: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return sum(len(v) for v in self._by_question.values())
+
+    @staticmethod
+    def _payload(response: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "isSuccess": bool(response.get("isSuccess")),
+            "selected": response.get("selected") or "",
+            "message": response.get("message") or "",
+            "nextQuestion": response.get("nextQuestion") or "",
+        }
+
+    def add(self, question: str, answer: str, response: Dict[str, Any]) -> None:
+        """설문 항목 추가 (학습 항목과 달리 개수 제한/내보내기 없음)."""
+        q, a = normalize_text(question), normalize_text(answer)
+        with self._lock:
+            self._by_question.setdefault(q, {})[a] = self._payload(response)
+            self._learned.pop((q, a), None)
+
+    def _add_learned(self, q: str, a: str, payload: Dict[str, Any]) -> None:
+        options = self._by_question.get(q)
+        if options is None:
+            return  # 고정 설문에 없는 질문은 배우지 않는다
+        if a in options and (q, a) not in self._learned:
+            return  # 설문 파일 항목은 덮어쓰지 않는다
+        options[a] = payload
+        self._learned[(q, a)] = None
+        self._learned.move_to_end((q, a))
+        while len(self._learned) > self.learn_max:
+            (old_q, old_a), _ = self._learned.popitem(last=False)
+            self._by_question[old_q].pop(old_a, None)
+
+    def _fuzzy(self, key: str, options: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        best, best_key, best_ratio = None, None, 0.0
+        for candidate, value in list(options.items()):
+            ratio = SequenceMatcher(None, key, candidate).ratio()
+            if ratio > best_ratio:
+                best, best_key, best_ratio = value, candidate, ratio
+        if best_ratio < self.threshold:
+            return None
+        if polarity_differs(key, best_key):
+            self.refused += 1
+            return None
+        return best
+
+    def lookup(self, question: str, answer: str) -> Optional[Dict[str, Any]]:
+        """
+        정규화 후 정확히 일치하는 보기만 찾는다. CHAT_INDEX_FUZZY 면 그다음 같은 질문 안에서 가장 유사한 보기로,
+        단 다른 부분에 부정어/반의어가 있으면 매칭하지 않는다.
+        """
+        q = normalize_text(question)
+        options = self._by_question.get(q)
+        payload = None
+        if options:
+            key = normalize_text(answer)
+            payload = options.get(key)
+            if payload is not None:
+                if (q, key) in self._learned:
+                    with self._lock:
+                        if (q, key) in self._learned:
+                            self._learned.move_to_end((q, key))
+            elif self.fuzzy:
+                payload = self._fuzzy(key, options)
+        if payload is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(payload)
+
+    def load(self, path: str) -> int:
+        """jsonl 파일에서 항목을 읽어 인덱스를 채운다. 읽은 항목 수를 반환."""
+        count = 0
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                row = json.loads(line)
+                self.add(row["question"], row["answer"], row["response"])
+                count += 1
+        return count
+
+    def learn(self, question: str, answer: str, response: Dict[str, Any]) -> None:
+        """
+        LLM 응답을 메모리 인덱스에 반영. 고정 설문(CHAT_INDEX_PATH)에 있는 질문이고 매칭에 성공한
+        응답(isSuccess=true)만, 최대 learn_max 개까지 (넘으면 오래 안 쓴 것부터 내보냄).
+        """
+        if not CHAT_INDEX_LEARN or self.learn_max <= 0 or not response.get("isSuccess"):
+            return
+        q = normalize_text(question)
+        payload = self._payload(response)
+        with self._lock:
+            self._add_learned(q, normalize_text(answer), payload)
+            # LLM 이 고른 정식 보기 문구로도 찾을 수 있게 함께 등록
+            if response.get("selected"):
+                self._add_learned(q, normalize_text(response["selected"]), payload)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "enabled": CHAT_INDEX_ENABLED,
+            "size": len(self),
+            "learned": len(self._learned),
+            "fuzzy": self.fuzzy,
+            "hits": self.hits,
+            "refused": self.refused,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+chat_index = ChatAnswerIndex()
+if CHAT_INDEX_ENABLED and CHAT_INDEX_PATH and os.path.exists(CHAT_INDEX_PATH):
+    chat_index.load(CHAT_INDEX_PATH)
@@ -0,0 +1,157 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# 세션(설문 한 번) 동안 같은 thread 를 이어 쓴다. session_id 없이 오면 기존처럼 매번 새 thread
+CHAT_SESSION_ENABLED = os.getenv("CHAT_SESSION_ENABLED", "1") == "1"
+# 마지막 턴 이후 이 시간이 지나면 세션을 잊고 다음 턴은 새 thread 로 시작
+CHAT_SESSION_TTL_SEC = float(os.getenv("CHAT_SESSION_TTL_SEC", "1800"))
+CHAT_SESSION_MAX = int(os.getenv("CHAT_SESSION_MAX", "10000"))
+# thread 가 너무 길어지면(설문 17문항 + 재시도 여유) 새 thread 로 갈아탄다
+CHAT_SESSION_MAX_TURNS = int(os.getenv("CHAT_SESSION_MAX_TURNS", "40"))
+# 지정하면 매핑을 SQLite 파일에 둬서 같은 호스트의 여러 워커 프로세스가 공유한다 (python -m app.cli.serve)
+CHAT_SESSION_PATH = os.getenv("CHAT_SESSION_PATH", "")
+
+
+class ChatSessionStore:
+    """
+    session_id → 대화 핸들(thread id, responses 백엔드면 직전 response id) 매핑. 프로세스 내 LRU + TTL.
+    만료된 thread 는 OpenAI 쪽에 그대로 두고(보존 기간 후 자동 삭제) 매핑만 지운다.
+    Lambda 에서는 컨테이너별로 따로 기억하므로 다른 컨테이너로 간 턴은 새 thread 로 시작한다.
+    """
+
+    def __init__(self, ttl_sec: float = CHAT_SESSION_TTL_SEC, max_sessions: int = CHAT_SESSION_MAX):
+        self.ttl_sec = ttl_sec
+        self.max_sessions = max_sessions
+        self._data: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 같은 세션의 턴은 한 번에 하나씩 (진행 중인 run 이 있는 thread 에는 메시지를 추가할 수 없음).
+        # 잡고 있거나 기다리는 쪽이 없으면 lock 은 자동으로 사라진다 (WeakValueDictionary)
+        self._turn_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, weakref.WeakValueDictionary]" = \
+            weakref.WeakKeyDictionary()
+        self.reused = 0
+        self.started = 0
+        self.expired = 0
+
+    def get(self, session_id: str) -> Optional[str]:
+        """살아 있는 세션의 대화 핸들. 없거나 만료됐거나 턴 수를 다 썼으면 None."""
+        with self._lock:
+            item = self._data.get(session_id)
+            if item is None:
+                return None
+            if item["expires_at"] < time.time() or item["turns"] >= CHAT_SESSION_MAX_TURNS:
+                del self._data[session_id]
+                self.expired += 1
+                return None
+            self._data.move_to_end(session_id)
+            return item["conversation"]
+
+    def save(self, session_id: str, conversation: str, reused: bool) -> None:
+        with self._lock:
+            item = self._data.get(session_id)
+            turns = item["turns"] + 1 if item is not None and reused else 1
+            self._data[session_id] = {
+                "conversation": conversation,
+                "turns": turns,
+                "expires_at": time.time() + self.ttl_sec,
+            }
+            self._data.move_to_end(session_id)
+            while len(self._data) > self.max_sessions:
+                self._data.popitem(last=False)
+            if reused:
+                self.reused += 1
+            else:
+                self.started += 1
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._data.pop(session_id, None)
+
+    def turn_lock(self, session_id: str) -> asyncio.Lock:
+        per_loop = self._turn_locks.get(asyncio.get_running_loop())
+        if per_loop is None:
+            per_loop = self._turn_locks[asyncio.get_running_loop()] = weakref.WeakValueDictionary()
+        lock = per_loop.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            per_loop[session_id] = lock
+        return lock
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": CHAT_SESSION_ENABLED,
+            "size": len(self._data),
+            "started": self.started,
+            "reused": self.reused,
+            "expired": self.expired,
+        }
+
+
+class SQLiteChatSessionStore(ChatSessionStore):
+    """
+    같은 매핑을 SQLite 파일에 둔다. 턴이 다른 워커로 가도 같은 thread 를 이어 쓴다.
+    턴 직렬화(turn_lock)는 프로세스 안에서만 보장되지만, 한 세션의 턴은 클라이언트가 순서대로 보낸다.
+    """
+
+    def __init__(self, path: str, ttl_sec: float = CHAT_SESSION_TTL_SEC, max_sessions: int = CHAT_SESSION_MAX):
+        super().__init__(ttl_sec, max_sessions)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chat_sessions ("
+            " session_id TEXT PRIMARY KEY, conversation TEXT NOT NULL, turns INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS chat_sessions_expires ON chat_sessions (expires_at)")
+
+    def get(self, session_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT conversation, turns, expires_at FROM chat_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[2] < time.time() or row[1] >= CHAT_SESSION_MAX_TURNS:
+                self._conn.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,))
+                self.expired += 1
+                return None
+            return row[0]
+
+    def save(self, session_id: str, conversation: str, reused: bool) -> None:
+        now = time.time()
+        with self._lock:
+            # 재사용이면 턴 수 +1, 새 thread 면 1 부터
+            self._conn.execute(
+                "INSERT INTO chat_sessions (session_id, conversation, turns, expires_at) VALUES (?, ?, 1, ?)"
+                " ON CONFLICT(session_id) DO UPDATE SET conversation = excluded.conversation,"
+                " turns = CASE WHEN ? THEN chat_sessions.turns + 1 ELSE 1 END, expires_at = excluded.expires_at",
+                (session_id, conversation, now + self.ttl_sec, reused),
+            )
+            # 만료 정리 + 개수 상한 (만료가 가장 이른 = 가장 오래 안 쓰인 세션부터)
+            self._conn.execute("DELETE FROM chat_sessions WHERE expires_at < ?", (now,))
+            self._conn.execute(
+                "DELETE FROM chat_sessions WHERE session_id IN ("
+                " SELECT session_id FROM chat_sessions ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_sessions,),
+            )
+            if reused:
+                self.reused += 1
+            else:
+                self.started += 1
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM chat_sessions").fetchone()[0]
+        return {**super().stats(), "size": size, "path": CHAT_SESSION_PATH}
+
+
+chat_sessions = SQLiteChatSessionStore(CHAT_SESSION_PATH) if CHAT_SESSION_PATH else ChatSessionStore()
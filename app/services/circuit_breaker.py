@@ -0,0 +1,232 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+from app.services.deadline import DeadlineExceeded
+from app.services.rate_limiter import UpstreamBusy
+
+# assistant 별 서킷 브레이커: 최근 실패율이 높으면 upstream 을 부르지 않고 바로 503(또는 대체 응답) (opt-in)
+CIRCUIT_BREAKER_ENABLED = os.getenv("CIRCUIT_BREAKER_ENABLED", "0") == "1"
+# 실패율을 보는 구간과, 그 안에 최소 몇 건이 있어야 판단할지
+CIRCUIT_WINDOW_SEC = float(os.getenv("CIRCUIT_WINDOW_SEC", "30"))
+CIRCUIT_MIN_CALLS = int(os.getenv("CIRCUIT_MIN_CALLS", "10"))
+CIRCUIT_FAILURE_RATE = float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5"))
+# 열린 뒤 이만큼 지나면 half-open: 시험 호출(probe)을 CIRCUIT_HALF_OPEN_PROBES 개까지만 통과시킨다
+CIRCUIT_OPEN_SEC = float(os.getenv("CIRCUIT_OPEN_SEC", "15"))
+CIRCUIT_HALF_OPEN_PROBES = int(os.getenv("CIRCUIT_HALF_OPEN_PROBES", "1"))
+# 요청 마감(DeadlineExceeded)으로 끝난 호출은 이 시간 이상 upstream 을 기다렸을 때만 실패(느림)로 센다
+CIRCUIT_SLOW_CALL_SEC = float(os.getenv("CIRCUIT_SLOW_CALL_SEC", "10"))
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+
+class CircuitOpen(UpstreamBusy):
+    """서킷이 열려 있어 upstream 을 호출하지 않음. UpstreamBusy 와 같게 503 + Retry-After, 큐 재시도, 대체 응답."""
+
+    def __init__(self, assistant_id: str, retry_after: float):
+        super().__init__(f"circuit open for {assistant_id}", retry_after)
+        self.assistant_id = assistant_id
+
+
+def is_failure(exc: Optional[BaseException], elapsed: float = 0.0) -> Optional[bool]:
+    """
+    호출 결과를 서킷 판단용으로 분류: True = 실패, False = 성공, None = 셈에서 제외.
+    제외: 클라이언트 취소, 우리 쪽 대기열 초과(UpstreamBusy), 요청 자체의 문제인 4xx(429 제외),
+    upstream 을 잠깐만 기다리고 끝난 요청 마감.
+    """
+    if exc is None:
+        return False
+    if isinstance(exc, (asyncio.CancelledError, GeneratorExit, UpstreamBusy)):
+        return None
+    if isinstance(exc, DeadlineExceeded):
+        return True if elapsed >= CIRCUIT_SLOW_CALL_SEC else None
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int) and 400 <= status < 500 and status != 429:
+        return None
+    # 5xx/429, 연결 오류, run 시간 초과, failed/expired 등 run 실패
+    return True
+
+
+class _Circuit:
+    __slots__ = ("state", "outcomes", "failures", "open_until", "probes", "opened", "rejected", "last_error")
+
+    def __init__(self):
+        self.state = CLOSED
+        self.outcomes: Deque[Tuple[float, bool]] = deque()  # (시각, 실패 여부)
+        self.failures = 0
+        self.open_until = 0.0
+        self.probes = 0
+        self.opened = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+
+class CircuitBreaker:
+    """
+    assistant id 별 closed → open → half_open → closed 상태 기계.
+    - closed: 최근 window_sec 동안 결과가 min_calls 건 이상이고 실패율이 failure_rate 이상이면 open
+    - open: open_sec 동안 호출 없이 CircuitOpen
+    - half_open: probe 호출 half_open_probes 개만 통과. 성공하면 closed(기록 초기화), 실패하면 다시 open
+    이벤트 루프에 묶인 객체가 없어 Lambda(호출마다 새 루프)/스레드 워커에서도 같은 인스턴스를 쓴다.
+    """
+
+    def __init__(
+        self,
+        *,
+        enabled: bool = CIRCUIT_BREAKER_ENABLED,
+        window_sec: float = CIRCUIT_WINDOW_SEC,
+        min_calls: int = CIRCUIT_MIN_CALLS,
+        failure_rate: float = CIRCUIT_FAILURE_RATE,
+        open_sec: float = CIRCUIT_OPEN_SEC,
+        half_open_probes: int = CIRCUIT_HALF_OPEN_PROBES,
+    ):
+        self.enabled = enabled
+        self.window_sec = window_sec
+        self.min_calls = max(1, min_calls)
+        self.failure_rate = failure_rate
+        self.open_sec = open_sec
+        self.half_open_probes = max(1, half_open_probes)
+        self._circuits: Dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, assistant_id: str) -> _Circuit:
+        circuit = self._circuits.get(assistant_id)
+        if circuit is None:
+            circuit = self._circuits[assistant_id] = _Circuit()
+        return circuit
+
+    def _prune(self, circuit: _Circuit, now: float) -> None:
+        horizon = now - self.window_sec
+        outcomes = circuit.outcomes
+        while outcomes and outcomes[0][0] < horizon:
+            _, failed = outcomes.popleft()
+            circuit.failures -= failed
+
+    def _open(self, circuit: _Circuit, now: float) -> None:
+        circuit.state = OPEN
+        circuit.open_until = now + self.open_sec
+        circuit.opened += 1
+
+    def before(self, assistant_id: str) -> bool:
+        """
+        호출 직전에 부른다. 통과면 probe 여부(half-open 시험 호출이면 True)를 돌려주고,
+        열려 있으면 CircuitOpen. 통과한 호출은 끝나면 반드시 after() 로 결과를 알려야 한다.
+        """
+        if not self.enabled:
+            return False
+        with self._lock:
+            circuit = self._circuit(assistant_id)
+            now = time.monotonic()
+            if circuit.state == OPEN:
+                if now < circuit.open_until:
+                    circuit.rejected += 1
+                    raise CircuitOpen(assistant_id, circuit.open_until - now)
+                circuit.state = HALF_OPEN
+                circuit.probes = 0
+            if circuit.state == HALF_OPEN:
+                if circuit.probes >= self.half_open_probes:
+                    circuit.rejected += 1
+                    # probe 결과가 나오기 전: 다음 판단 시점을 모르니 짧게
+                    raise CircuitOpen(assistant_id, 1.0)
+                circuit.probes += 1
+                return True
+            return False
+
+    def after(self, assistant_id: str, probe: bool, exc: Optional[BaseException] = None, elapsed: float = 0.0) -> None:
+        if not self.enabled:
+            return
+        failed = is_failure(exc, elapsed)
+        with self._lock:
+            circuit = self._circuit(assistant_id)
+            now = time.monotonic()
+            if probe and circuit.state == HALF_OPEN:
+                circuit.probes -= 1
+                if failed is None:
+                    return
+                if failed:
+                    circuit.last_error = f"{type(exc).__name__}: {exc}"
+                    self._open(circuit, now)
+                else:
+                    circuit.state = CLOSED
+                    circuit.outcomes.clear()
+                    circuit.failures = 0
+                return
+            # 열리기 전에 시작해 늦게 끝난 호출은 상태를 바꾸지 않는다
+            if failed is None or circuit.state != CLOSED:
+                return
+            circuit.outcomes.append((now, failed))
+            circuit.failures += failed
+            if failed:
+                circuit.last_error = f"{type(exc).__name__}: {exc}"
+            self._prune(circuit, now)
+            calls = len(circuit.outcomes)
+            if calls >= self.min_calls and circuit.failures >= calls * self.failure_rate:
+                self._open(circuit, now)
+
+    @asynccontextmanager
+    async def guard(self, assistant_id: str) -> AsyncIterator[None]:
+        """블록 안의 upstream 호출을 서킷으로 감싼다: 열려 있으면 진입 전에 CircuitOpen, 끝나면 결과 기록."""
+        probe = self.before(assistant_id)
+        started = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            self.after(assistant_id, probe, e, time.monotonic() - started)
+            raise
+        self.after(assistant_id, probe, None, time.monotonic() - started)
+
+    def retry_after(self, assistant_id: str) -> float:
+        """지금 호출하면 CircuitOpen 이 날 경우 다시 시도할 때까지의 초, 통과한다면 0. 카운터는 건드리지 않는다."""
+        if not self.enabled:
+            return 0.0
+        with self._lock:
+            circuit = self._circuits.get(assistant_id)
+            if circuit is None or circuit.state == CLOSED:
+                return 0.0
+            if circuit.state == OPEN:
+                return max(0.0, circuit.open_until - time.monotonic())
+            return 1.0 if circuit.probes >= self.half_open_probes else 0.0
+
+    def state(self, assistant_id: str) -> str:
+        with self._lock:
+            circuit = self._circuits.get(assistant_id)
+            if circuit is None:
+                return CLOSED
+            if circuit.state == OPEN and time.monotonic() >= circuit.open_until:
+                return HALF_OPEN  # 다음 호출이 probe 가 된다
+            return circuit.state
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        assistants = {}
+        with self._lock:
+            for aid, circuit in self._circuits.items():
+                self._prune(circuit, now)
+                calls = len(circuit.outcomes)
+                state = circuit.state
+                if state == OPEN and now >= circuit.open_until:
+                    state = HALF_OPEN
+                assistants[aid] = {
+                    "state": state,
+                    "calls": calls,
+                    "failure_rate": round(circuit.failures / calls, 4) if calls else 0.0,
+                    "retry_after": round(circuit.open_until - now, 3) if state == OPEN else 0.0,
+                    "opened": circuit.opened,
+                    "rejected": circuit.rejected,
+                    "last_error": circuit.last_error,
+                }
+        return {
+            "enabled": self.enabled,
+            "window_sec": self.window_sec,
+            "min_calls": self.min_calls,
+            "failure_rate": self.failure_rate,
+            "open_sec": self.open_sec,
+            "assistants": assistants,
+        }
+
+
+circuit_breaker = CircuitBreaker()
@@ -0,0 +1,199 @@
+import gzip
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# brotli 는 requirements.txt 에 있다. 없는 환경에서 br 을 켜면 미들웨어 생성 시 바로 실패시킨다 (조용히 gzip 만 쓰지 않게)
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 응답 본문 압축 (opt-in). Lambda + REST API Gateway 는 바이너리 미디어 타입(*/*) 설정이 있어야 압축 본문이 그대로 전달된다
+RESPONSE_COMPRESSION_ENABLED = os.getenv("RESPONSE_COMPRESSION_ENABLED", "0") == "1"
+# 이보다 작은 본문은 압축하지 않는다 (헤더/CPU 비용이 더 큼)
+RESPONSE_COMPRESSION_MIN_SIZE = int(os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", "1024"))
+# 서버 선호 순서. 클라이언트 Accept-Encoding 중 여기서 먼저 나오는 것을 쓴다
+RESPONSE_COMPRESSION_ENCODINGS = [
+    e.strip() for e in os.getenv("RESPONSE_COMPRESSION_ENCODINGS", "br,gzip").split(",") if e.strip()
+]
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+# 0~11. 동적 응답에는 4~5 정도가 압축률 대비 CPU 비용이 적당하다
+RESPONSE_BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "5"))
+
+_COMPRESSIBLE_TYPES = ("application/json", "text/plain", "text/html", "text/markdown")
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=RESPONSE_BROTLI_QUALITY)
+    # mtime=0: 같은 본문이면 같은 바이트 (ETag/캐시 친화)
+    return gzip.compress(body, compresslevel=RESPONSE_GZIP_LEVEL, mtime=0)
+
+
+def available_encodings(preferred: List[str] = RESPONSE_COMPRESSION_ENCODINGS) -> List[str]:
+    return [e for e in preferred if e == "gzip" or (e == "br" and brotli is not None)]
+
+
+def check_encodings(encodings: List[str]) -> List[str]:
+    """설정된 코딩을 그대로 쓸 수 있는지 확인. 모르는 코딩이거나 br 인데 brotli 가 없으면 ValueError."""
+    unknown = [e for e in encodings if e not in ("br", "gzip")]
+    if unknown:
+        raise ValueError(f"RESPONSE_COMPRESSION_ENCODINGS: 지원하지 않는 코딩 {', '.join(unknown)} (br, gzip 만 가능)")
+    if "br" in encodings and brotli is None:
+        raise ValueError(
+            "RESPONSE_COMPRESSION_ENCODINGS 에 br 이 있지만 brotli 모듈이 없습니다: "
+            "pip install -r requirements.txt 로 설치하거나 br 을 빼세요"
+        )
+    return list(encodings)
+
+
+def _qvalues(accept_encoding: str) -> Dict[str, float]:
+    """Accept-Encoding → {코딩: q}. q 가 없으면 1, 잘못된 q 는 0 (허용하지 않음)."""
+    qvalues: Dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        name, *params = (part.strip() for part in item.split(";"))
+        if not name:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = min(1.0, max(0.0, float(value)))
+                except ValueError:
+                    q = 0.0
+        qvalues[name] = q
+    return qvalues
+
+
+def negotiate(accept_encoding: str, encodings: List[str]) -> Optional[str]:
+    """
+    Accept-Encoding 에서 q 가 가장 높은 코딩 (같으면 서버 선호 순서). q=0 은 거절.
+    목록에 없는 코딩은 "*" 의 q 를 따르고, 이름을 직접 적은 q 가 "*" 보다 우선한다 ("*, gzip;q=0" 이면 gzip 제외).
+    허용되는 게 없으면 None (무압축).
+    """
+    qvalues = _qvalues(accept_encoding)
+    wildcard = qvalues.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        q = qvalues.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.responses: Dict[str, int] = {}
+        self.raw_bytes: Dict[str, int] = {}
+        self.sent_bytes: Dict[str, int] = {}
+        self.skipped_small = 0
+
+    def record(self, encoding: str, raw: int, sent: int) -> None:
+        with self._lock:
+            self.responses[encoding] = self.responses.get(encoding, 0) + 1
+            self.raw_bytes[encoding] = self.raw_bytes.get(encoding, 0) + raw
+            self.sent_bytes[encoding] = self.sent_bytes.get(encoding, 0) + sent
+
+    def skip_small(self) -> None:
+        with self._lock:
+            self.skipped_small += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": RESPONSE_COMPRESSION_ENABLED,
+                "encodings": available_encodings(),
+                "min_size": RESPONSE_COMPRESSION_MIN_SIZE,
+                "responses": dict(self.responses),
+                "raw_bytes": dict(self.raw_bytes),
+                "sent_bytes": dict(self.sent_bytes),
+                "skipped_small": self.skipped_small,
+            }
+
+
+compression_stats = CompressionStats()
+
+
+def _with_vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    """Vary 에 Accept-Encoding 을 더한다 (이미 있으면 그대로). 공유 캐시가 압축 본문을 다른 클라이언트에 주지 않게."""
+    vary = [v for k, v in headers if k == b"vary"]
+    tokens = {t.strip().lower() for v in vary for t in v.split(b",")}
+    if b"accept-encoding" in tokens or b"*" in tokens:
+        return headers
+    others = [(k, v) for k, v in headers if k != b"vary"]
+    return others + [(b"vary", b", ".join(vary + [b"Accept-Encoding"]))]
+
+
+class CompressionMiddleware:
+    """
+    JSON/텍스트 응답만 본문을 모아 한 번에 압축한다. SSE(text/event-stream) 같은 다른 타입은 조각마다
+    바로 내보내야 하므로 손대지 않는다. 이미 Content-Encoding 이 있거나 본문이 min_size 미만이면 그대로.
+    압축 대상 타입의 응답에는 실제로 압축했는지와 관계없이 Vary: Accept-Encoding 을 붙인다.
+    (@app.middleware("http") 를 거친 응답은 본문이 여러 조각으로 오므로 more_body 가 끝날 때까지 모은다)
+    """
+
+    def __init__(self, app, min_size: int = RESPONSE_COMPRESSION_MIN_SIZE, encodings: Optional[List[str]] = None):
+        self.app = app
+        self.min_size = min_size
+        # 설정 오류는 첫 요청이 아니라 기동 시 드러나게
+        self.encodings = check_encodings(encodings or RESPONSE_COMPRESSION_ENCODINGS)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = []
+        for name, value in scope.get("headers") or ():
+            if name == b"accept-encoding":
+                accept.append(value.decode("latin-1"))  # 여러 줄로 와도 하나의 목록
+        encoding = negotiate(",".join(accept), self.encodings) if accept else None
+
+        start: Optional[Dict[str, Any]] = None
+        chunks: List[bytes] = []
+
+        async def compress_send(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                content_type = b""
+                encoded = False
+                for name, value in message.get("headers") or ():
+                    if name == b"content-type":
+                        content_type = value
+                    elif name == b"content-encoding":
+                        encoded = True
+                if encoded or not content_type.decode("latin-1").startswith(_COMPRESSIBLE_TYPES):
+                    await send(message)
+                elif encoding is None:
+                    await send({**message, "headers": _with_vary(list(message.get("headers") or []))})
+                else:
+                    start = message  # 본문 크기를 보고 정하므로 헤더는 잠시 보류
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            headers = _with_vary(list(start.get("headers") or []))
+            if len(body) < self.min_size:
+                compression_stats.skip_small()
+                await send({**start, "headers": headers})
+                await send({"type": "http.response.body", "body": body})
+                return
+
+            compressed = compress(body, encoding)
+            compression_stats.record(encoding, len(body), len(compressed))
+            headers = [(k, v) for k, v in headers if k != b"content-length"]
+            headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+            ]
+            await send({**start, "headers": headers})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, compress_send)
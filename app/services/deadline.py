@@ -0,0 +1,100 @@
+import asyncio
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Coroutine, Dict, Optional
+
+# 남은 처리 시간(ms)을 알려 주는 요청 헤더. 프록시/게이트웨이가 자기 타임아웃에 맞춰 넣어 준다
+REQUEST_DEADLINE_HEADER = os.getenv("REQUEST_DEADLINE_HEADER", "x-request-timeout-ms").lower()
+# 헤더도 Lambda 컨텍스트도 없을 때(uvicorn 컨테이너) 요청 하나에 허용하는 시간. 0 이면 제한 없음
+REQUEST_TIMEOUT_SEC = float(os.getenv("REQUEST_TIMEOUT_SEC", "90"))
+# API Gateway 통합 타임아웃. Lambda 는 이보다 오래(150s) 살아 있지만 그 뒤의 응답은 아무도 받지 못한다
+API_GATEWAY_TIMEOUT_SEC = float(os.getenv("API_GATEWAY_TIMEOUT_SEC", "29"))
+# 응답을 만들어 보내는 데 남겨 둘 여유
+DEADLINE_SAFETY_SEC = float(os.getenv("DEADLINE_SAFETY_SEC", "0.5"))
+
+# 현재 요청의 마감 시각 (time.monotonic 기준). None 이면 제한 없음 (작업 큐 워커, 배치 등)
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """요청 마감 시각이 지나 더 기다려도 응답을 돌려줄 수 없음 (→ 504)."""
+
+    def __init__(self, message: str = "request deadline exceeded"):
+        super().__init__(message)
+
+
+def request_timeout(scope: Dict[str, Any]) -> Optional[float]:
+    """
+    ASGI scope 에서 이 요청에 남은 시간(초)을 구한다. 여러 출처가 있으면 가장 짧은 것.
+    - 헤더 REQUEST_DEADLINE_HEADER (ms)
+    - Mangum 이 넣어 주는 Lambda context 의 남은 실행 시간, API Gateway 타임아웃(요청 수신 시각 기준)
+    - 둘 다 없으면 REQUEST_TIMEOUT_SEC
+    """
+    candidates = []
+    for name, value in scope.get("headers") or ():
+        if name.decode("latin-1") == REQUEST_DEADLINE_HEADER:
+            try:
+                candidates.append(float(value) / 1000)
+            except ValueError:
+                pass
+            break
+
+    context = scope.get("aws.context")
+    if context is not None:
+        candidates.append(context.get_remaining_time_in_millis() / 1000)
+        request_context = (scope.get("aws.event") or {}).get("requestContext") or {}
+        # REST API(v1) 는 requestTimeEpoch, HTTP API(v2) 는 timeEpoch
+        epoch_ms = request_context.get("requestTimeEpoch") or request_context.get("timeEpoch")
+        elapsed = time.time() - epoch_ms / 1000 if epoch_ms else 0.0
+        candidates.append(API_GATEWAY_TIMEOUT_SEC - max(0.0, elapsed))
+    elif not candidates and REQUEST_TIMEOUT_SEC > 0:
+        candidates.append(REQUEST_TIMEOUT_SEC)
+
+    if not candidates:
+        return None
+    return max(0.0, min(candidates) - DEADLINE_SAFETY_SEC)
+
+
+@contextmanager
+def deadline_scope(timeout_sec: Optional[float]):
+    """이 안에서 실행되는 코드(와 여기서 만든 task)는 timeout_sec 뒤를 마감으로 본다. None 이면 제한 없음."""
+    token = _deadline.set(time.monotonic() + timeout_sec if timeout_sec is not None else None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """현재 요청의 남은 시간(초, 음수 가능). 마감이 없으면 None."""
+    deadline = _deadline.get()
+    return deadline - time.monotonic() if deadline is not None else None
+
+
+def clamp(timeout_sec: Optional[float]) -> Optional[float]:
+    """timeout_sec 과 남은 시간 중 짧은 쪽 (0 미만은 0)."""
+    left = remaining()
+    if left is None:
+        return timeout_sec
+    left = max(0.0, left)
+    return left if timeout_sec is None else min(timeout_sec, left)
+
+
+def budget(timeout_sec: Optional[float]) -> Optional[float]:
+    """clamp 와 같지만 이미 마감이 지났으면 새 upstream 작업을 시작하지 않도록 DeadlineExceeded."""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded()
+    return clamp(timeout_sec)
+
+
+def detached_task(coro: Coroutine, *, name: Optional[str] = None) -> asyncio.Task:
+    """
+    요청 마감을 물려받지 않는 task. 요청보다 오래 사는 공용 루프(poller, 작업 큐 워커 등)는
+    이걸로 만들어야 처음 띄운 요청의 마감에 묶이지 않는다.
+    """
+    context = contextvars.copy_context()
+    context.run(_deadline.set, None)
+    return asyncio.get_running_loop().create_task(coro, name=name, context=context)
@@ -0,0 +1,100 @@
+import os
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from app.services.response_text import loads
+
+# 진단 결과 8개 필드 중 체형 공통 내용은 로컬 템플릿에서, 사용자별 내용만 모델이 짧게 생성한다 (opt-in)
+DIAGNOSIS_TEMPLATES_ENABLED = os.getenv("DIAGNOSIS_TEMPLATES_ENABLED", "0") == "1"
+# app/data/diagnosis_templates/<버전>.json. 문구를 고치면 새 버전 파일로 추가해 결과 캐시가 섞이지 않게 한다
+DIAGNOSIS_TEMPLATE_VERSION = os.getenv("DIAGNOSIS_TEMPLATE_VERSION", "v1")
+DIAGNOSIS_TEMPLATE_DIR = os.getenv(
+    "DIAGNOSIS_TEMPLATE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "diagnosis_templates"),
+)
+
+BODY_TYPES = ("스트레이트", "웨이브", "내추럴")
+TEMPLATE_FIELDS = (
+    "type_description",
+    "detailed_features",
+    "attraction_points",
+    "recommended_styles",
+    "avoid_styles",
+    "styling_fixes",
+    "styling_tips",
+)
+# 모델이 사용자별 문장을 만드는 필드. 결과는 "사용자별 문장 + 체형 공통 문단"
+PERSONALIZED_FIELDS = ("detailed_features", "attraction_points", "styling_fixes")
+
+DELTA_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "body_type": {"type": "string", "enum": list(BODY_TYPES)},
+        "detailed_features": {"type": "string"},
+        "attraction_points": {"type": "string"},
+        "styling_fixes": {"type": "string"},
+    },
+    "required": ["body_type", *PERSONALIZED_FIELDS],
+    "additionalProperties": False,
+}
+
+DELTA_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "BodyDiagnosisDelta",
+        "strict": True,
+        "schema": DELTA_SCHEMA,
+    },
+}
+
+
+@lru_cache(maxsize=None)
+def load_templates(version: str = DIAGNOSIS_TEMPLATE_VERSION) -> Dict[str, Dict[str, str]]:
+    """버전별 체형 템플릿 {body_type: {필드: 문단}}. 체형/필드가 빠진 파일은 시작 시점에 바로 실패시킨다."""
+    with open(os.path.join(DIAGNOSIS_TEMPLATE_DIR, f"{version}.json"), "rb") as f:
+        types = loads(f.read())["types"]
+    for body_type in BODY_TYPES:
+        missing = [k for k in TEMPLATE_FIELDS if not (types.get(body_type) or {}).get(k)]
+        if missing:
+            raise ValueError(f"diagnosis template {version}: {body_type} is missing {', '.join(missing)}")
+    return types
+
+
+def build_delta_prompt(
+    answers: list[str], height: float, weight: float, gender: str, body_type: Optional[str] = None
+) -> str:
+    diagnose = (
+        f"골격 유형은 {body_type}(으)로 확정되었으니 body_type 은 그대로 쓰고" if body_type
+        else f"아래 사용자 정보로 골격 유형({'/'.join(BODY_TYPES)})을 진단하고"
+    )
+    return (
+        "당신은 골격 진단 및 패션 스타일리스트입니다.\n"
+        f"{diagnose}, 반드시 JSON으로만 응답하세요.\n"
+        "유형별 공통 설명은 이미 준비되어 있으니 쓰지 말고, 이 사용자에게만 해당하는 내용만 짧게 쓰세요.\n"
+        "- detailed_features: 응답에서 드러난 이 사용자의 신체 특징 (2문장 이내)\n"
+        "- attraction_points: 이 사용자만의 매력 포인트 (1문장)\n"
+        "- styling_fixes: 이 사용자에게 필요한 보완 포인트 (1~2문장)\n\n"
+        f"- 성별: {gender}\n"
+        f"- 키: {height}cm\n"
+        f"- 체중: {weight}kg\n"
+        "- 설문 응답:\n"
+        + "\n".join(f"{i+1}. {a}" for i, a in enumerate(answers))
+        + "\n\n주의: 코드블록 없이 순수 JSON만 출력하세요."
+    )
+
+
+def merge(delta: Dict[str, Any], version: str = DIAGNOSIS_TEMPLATE_VERSION) -> Dict[str, Any]:
+    """모델이 만든 delta(body_type + 사용자별 문장)를 해당 체형 템플릿에 합쳐 DiagnoseResponse 형태로 만든다."""
+    body_type = delta.get("body_type")
+    template = load_templates(version).get(body_type)
+    if template is None:
+        raise ValueError(f"알 수 없는 body_type: {body_type}")
+    data: Dict[str, Any] = {"body_type": body_type}
+    for field in TEMPLATE_FIELDS:
+        personal = (delta.get(field) or "").strip() if field in PERSONALIZED_FIELDS else ""
+        data[field] = f"{personal} {template[field]}" if personal else template[field]
+    return data
+
+
+if DIAGNOSIS_TEMPLATES_ENABLED:
+    load_templates()  # 템플릿 파일 문제는 첫 진단 요청이 아니라 기동 시 드러나게
@@ -0,0 +1,130 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from app.services.rate_limiter import upstream_limiter
+
+T = TypeVar("T")
+
+# 채팅 턴 hedging: 관측 지연의 분위수를 넘겨도 끝나지 않으면 같은 요청을 하나 더 보내 먼저 끝난 쪽을 쓴다 (opt-in)
+CHAT_HEDGE_ENABLED = os.getenv("CHAT_HEDGE_ENABLED", "0") == "1"
+# 이 분위수의 지연을 넘기면 두 번째 run 을 띄운다
+CHAT_HEDGE_QUANTILE = float(os.getenv("CHAT_HEDGE_QUANTILE", "0.9"))
+# 관측값이 이만큼 모이기 전에는 고정 지연(CHAT_HEDGE_DELAY_SEC) 사용
+CHAT_HEDGE_MIN_SAMPLES = int(os.getenv("CHAT_HEDGE_MIN_SAMPLES", "20"))
+CHAT_HEDGE_DELAY_SEC = float(os.getenv("CHAT_HEDGE_DELAY_SEC", "5"))
+CHAT_HEDGE_MIN_DELAY_SEC = float(os.getenv("CHAT_HEDGE_MIN_DELAY_SEC", "1"))
+# 추가 upstream 호출 상한: 일반 요청 100건당 hedge 최대 N건 (+ 아래 burst)
+CHAT_HEDGE_BUDGET_PCT = float(os.getenv("CHAT_HEDGE_BUDGET_PCT", "5"))
+CHAT_HEDGE_BUDGET_BURST = float(os.getenv("CHAT_HEDGE_BUDGET_BURST", "3"))
+CHAT_HEDGE_HISTORY_SIZE = int(os.getenv("CHAT_HEDGE_HISTORY_SIZE", "500"))
+
+
+class Hedger:
+    """
+    지연 분포(최근 성공 건)와 hedge 예산을 들고 있다가 call() 에서 필요할 때만 두 번째 실행을 띄운다.
+    예산은 토큰 버킷: 일반 요청마다 budget_pct/100 개씩 쌓이고(최대 burst) hedge 하나에 1개를 쓴다.
+    따라서 hedge 로 늘어나는 호출은 어떤 구간에서도 budget_pct% + burst 를 넘지 않는다.
+    """
+
+    def __init__(
+        self,
+        *,
+        quantile: float = CHAT_HEDGE_QUANTILE,
+        budget_pct: float = CHAT_HEDGE_BUDGET_PCT,
+        burst: float = CHAT_HEDGE_BUDGET_BURST,
+        history_size: int = CHAT_HEDGE_HISTORY_SIZE,
+    ):
+        self.quantile = quantile
+        self.ratio = budget_pct / 100
+        self.burst = burst
+        self._tokens = burst
+        self._latencies: Deque[float] = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.skipped_budget = 0
+        self.skipped_busy = 0
+
+    def delay(self) -> float:
+        """두 번째 실행을 띄우기까지 기다릴 시간."""
+        samples = sorted(self._latencies)
+        if len(samples) < CHAT_HEDGE_MIN_SAMPLES:
+            return CHAT_HEDGE_DELAY_SEC
+        observed = samples[min(len(samples) - 1, int(self.quantile * len(samples)))]
+        return max(CHAT_HEDGE_MIN_DELAY_SEC, observed)
+
+    def _admit(self) -> None:
+        with self._lock:
+            self.calls += 1
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def _try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                self.skipped_budget += 1
+                return False
+            self._tokens -= 1
+            self.hedged += 1
+            return True
+
+    async def call(
+        self,
+        primary: Callable[[], Awaitable[T]],
+        backup: Callable[[], Awaitable[T]],
+        *,
+        assistant_id: Optional[str] = None,
+    ) -> T:
+        """
+        primary() 를 실행하고 delay() 안에 끝나지 않으면 backup() 을 추가로 실행해 먼저 성공한 결과를 반환.
+        진 쪽은 취소한다 (백엔드가 취소를 받으면 upstream run 도 runs.cancel).
+        둘 다 실패하면 primary 의 예외를 그대로 올린다.
+        """
+        self._admit()
+        started = time.monotonic()
+        first = asyncio.ensure_future(primary())
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.delay())
+            if not done:
+                if upstream_limiter.saturated(assistant_id):
+                    # 슬롯이 모자랄 때 hedge 는 다른 요청의 자리를 뺏을 뿐
+                    self.skipped_busy += 1
+                elif self._try_spend():
+                    tasks.append(asyncio.ensure_future(backup()))
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        self._latencies.append(time.monotonic() - started)
+                        return task.result()
+            return first.result()  # 모두 실패
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # 진 쪽의 실패가 "never retrieved" 경고로 남지 않게
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": CHAT_HEDGE_ENABLED,
+            "delay_sec": round(self.delay(), 3),
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "skipped_budget": self.skipped_budget,
+            "skipped_busy": self.skipped_busy,
+            "extra_call_pct": round(100 * self.hedged / self.calls, 2) if self.calls else 0.0,
+        }
+
+
+chat_hedger = Hedger()
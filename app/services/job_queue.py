@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from app.services.assistant_service import chat_body_result_async
+from app.services.deadline import detached_task
+from app.services.job_store import JobStore
+from app.services.rate_limiter import UpstreamBusy
+
+logger = logging.getLogger("app.jobs")
+
+# Lambda 는 응답 후 프로세스가 멈추므로 백그라운드 워커를 돌릴 수 없다 → 기본 비활성
+JOB_QUEUE_ENABLED = os.getenv("JOB_QUEUE_ENABLED", "0" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "1") == "1"
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "jobs.sqlite3")
+# 동시에 돌리는 assistant run 수 상한 (= 워커 수)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# running 상태로 이 시간 이상 heartbeat 가 없으면 죽은 워커의 작업으로 보고 재실행
+JOB_STALE_SEC = float(os.getenv("JOB_STALE_SEC", "120"))
+# 실행 중인 작업의 updated_at 갱신 주기. JOB_STALE_SEC 보다 충분히 짧아야 오래 걸리는 작업이 두 번 실행되지 않는다
+JOB_HEARTBEAT_SEC = float(os.getenv("JOB_HEARTBEAT_SEC", str(JOB_STALE_SEC / 4)))
+JOB_RETENTION_SEC = float(os.getenv("JOB_RETENTION_SEC", "86400"))
+# 종료 시 실행 중인 작업이 끝나기를 기다리는 시간. 그 뒤에도 남은 작업은 queued 로 되돌려 다른 프로세스/재시작이 이어받는다
+JOB_DRAIN_SEC = float(os.getenv("JOB_DRAIN_SEC", "10"))
+# 이 주기로 저장소를 훑어 아무도 처리하지 않는 queued 작업(종료한 워커 프로세스가 되돌린 것 등)을 가져온다. 0 이면 끔
+JOB_SWEEP_SEC = float(os.getenv("JOB_SWEEP_SEC", "30"))
+
+
+async def _run_body_result(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return await chat_body_result_async(
+        answers=payload["answers"],
+        height=payload["height"],
+        weight=payload["weight"],
+        gender=payload["gender"],
+    )
+
+
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]] = {
+    "body_result": _run_body_result,
+}
+
+
+_FINISHED = ("completed", "failed")
+
+
+class JobQueue:
+    """
+    작업을 JobStore 에 기록하고 고정 개수의 asyncio 워커가 순서대로 처리한다.
+    시작 시 저장소에 남아 있는 미완료 작업을 다시 큐에 넣으므로 재시작에도 작업이 유실되지 않는다.
+    저장소 파일은 import 시점이 아니라 처음 쓸 때(lifespan 의 start) 연다.
+    """
+
+    def __init__(self, path: str = JOB_STORE_PATH, workers: int = JOB_WORKERS, store: Optional[JobStore] = None):
+        self.path = path
+        self.workers = workers
+        self._store = store
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list[asyncio.Task] = []
+        self._busy: Set[asyncio.Task] = set()  # 작업을 실행 중인 워커
+        self._draining = False
+        # wait() 중인 작업만: job id → (완료 이벤트, 기다리는 요청 수). 마지막 요청이 끝나면 지운다
+        self._done: Dict[str, Tuple[asyncio.Event, int]] = {}
+
+    @property
+    def store(self) -> JobStore:
+        if self._store is None:
+            self._store = JobStore(self.path)
+        return self._store
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._draining = False
+        self.store.purge(JOB_RETENTION_SEC)
+        for job_id in self.store.requeue_stale(JOB_STALE_SEC):
+            self._queue.put_nowait(job_id)
+        # 첫 submit 에서 시작될 수도 있으므로 그 요청의 마감을 물려받지 않게 한다 (작업은 202 이후에도 계속)
+        self._tasks = [detached_task(self._worker(), name=f"job-worker-{i}") for i in range(self.workers)]
+        if JOB_SWEEP_SEC > 0:
+            self._tasks.append(detached_task(self._sweep(), name="job-sweeper"))
+
+    async def stop(self, drain_sec: float = JOB_DRAIN_SEC) -> None:
+        """
+        새 작업은 더 꺼내지 않고, 실행 중인 작업은 drain_sec 동안 끝나기를 기다린다.
+        그래도 남은 작업은 취소해 queued 로 되돌린다 (run 은 upstream 에서도 취소됨).
+        """
+        self._draining = True
+        busy = [t for t in self._tasks if t in self._busy]
+        for task in self._tasks:
+            if task not in self._busy:
+                task.cancel()
+        if busy and drain_sec > 0:
+            _, pending = await asyncio.wait(busy, timeout=drain_sec)
+            if pending:
+                logger.warning("job queue: %d job(s) still running after %.0fs, requeueing", len(pending), drain_sec)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        await self.start()
+        job = self.store.create(kind, payload)
+        self._queue.put_nowait(job["id"])
+        return job
+
+    async def wait(self, job_id: str, timeout_sec: float) -> Optional[Dict[str, Any]]:
+        """
+        작업이 끝나거나 timeout_sec 이 지날 때까지 기다린 뒤 현재 상태를 반환.
+        이 프로세스의 워커가 끝낸 작업만 바로 깨어나고, 다른 프로세스가 끝낸 작업은 timeout 뒤 저장소에서 확인된다.
+        """
+        job = self.store.get(job_id)
+        if job is None or job["status"] in _FINISHED or timeout_sec <= 0:
+            return job
+        # 상태 확인과 이벤트 등록 사이에 await 가 없으므로 그 사이 워커가 끝내 신호를 놓치는 일은 없다
+        event, waiters = self._done.get(job_id, (None, 0))
+        if event is None:
+            event = asyncio.Event()
+        self._done[job_id] = (event, waiters + 1)
+        try:
+            await asyncio.wait_for(event.wait(), timeout_sec)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            event, waiters = self._done.pop(job_id, (event, 1))
+            if waiters > 1:
+                self._done[job_id] = (event, waiters - 1)
+        return self.store.get(job_id)
+
+    def _notify(self, job_id: str) -> None:
+        entry = self._done.get(job_id)
+        if entry is not None:
+            entry[0].set()
+
+    async def _heartbeat(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_SEC)
+            try:
+                self.store.heartbeat(job_id)
+            except Exception as e:
+                logger.warning("job %s heartbeat failed: %s", job_id, e)
+
+    async def _sweep(self) -> None:
+        while True:
+            await asyncio.sleep(JOB_SWEEP_SEC)
+            try:
+                job_ids = self.store.requeue_stale(JOB_STALE_SEC, idle_sec=JOB_SWEEP_SEC)
+            except Exception as e:
+                logger.warning("job sweep failed: %s", e)
+                continue
+            for job_id in job_ids:
+                self._queue.put_nowait(job_id)  # 이미 큐에 있던 id 는 claim 에서 걸러진다
+
+    async def _worker(self) -> None:
+        me = asyncio.current_task()
+        while not self._draining:
+            job_id = await self._queue.get()
+            try:
+                if self._draining or not self.store.claim(job_id):
+                    continue  # 종료 중이거나 다른 워커/프로세스가 이미 가져감
+                self._busy.add(me)
+                job = self.store.get(job_id)
+                # 실행 중임을 주기적으로 기록해 오래 걸리는 작업이 stale 로 다시 실행되지 않게 한다
+                beat = asyncio.ensure_future(self._heartbeat(job_id))
+                try:
+                    result = await JOB_HANDLERS[job["kind"]](job["payload"])
+                except asyncio.CancelledError:
+                    # 종료로 중단됨: stale 판정을 기다리지 않고 바로 다른 프로세스가 가져갈 수 있게
+                    self.store.release(job_id)
+                    raise
+                except UpstreamBusy as e:
+                    # 실패 처리하지 않고 잠시 뒤 다시 큐에 넣는다
+                    self.store.release(job_id)
+                    asyncio.get_running_loop().call_later(e.retry_after, self._queue.put_nowait, job_id)
+                    continue
+                except Exception as e:
+                    logger.warning("job %s failed: %s", job_id, e)
+                    self.store.fail(job_id, str(e))
+                else:
+                    self.store.complete(job_id, result)
+                finally:
+                    beat.cancel()
+                self._notify(job_id)
+            finally:
+                self._busy.discard(me)
+                self._queue.task_done()
+
+
+job_queue = JobQueue() if JOB_QUEUE_ENABLED else None
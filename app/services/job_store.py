@@ -0,0 +1,119 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+# queued → running → completed | failed
+JOB_STATUSES = ("queued", "running", "completed", "failed")
+
+
+class JobStore:
+    """
+    SQLite 기반 작업 저장소.
+    상태/결과 조회는 이 테이블만 읽으므로 클라이언트 폴링이 OpenAI 호출로 이어지지 않는다.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL,"
+            " payload TEXT NOT NULL, result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0,"
+            " created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, updated_at)")
+
+    @staticmethod
+    def _row(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def create(self, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, status, payload, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, json.dumps(payload, ensure_ascii=False), now, now),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row)
+
+    def claim(self, job_id: str) -> bool:
+        """queued 인 작업을 running 으로 원자적으로 바꾼다. 다른 워커/프로세스가 먼저 가져갔으면 False."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ?"
+                " WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id),
+            )
+        return cur.rowcount == 1
+
+    def heartbeat(self, job_id: str) -> bool:
+        """실행 중인 작업의 updated_at 을 갱신해 stale 로 재실행되지 않게 한다. 이미 running 이 아니면 False."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET updated_at = ? WHERE id = ? AND status = 'running'", (time.time(), job_id)
+            )
+        return cur.rowcount == 1
+
+    def release(self, job_id: str) -> None:
+        """running 으로 가져간 작업을 실행하지 않고 queued 로 되돌린다."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'queued', updated_at = ? WHERE id = ? AND status = 'running'",
+                (time.time(), job_id),
+            )
+
+    def complete(self, job_id: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'completed', result = ?, error = NULL, updated_at = ? WHERE id = ?",
+                (json.dumps(result, ensure_ascii=False), time.time(), job_id),
+            )
+
+    def fail(self, job_id: str, error: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                (error, time.time(), job_id),
+            )
+
+    def requeue_stale(self, stale_sec: float, idle_sec: float = 0.0) -> List[str]:
+        """
+        죽은 프로세스가 잡고 있던(stale_sec 동안 heartbeat 가 없는 running) 작업을 queued 로 되돌리고,
+        대기 중인 작업 id 를 생성 순으로 반환한다. idle_sec 을 주면 그 시간 동안 아무도 건드리지 않은 것만.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'queued', updated_at = ? WHERE status = 'running' AND updated_at < ?",
+                (now, now - stale_sec),
+            )
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' AND updated_at <= ? ORDER BY created_at",
+                (now - idle_sec,),
+            ).fetchall()
+        return [r["id"] for r in rows]
+
+    def purge(self, older_than_sec: float) -> int:
+        """끝난 작업 중 오래된 것을 삭제."""
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('completed', 'failed') AND updated_at < ?",
+                (time.time() - older_than_sec,),
+            )
+        return cur.rowcount
@@ -0,0 +1,349 @@
+import asyncio
+import contextvars
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("app.timing")
+
+# 요청마다 단계별 소요 시간을 JSON 한 줄로 남길지 (app.timing 로거, INFO)
+TIMING_LOG_ENABLED = os.getenv("TIMING_LOG_ENABLED", "1") == "1"
+# 워커 프로세스가 여럿일 때(app.cli.serve) 프로세스별 값을 모을 공유 디렉터리. 비어 있으면 /metrics 는 응답한 프로세스 값만
+# 워커마다 <pid>.json 스냅숏을 METRICS_SNAPSHOT_SEC 마다(그리고 종료 시) 쓰고, /metrics 는 모든 스냅숏을 합쳐 보여 준다
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+METRICS_SNAPSHOT_SEC = float(os.getenv("METRICS_SNAPSHOT_SEC", "5"))
+# 15~40s 까지 구분되도록 초 단위 버킷
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 20, 30, 45, 60)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(values: Dict[str, object]) -> Labels:
+    return tuple(sorted((k, "" if v is None else str(v)) for k, v in values.items()))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(
+        '{}="{}"'.format(k, v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')) for k, v in labels
+    )
+    return "{" + inner + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def family(self) -> "Family":
+        with self._lock:
+            return Family(self.name, "counter", self.help, dict(self._values))
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        # labels → [bucket 별 개수..., 합계, 개수]
+        self._values: Dict[Labels, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+                    break
+            row[-2] += value
+            row[-1] += 1
+
+    def family(self) -> "Family":
+        with self._lock:
+            return Family(self.name, "histogram", self.help, {k: list(v) for k, v in self._values.items()}, self.buckets)
+
+
+class Family:
+    """
+    이름 하나의 값 묶음. counter/gauge 는 labels → 값, histogram 은 labels → [bucket 별 개수..., 합계, 개수].
+    프로세스 간에는 JSON 으로 주고받고(to_json/from_json), merge 로 합친다.
+    """
+
+    def __init__(self, name: str, kind: str, help: str, values: Dict[Labels, Any], buckets: Sequence[float] = ()):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.values = values
+        self.buckets = tuple(buckets)
+
+    def merge(self, other: "Family", worker: str) -> None:
+        """
+        다른 프로세스의 값을 더한다. counter/histogram 은 합계, gauge 는 합치면 뜻이 달라지는 값(상태, 분위수 등)이
+        있으므로 worker 라벨을 붙여 워커별로 둔다.
+        """
+        for labels, value in other.values.items():
+            if self.kind == "gauge":
+                self.values[tuple(sorted(labels + (("worker", worker),)))] = value
+            elif self.kind == "histogram":
+                row = self.values.get(labels)
+                self.values[labels] = list(value) if row is None else [a + b for a, b in zip(row, value)]
+            else:
+                self.values[labels] = self.values.get(labels, 0) + value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        items = sorted(self.values.items())
+        if self.kind != "histogram":
+            return lines + [f"{self.name}{_format_labels(k)} {v}" for k, v in items]
+        for key, row in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, row):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', repr(float(bound))),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {row[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {row[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {row[-1]}")
+        return lines
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "name": self.name, "kind": self.kind, "help": self.help, "buckets": list(self.buckets),
+            "values": [[list(map(list, k)), v] for k, v in self.values.items()],
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "Family":
+        values = {tuple(tuple(pair) for pair in k): v for k, v in data["values"]}
+        return cls(data["name"], data["kind"], data["help"], values, data.get("buckets") or ())
+
+
+# (이름, 타입, 설명, [(labels, 값)]) — /metrics 요청 시점에 기존 stats() 를 읽어 오는 수집기
+Sample = Tuple[str, str, str, Iterable[Tuple[Dict[str, object], float]]]
+
+
+class Registry:
+    """
+    prometheus_client 없이 text exposition(0.0.4) 형식만 직접 만든다.
+    값은 프로세스 메모리에 있으므로 Lambda 인스턴스별로 따로 집계된다. 워커 프로세스가 여럿이면
+    multiproc_dir 에 프로세스별 스냅숏을 쓰고 render() 가 모두 합친다 (prometheus_client 의 multiprocess 방식).
+    끝난 워커의 counter/histogram 은 계속 더해(합계가 줄지 않게) 두고, gauge 는 살아 있는 워커 것만 보인다.
+    """
+
+    def __init__(self):
+        self._metrics: List[object] = []
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def counter(self, name: str, help: str) -> Counter:
+        metric = Counter(name, help)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn: Callable[[], Iterable[Sample]]) -> Callable[[], Iterable[Sample]]:
+        self._collectors.append(fn)
+        return fn
+
+    def families(self) -> List[Family]:
+        """이 프로세스의 현재 값 (수집기는 지금 stats() 를 읽는다)."""
+        families = [metric.family() for metric in self._metrics]
+        for fn in self._collectors:
+            try:
+                samples = list(fn())
+            except Exception as e:  # 통계 하나가 깨져도 나머지는 노출
+                logger.warning("metrics collector %s failed: %s", getattr(fn, "__name__", fn), e)
+                continue
+            for name, kind, help, values in samples:
+                families.append(Family(name, kind, help, {_labels(labels): value for labels, value in values}))
+        return families
+
+    def write_snapshot(self, directory: str = "") -> None:
+        """이 프로세스의 값을 <directory>/<pid>.json 으로 쓴다 (읽는 쪽이 쓰다 만 파일을 보지 않게 바꿔치기)."""
+        directory = directory or METRICS_MULTIPROC_DIR
+        path = os.path.join(directory, f"{os.getpid()}.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump([family.to_json() for family in self.families()], f, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+
+    async def snapshot_loop(self, interval_sec: float = METRICS_SNAPSHOT_SEC, directory: str = "") -> None:
+        """워커 수명 동안 주기적으로 스냅숏을 쓴다 (/metrics 를 받은 워커가 다른 워커 값을 읽을 수 있게)."""
+        os.makedirs(directory or METRICS_MULTIPROC_DIR, exist_ok=True)
+        try:
+            while True:
+                try:
+                    self.write_snapshot(directory)
+                except OSError as e:
+                    logger.warning("metrics snapshot failed: %s", e)
+                await asyncio.sleep(interval_sec)
+        finally:
+            try:
+                self.write_snapshot(directory)  # 종료 직전 값까지 남긴다
+            except OSError:
+                pass
+
+    def render(self, directory: str = "") -> str:
+        directory = directory or METRICS_MULTIPROC_DIR
+        families = merge_snapshots(directory, self) if directory else self.families()
+        lines: List[str] = []
+        for family in families:
+            lines += family.render()
+        return "\n".join(lines) + "\n"
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge_snapshots(directory: str, registry: Optional["Registry"] = None) -> List[Family]:
+    """
+    directory 의 워커별 스냅숏을 합친다. registry 를 주면 이 프로세스 값은 파일 대신 현재 값을 쓴다.
+    끝난 워커(프로세스가 없음)의 스냅숏은 counter/histogram 만 더한다.
+    """
+    own = os.getpid()
+    snapshots: List[Tuple[int, List[Family]]] = []
+    if registry is not None:
+        snapshots.append((own, registry.families()))
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        try:
+            pid = int(os.path.basename(path)[:-len(".json")])
+        except ValueError:
+            continue
+        if registry is not None and pid == own:
+            continue
+        try:
+            with open(path, encoding="utf-8") as f:
+                snapshots.append((pid, [Family.from_json(d) for d in json.load(f)]))
+        except (OSError, ValueError) as e:
+            logger.warning("metrics snapshot %s unreadable: %s", path, e)
+
+    merged: Dict[str, Family] = {}
+    for pid, families in snapshots:
+        alive = pid == own or _alive(pid)
+        for family in families:
+            if family.kind == "gauge" and not alive:
+                continue
+            target = merged.get(family.name)
+            if target is None:
+                target = merged[family.name] = Family(family.name, family.kind, family.help, {}, family.buckets)
+            target.merge(family, str(pid))
+    return list(merged.values())
+
+
+def clear_snapshots(directory: str) -> None:
+    """서버 시작 시 이전 실행의 스냅숏을 지운다 (죽은 워커의 counter 가 다음 실행에 더해지지 않게)."""
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "*.json*")):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+registry = Registry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template"
+)
+assistant_phase_duration = registry.histogram(
+    "assistant_phase_duration_seconds", "Time spent in each assistant call phase"
+)
+upstream_calls = registry.counter("upstream_calls_total", "OpenAI API calls by call type and assistant")
+run_outcomes = registry.counter("assistant_run_outcomes_total", "Final status of assistant runs")
+
+# 현재 요청의 span 목록 (middleware 가 요청마다 새로 넣는다)
+_spans: contextvars.ContextVar[Optional[List[Dict[str, object]]]] = contextvars.ContextVar("spans", default=None)
+
+
+def current_spans() -> Optional[List[Dict[str, object]]]:
+    return _spans.get()
+
+
+@contextmanager
+def span(
+    phase: str,
+    assistant_id: Optional[str] = "",
+    *,
+    upstream: bool = False,
+    into: Optional[List[Dict[str, object]]] = None,
+):
+    """
+    한 단계의 소요 시간을 assistant_phase_duration_seconds 에 기록하고, 현재 요청의 span 목록에도 남긴다.
+    upstream=True 면 OpenAI 호출 1회로 센다. into 로 기록할 목록을 직접 줄 수 있다 (다른 task 에서 대신 기록할 때).
+    """
+    started = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        assistant = assistant_id or ""
+        assistant_phase_duration.observe(elapsed, phase=phase, assistant=assistant)
+        if upstream:
+            upstream_calls.inc(call=phase, assistant=assistant)
+        spans = into if into is not None else _spans.get()
+        if spans is not None:
+            entry: Dict[str, object] = {"phase": phase, "ms": round(elapsed * 1000, 1)}
+            if assistant:
+                entry["assistant"] = assistant
+            if error:
+                entry["error"] = error
+            spans.append(entry)
+
+
+def record_run_status(assistant_id: Optional[str], status: Optional[str]) -> None:
+    run_outcomes.inc(assistant=assistant_id or "", status=status or "unknown")
+
+
+@contextmanager
+def request_scope(method: str):
+    """
+    요청 하나의 span 목록을 열고, 끝나면 라우트별 히스토그램 기록 + 타이밍 로그 한 줄.
+    yield 한 dict 에 route/status 를 채워 넣는다.
+    """
+    spans: List[Dict[str, object]] = []
+    token = _spans.set(spans)
+    info: Dict[str, object] = {"route": "unmatched", "status": 500}
+    started = time.perf_counter()
+    try:
+        yield info
+    finally:
+        elapsed = time.perf_counter() - started
+        _spans.reset(token)
+        http_request_duration.observe(elapsed, route=info["route"], method=method, status=info["status"])
+        if TIMING_LOG_ENABLED and spans:
+            logger.info(json.dumps({
+                "route": info["route"],
+                "method": method,
+                "status": info["status"],
+                "ms": round(elapsed * 1000, 1),
+                "spans": spans,
+            }, ensure_ascii=False))
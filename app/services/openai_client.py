@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import os
+import threading
+import weakref
+from typing import TYPE_CHECKING, Any, Coroutine, Dict, Optional, TypeVar
+
+from app.services.rate_limiter import UPSTREAM_MAX_CONCURRENT_RUNS
+
+if TYPE_CHECKING:
+    # openai 패키지는 import 만 ~0.4s 걸리므로 실제 클라이언트가 필요할 때 불러온다 (Lambda 콜드 스타트)
+    import httpx
+    from openai import AsyncOpenAI
+
+T = TypeVar("T")
+logger = logging.getLogger("app.openai")
+
+# 프로세스당 OpenAI 연결 수 예산. 운영 서버 모드(app.cli.serve)에서는 컨테이너 전체 값으로 보고 워커 수로 나눠 준다
+# (openai SDK 기본값 1000 을 그대로 쓰면 워커 수만큼 곱해져 사실상 제한이 없다)
+OPENAI_POOL_TOTAL_CONNECTIONS = int(os.getenv("OPENAI_POOL_TOTAL_CONNECTIONS", "200"))
+# 루프(클라이언트)당 최대 연결 수. 기본: run 슬롯 수 × 2 (run 본 요청 + retrieve/list 후속 요청),
+# 동시 run 제한이 없으면 OPENAI_POOL_TOTAL_CONNECTIONS. 넘는 요청은 빈 연결이 날 때까지 풀에서 기다린다
+OPENAI_POOL_MAX_CONNECTIONS = int(os.getenv(
+    "OPENAI_POOL_MAX_CONNECTIONS",
+    str(UPSTREAM_MAX_CONCURRENT_RUNS * 2 if UPSTREAM_MAX_CONCURRENT_RUNS > 0 else OPENAI_POOL_TOTAL_CONNECTIONS),
+))
+OPENAI_POOL_MAX_KEEPALIVE = int(os.getenv("OPENAI_POOL_MAX_KEEPALIVE", str(OPENAI_POOL_MAX_CONNECTIONS)))
+# 폴링 간격(최대 3s)보다 충분히 길게 유지해야 매 retrieve 마다 TLS 핸드셰이크를 다시 하지 않는다 (httpx 기본 5s)
+OPENAI_KEEPALIVE_EXPIRY_SEC = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY_SEC", "60"))
+# h2 패키지가 있어야 동작 (pip install httpx[http2]). 없으면 HTTP/1.1 로 동작
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "0") == "1"
+OPENAI_CONNECT_TIMEOUT_SEC = float(os.getenv("OPENAI_CONNECT_TIMEOUT_SEC", "5"))
+# create_and_run / 스트림 / responses.create 처럼 오래 걸릴 수 있는 호출
+OPENAI_CREATE_TIMEOUT_SEC = float(os.getenv("OPENAI_CREATE_TIMEOUT_SEC", "60"))
+# runs.retrieve / messages.list 처럼 바로 응답해야 하는 조회. 느리면 빨리 포기한다:
+# run poller 의 retrieve 는 다음 간격에 다시 확인(연속 POLL_MAX_CONSECUTIVE_ERRORS 회까지), messages.list 는 그 요청이 실패
+OPENAI_POLL_TIMEOUT_SEC = float(os.getenv("OPENAI_POLL_TIMEOUT_SEC", "10"))
+
+# 미리 데우기: auto(기본) = Lambda 는 provisioned concurrency 초기화 때만, 컨테이너는 앱 시작 시 / 1 = 항상 / 0 = 안 함
+OPENAI_PREWARM = os.getenv("OPENAI_PREWARM", "auto")
+# 미리 데울 때 OpenAI 에 가벼운 요청을 한 번 보내 TLS 연결까지 열어 둘지
+OPENAI_PREWARM_CONNECT = os.getenv("OPENAI_PREWARM_CONNECT", "0") == "1"
+
+# httpx 커넥션 풀은 생성된 이벤트 루프에 묶이므로 루프마다 클라이언트를 하나씩 둔다.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+
+# 동기 래퍼 전용 백그라운드 루프 (Lambda/스크립트 등 sync 호출부용)
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_lock = threading.Lock()
+
+
+def get_async_client() -> "AsyncOpenAI":
+    """
+    현재 실행 중인 이벤트 루프 전용 AsyncOpenAI 클라이언트를 반환.
+    처음 호출될 때 만들어 같은 루프 안에서는 재사용한다.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+        client = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_client=DefaultAsyncHttpxClient(transport=_build_transport(), timeout=call_timeout("create")),
+        )
+        _clients[loop] = client
+    return client
+
+
+_timeouts: Dict[str, "httpx.Timeout"] = {}
+
+
+def call_timeout(kind: str) -> "httpx.Timeout":
+    """호출 종류별 타임아웃. create: 생성/스트림(긴 read), poll: 조회(짧은 read). 연결 타임아웃은 공통."""
+    timeout = _timeouts.get(kind)
+    if timeout is None:
+        import httpx
+
+        read = OPENAI_POLL_TIMEOUT_SEC if kind == "poll" else OPENAI_CREATE_TIMEOUT_SEC
+        timeout = _timeouts[kind] = httpx.Timeout(read, connect=OPENAI_CONNECT_TIMEOUT_SEC)
+    return timeout
+
+
+class PoolStats:
+    """모든 루프의 OpenAI 커넥션 풀 사용량 합계 (/metrics 용)."""
+
+    def __init__(self):
+        self.in_flight = 0  # 응답 헤더를 기다리는 요청 수 (스트림 본문 수신 중인 연결은 open - idle 로 보임)
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.saturated = 0  # 빈 연결이 없어 풀 대기로 들어간 요청 수
+        self.connections_opened = 0  # 새 연결 수 (= TLS 핸드셰이크 수)
+        self._pools: "weakref.WeakSet" = weakref.WeakSet()
+
+    def connections(self) -> Dict[str, int]:
+        open_, idle = 0, 0
+        for pool in list(self._pools):
+            for conn in list(pool.connections):
+                if conn.is_closed():
+                    continue
+                open_ += 1
+                idle += conn.is_idle()
+        return {"open": open_, "idle": idle}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_connections": OPENAI_POOL_MAX_CONNECTIONS,
+            "http2": OPENAI_HTTP2,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "requests": self.requests,
+            "saturated": self.saturated,
+            "connections_opened": self.connections_opened,
+            **self.connections(),
+        }
+
+
+pool_stats = PoolStats()
+
+
+def _build_transport():
+    """풀 크기/keepalive/HTTP2 를 설정한 httpx 전송 계층. 요청 수와 새 연결 수를 pool_stats 에 기록한다."""
+    import httpx
+
+    http2 = OPENAI_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("OPENAI_HTTP2=1 but the h2 package is not installed; using HTTP/1.1")
+            http2 = False
+
+    class _CountingTransport(httpx.AsyncHTTPTransport):
+        def __init__(self):
+            super().__init__(
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=OPENAI_POOL_MAX_CONNECTIONS,
+                    max_keepalive_connections=OPENAI_POOL_MAX_KEEPALIVE,
+                    keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY_SEC,
+                ),
+            )
+            self._seen: "weakref.WeakSet" = weakref.WeakSet()
+            pool_stats._pools.add(self._pool)
+
+        async def handle_async_request(self, request):
+            pool = self._pool
+            if not http2 and sum(1 for c in pool.connections if not c.is_idle()) >= OPENAI_POOL_MAX_CONNECTIONS:
+                pool_stats.saturated += 1
+            pool_stats.requests += 1
+            pool_stats.in_flight += 1
+            pool_stats.peak_in_flight = max(pool_stats.peak_in_flight, pool_stats.in_flight)
+            try:
+                return await super().handle_async_request(request)
+            finally:
+                pool_stats.in_flight -= 1
+                for conn in pool.connections:
+                    if conn not in self._seen:
+                        self._seen.add(conn)
+                        pool_stats.connections_opened += 1
+
+    return _CountingTransport()
+
+
+def should_prewarm(at_init: bool) -> bool:
+    """
+    at_init=True: 모듈 import(Lambda 초기화 단계) 시점, False: 앱 lifespan 시작 시점.
+    Lambda 는 lifespan 이 호출마다 돌기 때문에 초기화 단계에서만 데운다.
+    """
+    on_lambda = os.getenv("AWS_LAMBDA_FUNCTION_NAME") is not None
+    if OPENAI_PREWARM == "0" or at_init != on_lambda:
+        return False
+    if OPENAI_PREWARM == "1" or not on_lambda:
+        return True
+    return os.getenv("AWS_LAMBDA_INITIALIZATION_TYPE") == "provisioned-concurrency"
+
+
+async def prewarm(connect: bool = OPENAI_PREWARM_CONNECT) -> None:
+    """openai import + 현재 루프의 클라이언트 생성을 첫 요청 전에 끝내 둔다. connect=True 면 연결도 미리 연다."""
+    client = get_async_client()
+    if connect:
+        try:
+            await client.models.list(timeout=call_timeout("poll"))
+        except Exception:
+            pass  # 데우기 실패는 무시 (첫 요청에서 다시 시도)
+
+
+def prewarm_blocking(connect: bool = OPENAI_PREWARM_CONNECT) -> None:
+    """
+    이벤트 루프 밖(Lambda 초기화 단계)에서 호출. Mangum 은 호출마다 같은 기본 루프를 쓰므로
+    그 루프에서 클라이언트를 만들어 두면 첫 호출이 그대로 재사용한다.
+    """
+    try:
+        loop = asyncio.get_event_loop()
+    except RuntimeError:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    loop.run_until_complete(prewarm(connect))
+
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    global _sync_loop
+    with _sync_lock:
+        if _sync_loop is None or _sync_loop.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="openai-sync-loop", daemon=True).start()
+            _sync_loop = loop
+        return _sync_loop
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    async 서비스 함수를 동기 코드에서 호출하기 위한 브리지.
+    매 호출마다 루프를 새로 만들지 않고 백그라운드 루프 하나를 공유해 커넥션을 재사용한다.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_sync_loop()).result()
@@ -0,0 +1,193 @@
+import asyncio
+import os
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from app.services.deadline import DeadlineExceeded, budget, remaining
+
+# assistant id 별 동시 run 상한 (이벤트 루프 단위, opt-in). 0 이면 제한 없음:
+# run 대부분은 upstream 응답 대기라 수백 개를 동시에 띄워도 되고, 계정 한도는 UPSTREAM_RPM 으로 맞춘다
+UPSTREAM_MAX_CONCURRENT_RUNS = int(os.getenv("UPSTREAM_MAX_CONCURRENT_RUNS", "0"))
+# OpenAI 요청 수 한도 (분당). 0 이면 제한 없음
+UPSTREAM_RPM = float(os.getenv("UPSTREAM_RPM", "0"))
+# 한 번에 몰아 쓸 수 있는 토큰 수 (기본: 10초 분량)
+UPSTREAM_BURST = float(os.getenv("UPSTREAM_BURST", str(max(1.0, UPSTREAM_RPM / 6))))
+# 슬롯/토큰을 이 시간 안에 못 얻으면 대기하지 않고 바로 503
+UPSTREAM_QUEUE_WAIT_SEC = float(os.getenv("UPSTREAM_QUEUE_WAIT_SEC", "5"))
+
+
+class UpstreamBusy(Exception):
+    """대기 예산 안에 upstream 호출 자리를 얻지 못함 → 503 으로 응답."""
+
+    def __init__(self, reason: str, retry_after: float = 1.0):
+        super().__init__(f"upstream busy: {reason}")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    분당 요청 수 제한. 토큰을 미리 예약(음수 허용)하고 그만큼 기다리는 방식이라
+    이벤트 루프/스레드에 묶인 객체 없이 어디서나 쓸 수 있다.
+    """
+
+    def __init__(self, rpm: float, burst: float):
+        self.rate = rpm / 60.0
+        self.capacity = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, max_wait: Optional[float]) -> Optional[float]:
+        """토큰 하나를 예약하고 기다려야 할 시간을 반환. max_wait 을 넘기면 예약하지 않고 None."""
+        with self._lock:
+            self._refill(time.monotonic())
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if max_wait is not None and wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+    def refund(self) -> None:
+        """예약해 놓고 쓰지 않은 토큰을 돌려준다 (기다리다 취소된 경우)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+class UpstreamLimiter:
+    def __init__(
+        self,
+        max_concurrent_runs: int = UPSTREAM_MAX_CONCURRENT_RUNS,
+        rpm: float = UPSTREAM_RPM,
+        burst: float = UPSTREAM_BURST,
+        queue_wait_sec: float = UPSTREAM_QUEUE_WAIT_SEC,
+    ):
+        self.max_concurrent_runs = max_concurrent_runs
+        self.queue_wait_sec = queue_wait_sec
+        self.bucket = TokenBucket(rpm, burst)
+        # 세마포어는 이벤트 루프에 묶이므로 루프별로 둔다
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = \
+            weakref.WeakKeyDictionary()
+        self.in_flight: Dict[str, int] = {}
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+        self.throttled = 0
+        self.wait_sec_total = 0.0
+        self.wait_sec_max = 0.0
+
+    def _semaphore(self, assistant_id: str) -> Optional[asyncio.Semaphore]:
+        if self.max_concurrent_runs <= 0:
+            return None
+        per_loop = self._semaphores.setdefault(asyncio.get_running_loop(), {})
+        sem = per_loop.get(assistant_id)
+        if sem is None:
+            sem = per_loop[assistant_id] = asyncio.Semaphore(self.max_concurrent_runs)
+        return sem
+
+    @asynccontextmanager
+    async def run_slot(self, assistant_id: Optional[str]):
+        """
+        run 하나를 시작할 자리(동시 실행 슬롯 + 요청 토큰 1개)를 얻는다. 슬롯은 max_concurrent_runs > 0 일 때만.
+        queue_wait_sec 안에 못 얻으면 UpstreamBusy. 요청 마감이 더 가까우면 그때까지만 기다린다.
+        """
+        key = assistant_id or ""
+        queue_wait_sec = budget(self.queue_wait_sec)
+        started = time.monotonic()
+        sem = self._semaphore(key)
+        self.waiting += 1
+        try:
+            if sem is not None:
+                try:
+                    await asyncio.wait_for(sem.acquire(), queue_wait_sec)
+                except asyncio.TimeoutError:
+                    self.shed += 1
+                    raise UpstreamBusy(f"too many concurrent runs for {key or 'assistant'}")
+
+            if self.bucket.enabled:
+                left = queue_wait_sec - (time.monotonic() - started)
+                wait = self.bucket.reserve(max(0.0, left))
+                if wait is None:
+                    if sem is not None:
+                        sem.release()
+                    self.shed += 1
+                    raise UpstreamBusy("rate limit", retry_after=max(1.0, 1 / self.bucket.rate))
+                if wait > 0:
+                    try:
+                        await asyncio.sleep(wait)
+                    except BaseException:
+                        self.bucket.refund()
+                        if sem is not None:
+                            sem.release()
+                        raise
+        finally:
+            self.waiting -= 1
+
+        waited = time.monotonic() - started
+        self.admitted += 1
+        self.wait_sec_total += waited
+        self.wait_sec_max = max(self.wait_sec_max, waited)
+        self.in_flight[key] = self.in_flight.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            self.in_flight[key] -= 1
+            if sem is not None:
+                sem.release()
+
+    def saturated(self, assistant_id: Optional[str]) -> bool:
+        """슬롯/토큰을 기다리는 요청이 있거나 동시 실행이 상한에 닿았는지. 급하지 않은 실행을 미룰 때 쓴다."""
+        if self.waiting > 0:
+            return True
+        return 0 < self.max_concurrent_runs <= self.in_flight.get(assistant_id or "", 0)
+
+    async def throttle(self) -> None:
+        """진행 중인 run 의 후속 요청(retrieve/list 등)용: 버리지 않고 토큰이 생길 때까지 기다린다."""
+        if not self.bucket.enabled:
+            return
+        # 마감 안에 못 받을 토큰은 예약하지 않는다 (예약하고 포기하면 그 토큰은 다른 호출부도 못 씀)
+        left = remaining()
+        wait = self.bucket.reserve(None if left is None else max(0.0, left))
+        if wait is None:
+            raise DeadlineExceeded("rate limit wait exceeds request deadline")
+        if wait:
+            self.throttled += 1
+            try:
+                await asyncio.sleep(wait)
+            except BaseException:
+                self.bucket.refund()
+                raise
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent_runs": self.max_concurrent_runs,
+            "rpm": self.bucket.rate * 60,
+            "tokens": round(self.bucket.tokens, 2) if self.bucket.enabled else None,
+            "in_flight": dict(self.in_flight),
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "throttled": self.throttled,
+            "wait_sec_avg": round(self.wait_sec_total / self.admitted, 4) if self.admitted else 0.0,
+            "wait_sec_max": round(self.wait_sec_max, 4),
+        }
+
+
+upstream_limiter = UpstreamLimiter()
@@ -0,0 +1,83 @@
+import json
+from typing import Any, Optional, Union
+
+# orjson 이 있으면 JSON 파싱에 쓴다 (표준 json 대비 수 배 빠름). 없으면 표준 json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_DECODER = "orjson" if orjson is not None else "json"
+
+
+def loads(raw: Union[str, bytes]) -> Any:
+    """
+    assistant 응답(JSON 문자열) 파싱. 앞뒤 공백은 그대로 둬도 된다.
+    문자열 안의 제어 문자처럼 orjson 이 거부하는 입력은 표준 json(strict=False)으로 한 번 더 시도한다.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(raw, strict=False)
+
+
+def extract_json(raw: str) -> Any:
+    """
+    ```json ... ``` 코드블록이 있으면 그 안의 JSON 만, 없으면 raw 전체를 파싱.
+    (strict json_schema 응답은 거의 항상 코드블록이 없으므로 정규식 없이 find 한 번으로 판별)
+    """
+    start = raw.find("```")
+    if start < 0:
+        return loads(raw)
+    start += 7 if raw.startswith("```json", start) else 3
+    end = raw.find("```", start)
+    try:
+        return loads(raw[start:end if end >= 0 else len(raw)])
+    except ValueError:
+        # JSON 문자열 값 안에 ``` 가 들어 있던 경우
+        return loads(raw)
+
+
+def message_text(message: Any) -> Optional[str]:
+    """
+    Assistants 메시지의 첫 text 파트. SDK 객체는 속성을 바로 읽고(model_dump 없이), dict 면 키로 읽는다.
+    text 파트가 없으면 None.
+    """
+    content = message.get("content") if isinstance(message, dict) else getattr(message, "content", None)
+    for part in content or ():
+        text = part.get("text") if isinstance(part, dict) else getattr(part, "text", None)
+        if text is None:
+            continue
+        if isinstance(text, str):
+            return text
+        value = text.get("value") if isinstance(text, dict) else getattr(text, "value", None)
+        if isinstance(value, str):
+            return value
+    return None
+
+
+def _role(message: Any) -> str:
+    return (message.get("role") if isinstance(message, dict) else getattr(message, "role", "")) or ""
+
+
+def _created_at(message: Any) -> int:
+    return (message.get("created_at") if isinstance(message, dict) else getattr(message, "created_at", 0)) or 0
+
+
+def latest_assistant_text(messages) -> str:
+    """
+    메시지 목록에서 가장 최근(created_at 최대) assistant 메시지의 첫 text 파트를 반환.
+    목록 순서에 의존하지 않고, 정렬 없이 한 번만 훑는다.
+    """
+    latest = None
+    for m in messages:
+        if _role(m) == "assistant" and (latest is None or _created_at(m) > _created_at(latest)):
+            latest = m
+    if latest is None:
+        raise ValueError("No assistant message found")
+    text = message_text(latest)
+    if text is None:
+        raise ValueError("Assistant message has no text content")
+    return text.strip()
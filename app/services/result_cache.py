@@ -0,0 +1,233 @@
+import abc
+import copy
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.services.response_text import loads
+
+# RESULT_CACHE_BACKEND: memory(기본) | sqlite | redis | none
+RESULT_CACHE_BACKEND = os.getenv("RESULT_CACHE_BACKEND", "memory")
+RESULT_CACHE_URL = os.getenv("RESULT_CACHE_URL", "")  # sqlite 파일 경로 또는 redis://...
+RESULT_CACHE_TTL_SEC = float(os.getenv("RESULT_CACHE_TTL_SEC", "86400"))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "10000"))
+# 프롬프트/assistant 설정을 바꿨을 때 올리면 이전 결과가 모두 무효화됨
+RESULT_CACHE_VERSION = os.getenv("RESULT_CACHE_VERSION", "1")
+# 키/몸무게 버킷 크기 (예: 1.0 → 164.4cm 와 164.6cm 는 서로 다른 버킷, 164.4 와 163.6 은 같은 버킷)
+CACHE_HEIGHT_BUCKET_CM = float(os.getenv("CACHE_HEIGHT_BUCKET_CM", "1.0"))
+CACHE_WEIGHT_BUCKET_KG = float(os.getenv("CACHE_WEIGHT_BUCKET_KG", "1.0"))
+
+_WS = re.compile(r"\s+")
+
+
+def _canonical_text(text: str) -> str:
+    """NFC 정규화 + 공백 정리 + 끝 문장부호 제거."""
+    text = unicodedata.normalize("NFC", text or "")
+    text = _WS.sub(" ", text).strip()
+    return text.rstrip(" .。!?,")
+
+
+def _bucket(value: float, precision: float) -> str:
+    if precision <= 0:
+        return repr(float(value))
+    return f"{round(float(value) / precision) * precision:.2f}"
+
+
+def make_key(namespace: str, answers: list[str], height: float, weight: float, gender: str) -> str:
+    """
+    진단 입력을 정규화해 sha256 키를 만든다.
+    namespace 에는 호출 경로와 assistant id 를 넣어 서로 다른 프롬프트의 결과가 섞이지 않게 한다.
+    """
+    payload = {
+        "v": RESULT_CACHE_VERSION,
+        "ns": namespace,
+        "answers": [_canonical_text(a) for a in answers],
+        "height": _bucket(height, CACHE_HEIGHT_BUCKET_CM),
+        "weight": _bucket(weight, CACHE_WEIGHT_BUCKET_KG),
+        "gender": _canonical_text(gender).lower(),
+    }
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResultCache(abc.ABC):
+    """TTL 이 있는 key → dict 캐시의 공통 인터페이스. 구현은 _get/_set 을 채운다. hit/miss 는 프로세스 단위로 센다."""
+
+    backend = ""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        self._set(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    @abc.abstractmethod
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        """저장된 값(호출부가 수정해도 되는 사본). 없거나 만료됐으면 None."""
+
+    @abc.abstractmethod
+    def _set(self, key: str, value: Dict[str, Any]) -> None:
+        """값을 TTL 과 함께 저장 (호출부가 나중에 value 를 수정해도 저장된 값은 그대로)."""
+
+
+class NullCache(ResultCache):
+    backend = "none"
+
+    def _get(self, key):
+        return None
+
+    def _set(self, key, value):
+        pass
+
+
+class MemoryCache(ResultCache):
+    """프로세스 내 LRU + TTL 캐시."""
+
+    backend = "memory"
+
+    def __init__(self, ttl_sec: float = RESULT_CACHE_TTL_SEC, max_entries: int = RESULT_CACHE_MAX_ENTRIES):
+        super().__init__()
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return copy.deepcopy(value)
+
+    def _set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.time() + self.ttl_sec, copy.deepcopy(value))
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def stats(self):
+        return {**super().stats(), "size": len(self._data)}
+
+
+class SQLiteCache(ResultCache):
+    """로컬 SQLite 파일 캐시. 같은 호스트의 여러 프로세스/워커가 공유할 수 있다."""
+
+    backend = "sqlite"
+
+    def __init__(self, path: str, ttl_sec: float = RESULT_CACHE_TTL_SEC, max_entries: int = RESULT_CACHE_MAX_ENTRIES):
+        super().__init__()
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS result_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS result_cache_accessed ON result_cache (accessed_at)")
+
+    def _get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM result_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM result_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE result_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return loads(row[0])
+
+    def _set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO result_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now + self.ttl_sec, now),
+            )
+            # LRU: 가장 오래 안 쓰인 항목부터 max_entries 초과분 삭제 (만료 항목도 같이 정리)
+            self._conn.execute("DELETE FROM result_cache WHERE expires_at < ?", (now,))
+            self._conn.execute(
+                "DELETE FROM result_cache WHERE key IN ("
+                " SELECT key FROM result_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def stats(self):
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM result_cache").fetchone()[0]
+        return {**super().stats(), "size": size}
+
+
+class RedisCache(ResultCache):
+    """
+    Redis 캐시 (redis 패키지 필요, 선택 의존성).
+    TTL 은 SETEX 로, LRU 는 Redis 의 maxmemory-policy=allkeys-lru 설정에 맡긴다.
+    """
+
+    backend = "redis"
+
+    def __init__(self, url: str, ttl_sec: float = RESULT_CACHE_TTL_SEC):
+        super().__init__()
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("RESULT_CACHE_BACKEND=redis 를 쓰려면 redis 패키지를 설치하세요") from e
+        self.ttl_sec = ttl_sec
+        self._redis = redis.Redis.from_url(url or "redis://localhost:6379/0")
+
+    def _get(self, key):
+        raw = self._redis.get(f"result_cache:{key}")
+        return loads(raw) if raw is not None else None
+
+    def _set(self, key, value):
+        self._redis.setex(f"result_cache:{key}", int(self.ttl_sec), json.dumps(value, ensure_ascii=False))
+
+
+def _build_cache() -> ResultCache:
+    if RESULT_CACHE_BACKEND == "none":
+        return NullCache()
+    if RESULT_CACHE_BACKEND == "sqlite":
+        return SQLiteCache(RESULT_CACHE_URL or "result_cache.sqlite3")
+    if RESULT_CACHE_BACKEND == "redis":
+        return RedisCache(RESULT_CACHE_URL)
+    if RESULT_CACHE_BACKEND == "memory":
+        return MemoryCache()
+    raise ValueError(f"Unknown RESULT_CACHE_BACKEND: {RESULT_CACHE_BACKEND}")
+
+
+result_cache: ResultCache = _build_cache()
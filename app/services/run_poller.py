@@ -0,0 +1,274 @@
+import asyncio
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from app.services.deadline import detached_task
+from app.services.metrics import current_spans, record_run_status, span
+from app.services.openai_client import call_timeout, get_async_client
+from app.services.rate_limiter import upstream_limiter
+
+# 이력이 없을 때 첫 확인 시점
+POLL_FIRST_DELAY_SEC = float(os.getenv("POLL_FIRST_DELAY_SEC", "0.5"))
+# 관측 분포의 p10~p90 (대부분의 run 이 끝나는 구간) 을 몇 번에 나눠 확인할지
+POLL_DENSE_CHECKS = int(os.getenv("POLL_DENSE_CHECKS", "6"))
+# 그 밖의 구간(이력 없음/p90 이후)은 간격 = 경과 시간 × ratio → 완료 감지 지연이 실행 시간의 ratio 이내
+POLL_BACKOFF_RATIO = float(os.getenv("POLL_BACKOFF_RATIO", "0.15"))
+POLL_MIN_INTERVAL_SEC = float(os.getenv("POLL_MIN_INTERVAL_SEC", "0.3"))
+POLL_MAX_INTERVAL_SEC = float(os.getenv("POLL_MAX_INTERVAL_SEC", "3.0"))
+# assistant 별로 최근 몇 개의 완료 시간을 기억할지
+POLL_HISTORY_SIZE = int(os.getenv("POLL_HISTORY_SIZE", "200"))
+# 첫 확인은 관측된 완료 시간의 이 분위수에서 (그 전에 끝나는 run 은 드묾)
+POLL_FIRST_CHECK_QUANTILE = float(os.getenv("POLL_FIRST_CHECK_QUANTILE", "0.1"))
+# 관측값은 "완료를 감지한 시각"이라 실제 완료보다 늦다 → 조금 앞당겨 확인해야 지연이 누적되지 않음
+POLL_FIRST_CHECK_SCALE = float(os.getenv("POLL_FIRST_CHECK_SCALE", "0.8"))
+# retrieve 가 시간 초과/5xx/429/연결 오류로 실패하면 다음 간격에 다시 확인한다. 연속 이만큼 실패하면 run 실패로 처리
+POLL_MAX_CONSECUTIVE_ERRORS = int(os.getenv("POLL_MAX_CONSECUTIVE_ERRORS", "5"))
+
+TERMINAL_FAILURES = {"failed", "cancelled", "expired"}
+
+
+class RunTimeout(TimeoutError):
+    """timeout 안에 run 이 끝나지 않음. 마지막으로 확인한 상태를 status 에 담는다."""
+
+    def __init__(self, status: Optional[str]):
+        super().__init__("Assistants run timed out")
+        self.status = status
+
+
+def is_transient(exc: BaseException) -> bool:
+    """다음 폴링에서 다시 시도할 만한 retrieve 실패: 시간 초과, 연결 오류, 5xx, 429. 그 밖의 4xx 등은 바로 실패."""
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int):
+        return status >= 500 or status == 429
+    from openai import APIConnectionError  # APITimeoutError 포함
+
+    return isinstance(exc, (APIConnectionError, asyncio.TimeoutError))
+
+
+class CompletionStats:
+    """assistant 별 run 완료 시간 분포와 폴링 횟수. 모든 이벤트 루프가 공유한다."""
+
+    def __init__(self, size: int = POLL_HISTORY_SIZE):
+        self._size = size
+        self._durations: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self.retrieves = 0
+        self.retrieve_errors = 0  # 다음 폴링으로 넘긴 일시적 실패
+        self.completed = 0
+
+    def record(self, assistant_id: str, duration: float) -> None:
+        with self._lock:
+            self._durations.setdefault(assistant_id or "", deque(maxlen=self._size)).append(duration)
+            self.completed += 1
+
+    def quantile(self, assistant_id: str, q: float) -> Optional[float]:
+        samples = sorted(self._durations.get(assistant_id or "", ()))
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def first_delay(self, assistant_id: str) -> float:
+        observed = self.quantile(assistant_id, POLL_FIRST_CHECK_QUANTILE)
+        if observed is None:
+            return POLL_FIRST_DELAY_SEC
+        return max(POLL_MIN_INTERVAL_SEC, observed * POLL_FIRST_CHECK_SCALE)
+
+    def next_interval(self, assistant_id: str, elapsed: float) -> float:
+        p10 = self.quantile(assistant_id, 0.1)
+        p90 = self.quantile(assistant_id, 0.9)
+        if p10 is not None and elapsed < p90:
+            interval = (p90 - p10) / POLL_DENSE_CHECKS
+        else:
+            interval = elapsed * POLL_BACKOFF_RATIO
+        return min(POLL_MAX_INTERVAL_SEC, max(POLL_MIN_INTERVAL_SEC, interval))
+
+    def stats(self) -> Dict[str, Any]:
+        per_assistant = {}
+        for aid, samples in list(self._durations.items()):
+            per_assistant[aid] = {
+                "samples": len(samples),
+                "p10": self.quantile(aid, 0.1),
+                "p50": self.quantile(aid, 0.5),
+                "p90": self.quantile(aid, 0.9),
+                "first_delay": self.first_delay(aid),
+            }
+        return {
+            "retrieves": self.retrieves,
+            "retrieve_errors": self.retrieve_errors,
+            "completed": self.completed,
+            "assistants": per_assistant,
+        }
+
+
+completion_stats = CompletionStats()
+
+
+class _Pending:
+    __slots__ = (
+        "thread_id", "run_id", "assistant_id", "started_at", "next_check", "deadline", "future", "status", "spans",
+        "errors",
+    )
+
+    def __init__(self, thread_id, run_id, assistant_id, started_at, next_check, deadline, future, spans=None):
+        self.thread_id = thread_id
+        self.run_id = run_id
+        self.assistant_id = assistant_id
+        self.started_at = started_at
+        self.next_check = next_check
+        self.deadline = deadline
+        self.future = future
+        self.status = None
+        self.errors = 0  # 연속 retrieve 실패 수
+        # poll 은 poller task 에서 돌기 때문에 기다리는 요청의 span 목록을 들고 있다가 거기에 기록
+        self.spans = spans
+
+
+class RunPoller:
+    """
+    진행 중인 모든 run 을 루프 하나에서 확인한다.
+    run 마다 sleep 루프를 돌리지 않고, 확인 시점이 된 run 들을 한 번에 모아 동시에 retrieve 한다.
+    """
+
+    def __init__(self):
+        self._pending: Dict[int, _Pending] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def wait(
+        self,
+        thread_id: str,
+        run_id: str,
+        *,
+        assistant_id: str = "",
+        timeout_sec: Optional[float] = None,
+        started_at: Optional[float] = None,
+    ):
+        """
+        run 이 completed 가 될 때까지 기다려 Run 객체를 반환.
+        failed/cancelled/expired 면 RuntimeError, timeout_sec 초과 시 RunTimeout.
+        started_at(time.monotonic) 은 run 생성 시각으로, 첫 확인 시점과 완료 시간 측정의 기준이 된다.
+        """
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        started_at = started_at if started_at is not None else now
+        deadline = now + timeout_sec if timeout_sec is not None else None
+        next_check = started_at + completion_stats.first_delay(assistant_id)
+        if deadline is not None:
+            next_check = min(next_check, deadline)
+
+        p = _Pending(
+            thread_id, run_id, assistant_id, started_at, next_check, deadline, loop.create_future(), current_spans()
+        )
+        self._pending[id(p)] = p
+        if self._task is None or self._task.done():
+            # 여러 요청이 공유하는 루프라 처음 띄운 요청의 마감을 물려받으면 안 됨
+            self._task = detached_task(self._loop(), name="run-poller")
+        self._wakeup.set()
+        try:
+            return await p.future
+        finally:
+            self._pending.pop(id(p), None)
+
+    async def _loop(self) -> None:
+        while self._pending:
+            # 계산 전에 clear 해야 그 사이 들어온 새 run 의 wakeup 을 놓치지 않음
+            self._wakeup.clear()
+            now = time.monotonic()
+            due = [p for p in list(self._pending.values()) if p.next_check <= now and not p.future.done()]
+            if due:
+                await asyncio.gather(*(self._check(p) for p in due))
+                continue
+
+            wait_for = min(p.next_check for p in self._pending.values()) - now
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(0.0, wait_for))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _check(self, p: _Pending) -> None:
+        try:
+            await upstream_limiter.throttle()
+            with span("poll", p.assistant_id, upstream=True, into=p.spans):
+                st = await get_async_client().beta.threads.runs.retrieve(
+                    thread_id=p.thread_id, run_id=p.run_id, timeout=call_timeout("poll")
+                )
+        except Exception as e:
+            self._retry_or_fail(p, e)
+            return
+        finally:
+            completion_stats.retrieves += 1
+
+        if p.future.done():  # 기다리던 쪽이 취소됨
+            return
+        now = time.monotonic()
+        p.errors = 0
+        p.status = st.status
+        if st.status == "completed":
+            completion_stats.record(p.assistant_id, now - p.started_at)
+            record_run_status(p.assistant_id, st.status)
+            self._resolve(p, result=st)
+        elif st.status in TERMINAL_FAILURES:
+            record_run_status(p.assistant_id, st.status)
+            self._resolve(p, error=RuntimeError(
+                f"Assistants run ended with status={st.status}, "
+                f"last_error={getattr(st, 'last_error', None)}"
+            ))
+        elif p.deadline is not None and now >= p.deadline:
+            self._resolve(p, error=RunTimeout(st.status))
+        else:
+            self._reschedule(p, now)
+
+    def _reschedule(self, p: _Pending, now: float) -> None:
+        p.next_check = now + completion_stats.next_interval(p.assistant_id, now - p.started_at)
+        if p.deadline is not None:
+            p.next_check = min(p.next_check, p.deadline)
+
+    def _retry_or_fail(self, p: _Pending, error: Exception) -> None:
+        """
+        retrieve 한 번의 실패로 run 을 실패 처리하지 않는다: 일시적 실패는 다음 간격에 다시 확인.
+        일시적이지 않은 실패(4xx, 요청 마감 등), 연속 POLL_MAX_CONSECUTIVE_ERRORS 회 실패면 그 오류로,
+        wait 의 timeout 이 지났으면 마지막으로 확인한 상태로 RunTimeout.
+        """
+        if p.future.done():
+            return
+        now = time.monotonic()
+        p.errors += 1
+        if not is_transient(error) or p.errors >= POLL_MAX_CONSECUTIVE_ERRORS:
+            self._resolve(p, error=error)
+        elif p.deadline is not None and now >= p.deadline:
+            timeout = RunTimeout(p.status)
+            timeout.__cause__ = error
+            self._resolve(p, error=timeout)
+        else:
+            completion_stats.retrieve_errors += 1
+            self._reschedule(p, now)
+
+    def _resolve(self, p: _Pending, *, result=None, error: Optional[BaseException] = None) -> None:
+        self._pending.pop(id(p), None)
+        if p.future.done():
+            return
+        if error is not None:
+            p.future.set_exception(error)
+        else:
+            p.future.set_result(result)
+
+
+_pollers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, RunPoller]" = weakref.WeakKeyDictionary()
+
+
+def get_run_poller() -> RunPoller:
+    """현재 이벤트 루프의 공용 poller."""
+    loop = asyncio.get_running_loop()
+    poller = _pollers.get(loop)
+    if poller is None:
+        poller = RunPoller()
+        _pollers[loop] = poller
+    return poller
@@ -0,0 +1,68 @@
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+from app.services.deadline import DeadlineExceeded, budget, detached_task
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    같은 key 로 동시에 들어온 요청을 하나의 실행으로 합친다.
+    첫 요청이 실행을 시작하고, 끝나기 전에 들어온 요청은 같은 결과를 기다린다.
+    실행은 요청 마감을 물려받지 않는 별도 task 로 돌고, 기다리는 시간은 요청마다 자기 마감까지다.
+    그래서 한 요청이 끊기거나 마감이 지나도 나중에 합류한 요청(새 마감의 재시도 등)은 영향을 받지 않으며,
+    기다리는 요청이 모두 사라지면 그때 실행을 취소한다.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self.started = 0
+        self.shared = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        loop = asyncio.get_running_loop()
+        wait_sec = budget(None)  # 이미 마감이 지났으면 합류하지 않고 DeadlineExceeded
+        call = self._calls.get(key)
+        # 다른 이벤트 루프(동기 래퍼용 루프)의 task 는 공유할 수 없음
+        if call is None or call.task.get_loop() is not loop:
+            call = _Call(detached_task(fn(), name=f"singleflight:{key}"))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _t, k=key, c=call: self._forget(k, c))
+            self.started += 1
+        else:
+            self.shared += 1
+
+        call.waiters += 1
+        try:
+            result = await asyncio.wait_for(asyncio.shield(call.task), wait_sec)
+        except (asyncio.CancelledError, asyncio.TimeoutError) as e:
+            # 마지막으로 기다리던 요청이 끊기거나 마감이 지나면 결과를 받을 쪽이 없으므로 실행도 취소
+            if call.waiters == 1 and not call.task.done():
+                call.task.cancel()
+            if isinstance(e, asyncio.TimeoutError) and not call.task.done():
+                raise DeadlineExceeded() from e
+            raise
+        finally:
+            call.waiters -= 1
+        # 호출부가 결과(중첩 dict/list 포함)를 수정해도 다른 요청/결과 캐시에 영향이 없도록 깊은 복사본 반환
+        return copy.deepcopy(result)
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"inflight": len(self._calls), "started": self.started, "shared": self.shared}
+
+
+inflight = SingleFlight()
@@ -0,0 +1,116 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.services.deadline import detached_task
+
+# 채팅 설문 중에 최종 진단(body-result)을 미리 시작해 두는 기능. 기본은 꺼져 있음 (opt-in)
+BODY_RESULT_PREFETCH_ENABLED = os.getenv("BODY_RESULT_PREFETCH_ENABLED", "0") == "1"
+# 응답이 이만큼 모이기 전에는 시작하지 않는다 (설문 17문항)
+BODY_RESULT_PREFETCH_MIN_ANSWERS = int(os.getenv("BODY_RESULT_PREFETCH_MIN_ANSWERS", "17"))
+# 시작 후 이 시간 안에 /body-result 로 이어받지 않으면 버린다
+BODY_RESULT_PREFETCH_TTL_SEC = float(os.getenv("BODY_RESULT_PREFETCH_TTL_SEC", "600"))
+BODY_RESULT_PREFETCH_MAX = int(os.getenv("BODY_RESULT_PREFETCH_MAX", "1000"))
+
+
+class _Speculation:
+    __slots__ = ("key", "task", "expires_at")
+
+    def __init__(self, key: str, task: asyncio.Task, expires_at: float):
+        self.key = key
+        self.task = task
+        self.expires_at = expires_at
+
+
+class SpeculationStore:
+    """
+    session_id → 미리 시작한 실행(task) 하나. 입력 key 가 같으면 최종 요청이 그 결과를 이어받고,
+    다르면(마지막에 응답을 고친 경우) 취소한다.
+    실행은 single-flight 를 거치므로, 최종 요청이 같은 run 에 합류해 있으면 취소해도 run 은 계속된다.
+    프로세스 내 저장이라 다른 인스턴스로 간 최종 요청은 평소처럼 새로 실행한다.
+    """
+
+    def __init__(self, ttl_sec: float = BODY_RESULT_PREFETCH_TTL_SEC, max_sessions: int = BODY_RESULT_PREFETCH_MAX):
+        self.ttl_sec = ttl_sec
+        self.max_sessions = max_sessions
+        self._data: "OrderedDict[str, _Speculation]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.started = 0
+        self.restarted = 0
+        self.hits = 0
+        self.misses = 0
+        self.wasted = 0
+
+    def start(self, session_id: str, key: str, fn: Callable[[], Awaitable[Any]]) -> str:
+        """
+        fn() 을 백그라운드로 시작. 같은 세션이 같은 key 로 이미 진행 중이면 그대로 둔다.
+        반환: "started" | "running" | "ready"
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._prune(time.time())
+            spec = self._data.get(session_id)
+            if spec is not None and spec.key == key and spec.task.get_loop() is loop and not self._failed(spec):
+                spec.expires_at = time.time() + self.ttl_sec
+                return "ready" if spec.task.done() else "running"
+            if spec is not None:
+                self._discard(spec)
+                self.restarted += 1
+            # prefetch 요청은 바로 끝나므로 그 요청의 마감과 무관하게 돌린다
+            task = detached_task(fn())
+            # 이어받는 요청이 없어도 "exception was never retrieved" 경고가 남지 않게
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._data[session_id] = _Speculation(key, task, time.time() + self.ttl_sec)
+            self._data.move_to_end(session_id)
+            while len(self._data) > self.max_sessions:
+                _, old = self._data.popitem(last=False)
+                self._discard(old)
+            self.started += 1
+            return "started"
+
+    def take(self, session_id: str, key: str) -> Optional[asyncio.Task]:
+        """
+        최종 요청용: 세션의 실행을 꺼낸다. key 가 같으면 그 task, 다르거나 없거나 실패했으면 None.
+        꺼낸 항목은 저장소에서 빠진다 (결과는 한 번만 이어받음).
+        """
+        with self._lock:
+            spec = self._data.pop(session_id, None)
+            if spec is None:
+                return None
+            if spec.key != key or spec.expires_at < time.time() or self._failed(spec) \
+                    or spec.task.get_loop() is not asyncio.get_running_loop():
+                self._discard(spec)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return spec.task
+
+    @staticmethod
+    def _failed(spec: _Speculation) -> bool:
+        return spec.task.done() and (spec.task.cancelled() or spec.task.exception() is not None)
+
+    def _discard(self, spec: _Speculation) -> None:
+        if not spec.task.done():
+            spec.task.cancel()
+        self.wasted += 1
+
+    def _prune(self, now: float) -> None:
+        for session_id in [s for s, spec in self._data.items() if spec.expires_at < now]:
+            self._discard(self._data.pop(session_id))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": BODY_RESULT_PREFETCH_ENABLED,
+            "size": len(self._data),
+            "started": self.started,
+            "restarted": self.restarted,
+            "hits": self.hits,
+            "misses": self.misses,
+            "wasted": self.wasted,
+        }
+
+
+speculations = SpeculationStore()
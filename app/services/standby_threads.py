@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.services.deadline import detached_task
+from app.services.metrics import span
+from app.services.openai_client import call_timeout, get_async_client
+from app.services.rate_limiter import upstream_limiter
+
+# 미리 만들어 둔 빈 thread 에 runs.create 로 실행해 create_and_run 의 thread 생성 시간을 요청 경로에서 뺀다 (opt-in)
+STANDBY_THREADS_ENABLED = os.getenv("STANDBY_THREADS_ENABLED", "0") == "1"
+# assistant 마다 대기시켜 둘 빈 thread 수. 동시에 이보다 많이 몰리면 남는 요청은 기존처럼 create_and_run
+STANDBY_THREADS_PER_ASSISTANT = int(os.getenv("STANDBY_THREADS_PER_ASSISTANT", "4"))
+# 이보다 오래 쓰이지 않은 thread 는 버리고(삭제) 새로 만든다
+STANDBY_THREAD_MAX_AGE_SEC = float(os.getenv("STANDBY_THREAD_MAX_AGE_SEC", "1800"))
+
+logger = logging.getLogger("app.assistant")
+
+
+class _Refill:
+    __slots__ = ("task", "wake")
+
+    def __init__(self, task: asyncio.Task, wake: asyncio.Event):
+        self.task = task
+        self.wake = wake
+
+
+class StandbyThreadPool:
+    """
+    assistant id → 아직 메시지가 없는 thread id 들 (만든 순서). acquire() 는 가장 오래된 것부터 꺼내 주고,
+    꺼낼 때마다 백그라운드 task 가 목표 수까지 다시 채운다. 요청은 채워지기를 기다리지 않는다 (비어 있으면 None).
+    thread 는 assistant 에 묶이지 않지만 assistant 별로 나눠 둬야 한쪽 트래픽이 다른 쪽 여분을 다 쓰지 않는다.
+    max_age_sec 동안 꺼내 가지 않은 thread 와, 그동안 한 번도 쓰이지 않은 assistant 의 풀은 비운다.
+    프로세스 내 저장이라 Lambda 에서는 컨테이너별로 따로 채운다.
+    """
+
+    def __init__(
+        self,
+        size: int = STANDBY_THREADS_PER_ASSISTANT,
+        max_age_sec: float = STANDBY_THREAD_MAX_AGE_SEC,
+    ):
+        self.size = size
+        self.max_age_sec = max_age_sec
+        self._idle: Dict[str, Deque[Tuple[str, float]]] = {}
+        self._last_used: Dict[str, float] = {}
+        self._refills: Dict[str, _Refill] = {}
+        self._deleting: Set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+        self._stopped = False
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+        self.evicted = 0
+        self.errors = 0
+
+    def acquire(self, assistant_id: str) -> Optional[str]:
+        """대기 중인 빈 thread 하나를 꺼낸다 (이후 다른 요청에 다시 주지 않음). 없으면 None."""
+        now = time.time()
+        with self._lock:
+            self._last_used[assistant_id] = now
+            idle = self._idle.setdefault(assistant_id, deque())
+            stale = self._evict(idle, now)
+            thread_id = idle.popleft()[0] if idle else None
+            if thread_id is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        self._delete_later(stale)
+        self._kick(assistant_id)
+        return thread_id
+
+    def start(self, assistant_ids: Iterable[Optional[str]]) -> None:
+        """앱 시작 시 호출: 주어진 assistant 들의 풀을 첫 요청 전에 채우기 시작한다."""
+        self._stopped = False
+        now = time.time()
+        for assistant_id in filter(None, assistant_ids):
+            with self._lock:
+                self._last_used.setdefault(assistant_id, now)
+            self._kick(assistant_id)
+
+    async def stop(self) -> None:
+        """채우기를 멈추고 대기 중이던 thread 를 모두 삭제한다 (종료 시)."""
+        self._stopped = True
+        refills = [r.task for r in self._refills.values()]
+        self._refills.clear()
+        for task in refills:
+            task.cancel()
+        await asyncio.gather(*refills, return_exceptions=True)
+        with self._lock:
+            leftover = [thread_id for idle in self._idle.values() for thread_id, _ in idle]
+            self._idle.clear()
+        await asyncio.gather(self._delete(leftover), *self._deleting, return_exceptions=True)
+
+    def _evict(self, idle: Deque[Tuple[str, float]], now: float) -> List[str]:
+        stale = []
+        while idle and now - idle[0][1] > self.max_age_sec:
+            stale.append(idle.popleft()[0])
+        self.evicted += len(stale)
+        return stale
+
+    def _kick(self, assistant_id: str) -> None:
+        if self._stopped:
+            return
+        refill = self._refills.get(assistant_id)
+        if refill is not None and not refill.task.done() and refill.task.get_loop() is asyncio.get_running_loop():
+            refill.wake.set()
+            return
+        # 요청 안에서 시작되더라도 그 요청의 마감에 묶이지 않게
+        wake = asyncio.Event()
+        self._refills[assistant_id] = _Refill(
+            detached_task(self._refill(assistant_id, wake), name=f"standby-threads-{assistant_id}"), wake
+        )
+
+    async def _refill(self, assistant_id: str, wake: asyncio.Event) -> None:
+        while not self._stopped:
+            now = time.time()
+            with self._lock:
+                idle = self._idle.setdefault(assistant_id, deque())
+                stale = self._evict(idle, now)
+                unused = now - self._last_used.get(assistant_id, 0) > self.max_age_sec
+                if unused:
+                    # 한동안 요청이 없던 assistant: 채워 둬도 다시 버리게 되므로 비우고 끝낸다 (다음 acquire 가 재시작)
+                    stale += [thread_id for thread_id, _ in idle]
+                    self.evicted += len(idle)
+                    idle.clear()
+                missing = 0 if unused else self.size - len(idle)
+            self._delete_later(stale)
+            if unused:
+                return
+
+            if missing > 0:
+                created = await asyncio.gather(
+                    *(self._create(assistant_id) for _ in range(missing)), return_exceptions=True
+                )
+                thread_ids = [t for t in created if isinstance(t, str)]
+                with self._lock:
+                    self._idle.setdefault(assistant_id, deque()).extend((t, time.time()) for t in thread_ids)
+                if len(thread_ids) < missing:
+                    # 생성 실패(레이트 리밋 등): 계속 두드리지 않고 다음 acquire 때 다시 시도
+                    return
+
+            # 다음 acquire 또는 가장 오래된 thread 의 만료까지 대기
+            with self._lock:
+                idle = self._idle.get(assistant_id) or ()
+                oldest = idle[0][1] if idle else time.time()
+            wake.clear()
+            try:
+                await asyncio.wait_for(wake.wait(), max(1.0, oldest + self.max_age_sec - time.time()))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _create(self, assistant_id: str) -> str:
+        try:
+            await upstream_limiter.throttle()
+            with span("threads_create", assistant_id, upstream=True):
+                thread = await get_async_client().beta.threads.create(timeout=call_timeout("poll"))
+        except Exception as e:
+            self.errors += 1
+            logger.warning("standby threads.create for %s failed: %s", assistant_id, e)
+            raise
+        self.created += 1
+        return thread.id
+
+    def _delete_later(self, thread_ids: List[str]) -> None:
+        if not thread_ids:
+            return
+        task = detached_task(self._delete(thread_ids), name="standby-threads-delete")
+        self._deleting.add(task)
+        task.add_done_callback(self._deleting.discard)
+
+    async def _delete(self, thread_ids: List[str]) -> None:
+        client = get_async_client()
+        for thread_id in thread_ids:
+            try:
+                await upstream_limiter.throttle()
+                await client.beta.threads.delete(thread_id, timeout=call_timeout("poll"))
+            except Exception as e:
+                # 지우지 못한 빈 thread 는 OpenAI 보존 기간이 지나면 정리된다
+                logger.info("standby threads.delete %s failed: %s", thread_id, e)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            idle = {assistant_id: len(q) for assistant_id, q in self._idle.items()}
+        return {
+            "enabled": STANDBY_THREADS_ENABLED,
+            "size": self.size,
+            "idle": idle,
+            "hits": self.hits,
+            "misses": self.misses,
+            "created": self.created,
+            "evicted": self.evicted,
+            "errors": self.errors,
+        }
+
+
+standby_threads = StandbyThreadPool()
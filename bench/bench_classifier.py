@@ -0,0 +1,55 @@
+"""
+규칙 기반 골격 유형 분류기(app.services.body_type_classifier) 마이크로 벤치마크.
+
+설문 17문항 응답 한 세트를 분류하는 데 걸리는 시간과, 유형별 예시 응답의 분류 결과/확신도를 출력한다.
+
+    python -m bench.bench_classifier
+    python -m bench.bench_classifier --number 50000
+"""
+import argparse
+import timeit
+
+from app.services.body_type_classifier import BODY_TYPE_FAST_PATH_MIN_CONFIDENCE, body_type_classifier
+
+SAMPLES = {
+    "스트레이트": [
+        "두께감이 있고 육감적이다", "피부가 탄탄하고 쫀득한 편이다", "근육이 붙기 쉽다", "목이 약간 짧은 편이다",
+        "허리가 짧고 직선적인 느낌이며 굴곡이 적다", "두께감이 있고, 바스트 탑의 위치가 높다",
+        "어깨가 넓고 직선적인 느낌이며, 탄탄한 인상을 준다", "엉덩이 라인의 위쪽부터 볼륨감이 있으며 탄력있다",
+        "허벅지가 단단하고 근육이 많아 탄력이 있다", "손이 작고 손바닥에 두께감이 있다", "손목이 가늘고 둥근 편이다",
+        "발이 작고 발목이 가늘며 단단하다", "무릎이 작고 부각되지 않는 편이다", "쇄골이 거의 보이지 않는다",
+        "둥근 얼굴이며, 볼이 통통한 편이다", "상체가 발달한 느낌이며 허리가 짧고 탄탄한 인상을 준다",
+        "팔, 가슴, 배 등 상체 위주로 찐다",
+    ],
+    "웨이브": [
+        "얇고 여리여리한 느낌이다", "피부가 부드럽고 말랑하다", "지방이 붙기 쉽다", "목이 길다",
+        "허리가 길고 곡선적이다", "가슴 위치가 낮다", "어깨가 좁고 둥글다", "엉덩이가 납작하고 처진 편이다",
+        "허벅지가 부드럽다", "손이 작고 얇다", "손목이 가늘다", "발이 작고 얇다", "무릎이 부드럽다",
+        "쇄골이 가늘게 보인다", "갸름한 얼굴이다", "하체가 통통한 편이다", "하체 위주로 찐다",
+    ],
+    "내추럴": [
+        "뼈대가 크고 골격이 느껴진다", "피부가 건조하고 거친 편이다", "근육보다 뼈가 느껴진다", "목이 길고 힘줄이 보인다",
+        "허리가 평평하다", "가슴이 평평하다", "어깨가 넓고 각져 있다", "엉덩이가 평평하다", "팔다리가 길다",
+        "손이 크고 마디가 굵다", "손목 뼈가 두드러진다", "발이 크다", "무릎뼈가 크다", "쇄골이 도드라진다",
+        "얼굴 뼈대가 도드라진다", "스타일리시하고 시원한 느낌이다", "전체적으로 골고루 찐다",
+    ],
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rule-based body type classifier micro-benchmark")
+    parser.add_argument("--number", type=int, default=20000, help="calls per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs (best is reported)")
+    args = parser.parse_args(argv)
+
+    print(f"rules: {body_type_classifier.version}, fast path min confidence: {BODY_TYPE_FAST_PATH_MIN_CONFIDENCE}")
+    print(f"{'expected':<10} {'got':<10} {'confidence':>10} {'us/call':>8}")
+    for expected, answers in SAMPLES.items():
+        guess = body_type_classifier.classify(answers)
+        us = min(timeit.repeat(lambda: body_type_classifier.classify(answers),
+                               number=args.number, repeat=args.repeat)) / args.number * 1e6
+        print(f"{expected:<10} {guess.body_type or '-':<10} {guess.confidence:>10.3f} {us:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
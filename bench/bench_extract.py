@@ -0,0 +1,168 @@
+"""
+응답 텍스트 추출/JSON 파싱 마이크로 벤치마크.
+
+이전 방식(메시지 20개 조회 → 메시지/파트마다 model_dump 후 dict 로 탐색, 정규식 코드블록 추출, 표준 json)과
+현재 방식(run 의 최신 메시지 1개 → SDK 객체 속성 직접 읽기, orjson 있으면 orjson)을 같은 입력으로 비교한다.
+네트워크 없이 openai SDK 의 Message 객체를 직접 만들어 측정한다.
+
+    python -m bench.bench_extract
+    python -m bench.bench_extract --number 20000 --json extract.json
+"""
+import argparse
+import json
+import re
+import timeit
+from typing import Any, Callable, Dict, List
+
+from openai.types.beta.threads import Message
+
+from app.services import response_text
+from app.services.response_text import extract_json, latest_assistant_text, loads, message_text
+from bench.fake_openai import CHAT, DIAGNOSIS
+
+
+# ---------- 이전 구현 (비교 기준) ----------
+def _as_dict(obj):
+    try:
+        if hasattr(obj, "model_dump"):
+            return obj.model_dump()
+        if hasattr(obj, "dict"):
+            return obj.dict()
+    except Exception:
+        pass
+    return obj if isinstance(obj, dict) else json.loads(json.dumps(obj, default=str))
+
+
+def _legacy_items_text(items):
+    for item in items or []:
+        d = _as_dict(item)
+        itype = d.get("type")
+        if isinstance(d.get("content"), list):
+            inner = _legacy_items_text(d["content"])
+            if inner:
+                return inner
+        if itype in ("output_text", "text", "input_text"):
+            t = d.get("text")
+            if isinstance(t, str):
+                return t
+            if isinstance(t, dict) and isinstance(t.get("value"), str):
+                return t["value"]
+        for key in ("output_text", "value"):
+            if isinstance(d.get(key), str):
+                return d[key]
+    return None
+
+
+def _legacy_message_text(msg):
+    m = _as_dict(msg)
+    for key in ("text", "output_text"):
+        v = m.get(key)
+        if isinstance(v, str):
+            return v
+        if isinstance(v, dict) and isinstance(v.get("value"), str):
+            return v["value"]
+    content = m.get("content") or []
+    if isinstance(content, list):
+        return _legacy_items_text(content)
+    return None
+
+
+def _legacy_extract_json(raw: str) -> dict:
+    m = re.search(r"```json\s*(\{.*?\})\s*```", raw, re.DOTALL)
+    json_str = m.group(1) if m else raw
+    json_str = json_str.strip().lstrip("```").rstrip("```").strip()
+    return json.loads(json_str, strict=False)
+
+
+def _legacy_result(msgs) -> dict:
+    raw = None
+    for m in msgs:
+        if getattr(m, "role", "") != "assistant":
+            continue
+        raw = _legacy_message_text(m)
+        if raw:
+            break
+    return json.loads(raw.strip())
+
+
+# ---------- 입력 ----------
+def _message(i: int, role: str, text: str) -> Message:
+    return Message.model_validate({
+        "id": f"msg_{i}", "object": "thread.message", "created_at": 1_700_000_000 + i, "thread_id": "thread_x",
+        "role": role, "status": "completed", "run_id": "run_x" if role == "assistant" else None,
+        "assistant_id": "asst_x" if role == "assistant" else None, "attachments": [], "metadata": {},
+        "content": [{"type": "text", "text": {"value": text, "annotations": []}}],
+    })
+
+
+def _thread(text: str, turns: int = 10) -> List[Message]:
+    """messages.list(order=desc, limit=20) 결과: 세션을 이어 쓴 thread (최신 assistant 응답이 맨 앞)."""
+    msgs = []
+    for i in range(turns):
+        msgs.append(_message(2 * i, "user", f"{i + 1}. 전체적인 골격의 인상은 어떠한가요?에 대한 응답입니다."))
+        msgs.append(_message(2 * i + 1, "assistant", text))
+    return list(reversed(msgs))[:20]
+
+
+def cases() -> Dict[str, Dict[str, Callable[[], Any]]]:
+    diagnosis = json.dumps(DIAGNOSIS, ensure_ascii=False)
+    chat = json.dumps(CHAT, ensure_ascii=False)
+    fenced = f"```json\n{diagnosis}\n```"
+    listed = _thread(diagnosis)
+    newest = listed[:1]  # run_id + limit=1 로 받은 목록
+    return {
+        "extract+parse (diagnosis)": {
+            "legacy": lambda: _legacy_result(listed),
+            "fast": lambda: loads(latest_assistant_text(newest)),
+        },
+        "message_text": {
+            "legacy": lambda: _legacy_message_text(newest[0]),
+            "fast": lambda: message_text(newest[0]),
+        },
+        "json parse (diagnosis)": {
+            "legacy": lambda: json.loads(diagnosis),
+            "fast": lambda: loads(diagnosis),
+        },
+        "json parse (chat)": {
+            "legacy": lambda: json.loads(chat),
+            "fast": lambda: loads(chat),
+        },
+        "extract_json (code fence)": {
+            "legacy": lambda: _legacy_extract_json(fenced),
+            "fast": lambda: extract_json(fenced),
+        },
+    }
+
+
+def run(number: int, repeat: int) -> List[Dict[str, Any]]:
+    rows = []
+    for name, impls in cases().items():
+        assert impls["legacy"]() == impls["fast"](), name
+        us = {
+            impl: min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+            for impl, fn in impls.items()
+        }
+        rows.append({"case": name, "legacy_us": us["legacy"], "fast_us": us["fast"],
+                     "speedup": us["legacy"] / us["fast"]})
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Response text extraction / JSON parsing micro-benchmarks")
+    parser.add_argument("--number", type=int, default=5000, help="calls per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs (best is reported)")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    rows = run(args.number, args.repeat)
+    print(f"json decoder: {response_text.JSON_DECODER}")
+    print(f"{'case':<28} {'legacy us':>10} {'fast us':>10} {'speedup':>8}")
+    for r in rows:
+        print(f"{r['case']:<28} {r['legacy_us']:>10.2f} {r['fast_us']:>10.2f} {r['speedup']:>7.1f}x")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"decoder": response_text.JSON_DECODER, "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
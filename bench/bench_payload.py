@@ -0,0 +1,93 @@
+"""
+엔드포인트별 응답 본문 크기와 직렬화/압축 시간 비교 (앱/가짜 서버 없이 프로세스 안에서).
+
+- 직렬화: 표준 json(JSONResponse) vs orjson(ORJSONResponse). 둘 다 라우트와 같은 jsonable_encoder 결과를 렌더링
+- 압축: gzip(레벨별), brotli(설치돼 있으면) 의 크기와 시간
+- 전송: --kbps 회선(기본 400kbps, 느린 모바일)에서 본문 전송에 걸리는 시간 추정
+
+본문은 진단 템플릿(app/data/diagnosis_templates) 문단으로 만든 실제 길이의 한국어 텍스트라
+반복 문자열보다 압축률이 현실적이다.
+
+    python -m bench.bench_payload
+    python -m bench.bench_payload --kbps 1000 --number 2000
+"""
+import argparse
+import gzip
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.schemas.chat import ChatResponse
+from app.schemas.diagnosis import DiagnoseResponse
+from app.services.diagnosis_templates import BODY_TYPES, TEMPLATE_FIELDS, load_templates, merge
+from bench.fake_openai import CHAT, DIAGNOSIS_DELTA
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _content_draft() -> str:
+    """/create-content 초안 크기(수 KB 마크다운)를 흉내 낸다: 체형별 템플릿 문단을 섹션으로 이어 붙임."""
+    templates = load_templates()
+    lines = ["# 오늘의 스타일 추천", ""]
+    for body_type in BODY_TYPES:
+        lines += [f"## {body_type} 타입 코디", ""]
+        lines += [f"- {templates[body_type][field]}" for field in TEMPLATE_FIELDS]
+        lines.append("")
+    return "\n".join(lines)
+
+
+def payloads():
+    diagnosis = jsonable_encoder(DiagnoseResponse(**merge(DIAGNOSIS_DELTA)))
+    return {
+        "diagnosis": diagnosis,
+        "body-result": diagnosis,
+        "create-content": _content_draft(),
+        "chat": jsonable_encoder(ChatResponse(**CHAT)),
+    }
+
+
+def _us(fn, number: int, repeat: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Response payload size / serialization / compression benchmark")
+    parser.add_argument("--number", type=int, default=5000, help="calls per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs (best is reported)")
+    parser.add_argument("--kbps", type=float, default=400, help="link speed for the transfer time estimate")
+    args = parser.parse_args(argv)
+
+    codecs = [
+        ("gzip-1", lambda b: gzip.compress(b, compresslevel=1, mtime=0)),
+        ("gzip-6", lambda b: gzip.compress(b, compresslevel=6, mtime=0)),
+    ]
+    if brotli is not None:
+        codecs += [
+            ("br-4", lambda b: brotli.compress(b, quality=4)),
+            ("br-5", lambda b: brotli.compress(b, quality=5)),
+            ("br-11", lambda b: brotli.compress(b, quality=11)),
+        ]
+
+    def transfer_ms(size: int) -> float:
+        return size * 8 / args.kbps
+
+    print(f"transfer estimate at {args.kbps:g} kbps, brotli {'installed' if brotli is not None else 'not installed'}")
+    for endpoint, content in payloads().items():
+        body = ORJSONResponse(content).body
+        json_us = _us(lambda: JSONResponse(content).body, args.number, args.repeat)
+        orjson_us = _us(lambda: ORJSONResponse(content).body, args.number, args.repeat)
+        print(f"\n{endpoint}: serialize json {json_us:.1f}us, orjson {orjson_us:.1f}us")
+        print(f"  {'encoding':<9} {'bytes':>7} {'ratio':>6} {'cpu us':>8} {'transfer ms':>12}")
+        print(f"  {'identity':<9} {len(body):>7} {1:>6.2f} {0:>8.1f} {transfer_ms(len(body)):>12.1f}")
+        for name, fn in codecs:
+            size = len(fn(body))
+            cpu = _us(lambda: fn(body), max(1, args.number // 10), args.repeat)
+            print(f"  {name:<9} {size:>7} {size / len(body):>6.2f} {cpu:>8.1f} {transfer_ms(size):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+대기 thread 풀(STANDBY_THREADS_ENABLED) 켜기/끄기 비교.
+
+bench.run_bench 를 같은 조건으로 두 번 돌린다: 끄면 요청마다 create_and_run(thread 생성 + run),
+켜면 미리 만들어 둔 빈 thread 에 runs.create(메시지 추가 + run) 만 하고 thread 는 백그라운드에서 다시 채운다.
+가짜 서버의 thread 생성 지연(--thread-create-sec)이 요청 지연에서 빠지는지, 요청당 upstream 호출이 어떻게 바뀌는지 본다.
+
+    python -m bench.bench_standby --endpoints chat,diagnosis --requests 200 --thread-create-sec 0.3
+    python -m bench.bench_standby --env ASSISTANT_BACKEND=stream --json standby.json
+"""
+import json
+
+from bench import run_bench
+
+
+def main(argv=None):
+    parser = run_bench.build_parser()
+    parser.description = "Compare create_and_run with the standby thread pool against a fake OpenAI server"
+    parser.set_defaults(endpoints="chat,diagnosis", thread_create_sec=0.3)
+    parser.add_argument("--pool-size", type=int, default=0,
+                        help="STANDBY_THREADS_PER_ASSISTANT (default: --concurrency)")
+    args = parser.parse_args(argv)
+    pool_size = args.pool_size or args.concurrency
+    base_env = list(args.env)
+
+    results = {}
+    for label, env in (
+        ("create_and_run", ["STANDBY_THREADS_ENABLED=0"]),
+        ("standby", ["STANDBY_THREADS_ENABLED=1", f"STANDBY_THREADS_PER_ASSISTANT={pool_size}"]),
+    ):
+        args.env = base_env + env
+        print(f"== {label}")
+        rows = run_bench.run(args)
+        run_bench._print_table(rows)
+        results[label] = rows
+
+    print()
+    print(f"{'endpoint':<12} {'path':<15} {'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8} {'upstream/req':>12}")
+    for i, row in enumerate(results["create_and_run"]):
+        for label in results:
+            r = results[label][i]
+            print(f"{r['endpoint']:<12} {label:<15} {r['p50_ms']!s:>8} {r['p95_ms']!s:>8} {r['p99_ms']!s:>8} "
+                  f"{r['upstream_per_req']!s:>12}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+운영 서버 모드(python -m app.cli.serve)의 워커 수별 처리량/지연 곡선.
+
+bench.run_bench 를 워커 수만 바꿔 여러 번 돌린다. 가짜 서버의 run 시간을 짧게 두고 동시 요청을 많이 보내
+upstream 대기보다 앱의 CPU 작업(요청/응답 직렬화, 폴링 응답 파싱)이 병목이 되는 구간을 본다.
+가짜 서버도 같은 호스트의 CPU 를 쓰므로 코어 수가 워커 수 + 1 이상인 곳에서 돌려야 곡선이 의미 있다.
+
+    python -m bench.bench_workers --workers 1,2,4 --endpoints diagnosis,chat --requests 2000 --concurrency 200
+    python -m bench.bench_workers --json workers.json
+"""
+import json
+import os
+
+from bench import run_bench
+
+
+def _default_counts() -> str:
+    cpus = os.cpu_count() or 1
+    return ",".join(str(n) for n in sorted({1, 2, max(1, cpus // 2), max(1, cpus - 1)}))
+
+
+def main(argv=None):
+    parser = run_bench.build_parser()
+    parser.description = "Throughput/latency of python -m app.cli.serve by worker count against a fake OpenAI server"
+    parser.set_defaults(endpoints="diagnosis,chat", requests=1000, concurrency=100, run_sec=0.05, jitter=0.2)
+    parser.add_argument("--workers-list", default=_default_counts(),
+                        help="comma separated worker counts (default: 1, 2, half and all but one of the CPUs)")
+    args = parser.parse_args(argv)
+    counts = [int(n) for n in args.workers_list.split(",") if n.strip()]
+
+    results = {}
+    for workers in counts:
+        args.workers = workers
+        print(f"== {workers} worker(s)")
+        rows = run_bench.run(args)
+        run_bench._print_table(rows)
+        results[workers] = rows
+
+    print()
+    print(f"{'endpoint':<12} {'workers':>7} {'rps':>8} {'speedup':>7} {'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8}")
+    for i, row in enumerate(results[counts[0]]):
+        base = row["rps"] or 0
+        for workers in counts:
+            r = results[workers][i]
+            speedup = f"{r['rps'] / base:.2f}" if base and r["rps"] else "-"
+            print(f"{r['endpoint']:<12} {workers:>7} {r['rps']!s:>8} {speedup:>7} {r['p50_ms']!s:>8} "
+                  f"{r['p95_ms']!s:>8} {r['p99_ms']!s:>8}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
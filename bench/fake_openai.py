@@ -0,0 +1,394 @@
+"""
+로컬 벤치마크용 OpenAI Assistants/Responses API 대역 서버.
+
+앱을 OPENAI_BASE_URL=http://127.0.0.1:<port>/v1 로 띄우면 실제 OpenAI 대신 이 서버를 호출한다.
+run 소요 시간(로그정규 분포), run 실패율, HTTP 500 비율을 조절할 수 있고,
+엔드포인트별 호출 수를 GET /_stats 로 확인 / POST /_reset 으로 초기화한다.
+
+    python -m bench.fake_openai --port 9100 --run-sec 2 --jitter 0.3 --fail-rate 0.01
+"""
+import argparse
+import asyncio
+import email.parser
+import email.policy
+import json
+import math
+import random
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+DIAGNOSIS = {
+    "body_type": "스트레이트",
+    "type_description": "상체에 볼륨감이 있고 근육이 붙기 쉬운 입체적인 체형입니다. " * 4,
+    "detailed_features": "어깨가 넓고 직선적이며 허리 위치가 높습니다. " * 4,
+    "attraction_points": "탄탄하고 건강한 인상을 줍니다. " * 4,
+    "recommended_styles": "심플한 V넥, 정장 스타일의 재킷, 스트레이트 팬츠. " * 4,
+    "avoid_styles": "러플, 오버사이즈 니트, 과한 레이어드. " * 4,
+    "styling_fixes": "상체를 가볍게 보이도록 깊은 네크라인을 활용하세요. " * 4,
+    "styling_tips": "허리 라인을 정확히 잡아주는 아이템을 고르세요. " * 4,
+}
+CHAT = {
+    "isSuccess": True,
+    "selected": "두께감이 있고 육감적이다",
+    "message": "응답이 확인되었습니다.",
+    "nextQuestion": "2. 피부의 질감은 어떠한가요?",
+}
+DIAGNOSIS_DELTA = {
+    "body_type": "스트레이트",
+    "detailed_features": "상체에 볼륨이 있고 허리가 짧으며 어깨가 넓고 직선적입니다.",
+    "attraction_points": "탄탄한 어깨선이 단정한 인상을 줍니다.",
+    "styling_fixes": "상체 위주로 찌는 편이니 V넥으로 세로 라인을 만들어 주세요.",
+}
+CONTENT = "# 스타일 추천 초안\n\n" + "체형의 장점을 살리는 코디를 추천드립니다. 상의는 심플한 디자인을 고르세요.\n" * 40
+
+
+@dataclass
+class FakeConfig:
+    run_sec: float = 2.0        # run 소요 시간 중앙값
+    jitter: float = 0.3         # 로그정규 sigma (0 이면 고정)
+    fail_rate: float = 0.0      # run 이 failed 로 끝날 확률
+    http_error_rate: float = 0.0  # 아무 요청에나 500 을 돌려줄 확률
+    queued_frac: float = 0.1    # 소요 시간 중 queued 상태로 보이는 비율
+    stream_chunks: int = 20     # 스트리밍 시 텍스트를 몇 조각으로 나눌지
+    thread_create_sec: float = 0.0  # thread 생성(threads.create, create_and_run) 에 추가로 걸리는 시간
+    sec_per_char: float = 0.0   # 출력 글자당 추가 시간 (출력 토큰 생성 비용 모델, 0 이면 길이와 무관)
+
+
+def _output_text(response_format: Optional[Dict[str, Any]]) -> str:
+    name = None
+    if isinstance(response_format, dict):
+        name = (response_format.get("json_schema") or {}).get("name") or response_format.get("name")
+    if name == "BodyDiagnosisResult":
+        return json.dumps(DIAGNOSIS, ensure_ascii=False)
+    if name == "BodyDiagnosisDelta":
+        return json.dumps(DIAGNOSIS_DELTA, ensure_ascii=False)
+    if name == "BodyQuestionAnswer":
+        return json.dumps(CHAT, ensure_ascii=False)
+    return CONTENT
+
+
+def create_app(config: FakeConfig) -> FastAPI:
+    app = FastAPI()
+    calls: Counter = Counter()
+    threads: Dict[str, List[Dict[str, Any]]] = {}
+    runs: Dict[str, Dict[str, Any]] = {}
+    files: Dict[str, bytes] = {}
+    batches: Dict[str, Dict[str, Any]] = {}
+
+    def duration() -> float:
+        if config.jitter <= 0:
+            return config.run_sec
+        return random.lognormvariate(math.log(max(config.run_sec, 1e-3)), config.jitter)
+
+    def message(
+        thread_id: str, text: str, role: str = "assistant", message_id: Optional[str] = None,
+        run_id: Optional[str] = None,
+    ):
+        return {
+            "id": message_id or f"msg_{uuid.uuid4().hex[:12]}",
+            "object": "thread.message",
+            "thread_id": thread_id,
+            "role": role,
+            "run_id": run_id,
+            "created_at": int(time.time()),
+            "status": "completed",
+            "content": [{"type": "text", "text": {"value": text, "annotations": []}}],
+            "attachments": [],
+            "metadata": {},
+        }
+
+    def run_view(run: Dict[str, Any]) -> Dict[str, Any]:
+        elapsed = time.time() - run["started"]
+        if run.get("cancelled"):
+            status = "cancelled"
+        elif elapsed >= run["duration"]:
+            status = "failed" if run["fail"] else "completed"
+        elif elapsed < run["duration"] * config.queued_frac:
+            status = "queued"
+        else:
+            status = "in_progress"
+        if status == "completed" and not run.get("answered"):
+            run["answered"] = True
+            threads[run["thread_id"]].append(message(run["thread_id"], run["text"], run_id=run["id"]))
+        return {
+            "id": run["id"],
+            "object": "thread.run",
+            "thread_id": run["thread_id"],
+            "assistant_id": run["assistant_id"],
+            "status": status,
+            "created_at": int(run["started"]),
+            "last_error": {"code": "server_error", "message": "fake failure"} if status == "failed" else None,
+        }
+
+    def new_run(thread_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        run = {
+            "id": f"run_{uuid.uuid4().hex[:12]}",
+            "thread_id": thread_id,
+            "assistant_id": body.get("assistant_id"),
+            "started": time.time(),
+            "fail": random.random() < config.fail_rate,
+            "text": _output_text(body.get("response_format")),
+        }
+        run["duration"] = duration() + len(run["text"]) * config.sec_per_char
+        runs[run["id"]] = run
+        return run
+
+    def new_thread(messages: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        thread_id = f"thread_{uuid.uuid4().hex[:12]}"
+        threads[thread_id] = [message(thread_id, m.get("content", ""), role="user") for m in messages or []]
+        return {"id": thread_id, "object": "thread", "created_at": int(time.time()), "metadata": {}}
+
+    def sse(event: str, data: Any) -> str:
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    async def stream_run(run: Dict[str, Any]):
+        yield sse("thread.run.created", run_view(run))
+        await asyncio.sleep(run["duration"] * config.queued_frac)
+        message_id = f"msg_{uuid.uuid4().hex[:12]}"
+        yield sse("thread.message.created", {**message(run["thread_id"], "", message_id=message_id, run_id=run["id"]),
+                                             "content": [], "status": "in_progress"})
+        text = run["text"]
+        step = max(1, math.ceil(len(text) / config.stream_chunks))
+        pause = run["duration"] * (1 - config.queued_frac) / config.stream_chunks
+        for i in range(0, len(text), step):
+            if run.get("cancelled"):
+                break
+            await asyncio.sleep(pause)
+            yield sse("thread.message.delta", {
+                "id": message_id,
+                "object": "thread.message.delta",
+                "delta": {"content": [{"index": 0, "type": "text", "text": {"value": text[i:i + step]}}]},
+            })
+        run["started"] = 0  # 이후 retrieve 에서도 끝난 것으로 보이게
+        final = run_view(run)
+        if final["status"] == "completed":
+            run["answered"] = True
+            done = message(run["thread_id"], text, message_id=message_id, run_id=run["id"])
+            threads[run["thread_id"]].append(done)
+            yield sse("thread.message.completed", done)
+        yield sse(f"thread.run.{final['status']}", final)
+        yield "event: done\ndata: [DONE]\n\n"
+
+    @app.middleware("http")
+    async def inject_errors(request: Request, call_next):
+        if not request.url.path.startswith("/_") and random.random() < config.http_error_rate:
+            calls["http_500"] += 1
+            return JSONResponse(status_code=500, content={"error": {"message": "fake 500", "type": "server_error"}})
+        return await call_next(request)
+
+    @app.get("/_stats")
+    async def stats():
+        return dict(calls)
+
+    @app.post("/_reset")
+    async def reset():
+        calls.clear()
+        return {}
+
+    @app.post("/v1/threads")
+    async def create_thread(request: Request):
+        calls["threads.create"] += 1
+        body = await request.json() if await request.body() else {}
+        await asyncio.sleep(config.thread_create_sec)
+        return new_thread(body.get("messages"))
+
+    @app.delete("/v1/threads/{thread_id}")
+    async def delete_thread(thread_id: str):
+        calls["threads.delete"] += 1
+        threads.pop(thread_id, None)
+        return {"id": thread_id, "object": "thread.deleted", "deleted": True}
+
+    @app.post("/v1/threads/runs")
+    async def create_and_run(request: Request):
+        calls["threads.create_and_run"] += 1
+        body = await request.json()
+        await asyncio.sleep(config.thread_create_sec)
+        thread = new_thread((body.get("thread") or {}).get("messages"))
+        run = new_run(thread["id"], body)
+        if body.get("stream"):
+            return StreamingResponse(stream_run(run), media_type="text/event-stream")
+        return run_view(run)
+
+    @app.post("/v1/threads/{thread_id}/messages")
+    async def create_message(thread_id: str, request: Request):
+        calls["messages.create"] += 1
+        body = await request.json()
+        msg = message(thread_id, body.get("content", ""), role=body.get("role", "user"))
+        threads.setdefault(thread_id, []).append(msg)
+        return msg
+
+    @app.get("/v1/threads/{thread_id}/messages")
+    async def list_messages(thread_id: str, order: str = "desc", limit: int = 20, run_id: Optional[str] = None):
+        calls["messages.list"] += 1
+        data = [m for m in threads.get(thread_id, []) if run_id is None or m["run_id"] == run_id]
+        data = list(reversed(data)) if order == "desc" else list(data)
+        data = data[:limit]
+        return {"object": "list", "data": data, "first_id": None, "last_id": None, "has_more": False}
+
+    @app.post("/v1/threads/{thread_id}/runs")
+    async def create_run(thread_id: str, request: Request):
+        calls["runs.create"] += 1
+        body = await request.json()
+        threads.setdefault(thread_id, []).extend(
+            message(thread_id, m.get("content", ""), role="user") for m in body.get("additional_messages") or []
+        )
+        run = new_run(thread_id, body)
+        if body.get("stream"):
+            return StreamingResponse(stream_run(run), media_type="text/event-stream")
+        return run_view(run)
+
+    @app.get("/v1/threads/{thread_id}/runs/{run_id}")
+    async def retrieve_run(thread_id: str, run_id: str):
+        calls["runs.retrieve"] += 1
+        return run_view(runs[run_id])
+
+    @app.post("/v1/threads/{thread_id}/runs/{run_id}/cancel")
+    async def cancel_run(thread_id: str, run_id: str):
+        calls["runs.cancel"] += 1
+        runs[run_id]["cancelled"] = True
+        return run_view(runs[run_id])
+
+    @app.get("/v1/assistants/{assistant_id}")
+    async def retrieve_assistant(assistant_id: str):
+        calls["assistants.retrieve"] += 1
+        return {
+            "id": assistant_id, "object": "assistant", "created_at": 0, "name": assistant_id,
+            "model": "gpt-4o-mini", "instructions": "너는 골격 진단 및 패션 스타일리스트야.",
+            "tools": [], "temperature": 1.0, "top_p": 1.0,
+        }
+
+    @app.post("/v1/responses")
+    async def create_response(request: Request):
+        calls["responses.create"] += 1
+        body = await request.json()
+        fmt = (body.get("text") or {}).get("format")
+        await asyncio.sleep(duration() + len(_output_text(fmt)) * config.sec_per_char)
+        return {
+            "id": f"resp_{uuid.uuid4().hex[:12]}", "object": "response", "created_at": int(time.time()),
+            "model": body.get("model"), "status": "completed", "parallel_tool_calls": True,
+            "tool_choice": "auto", "tools": [],
+            "output": [{
+                "id": f"msg_{uuid.uuid4().hex[:12]}", "type": "message", "role": "assistant", "status": "completed",
+                "content": [{"type": "output_text", "text": _output_text(fmt), "annotations": []}],
+            }],
+        }
+
+    def file_object(file_id: str, purpose: str = "batch") -> Dict[str, Any]:
+        return {
+            "id": file_id, "object": "file", "bytes": len(files[file_id]), "created_at": int(time.time()),
+            "filename": f"{file_id}.jsonl", "purpose": purpose, "status": "processed",
+        }
+
+    @app.post("/v1/files")
+    async def create_file(request: Request):
+        calls["files.create"] += 1
+        # python-multipart 없이 email 파서로 multipart 본문을 푼다
+        raw = f"Content-Type: {request.headers['content-type']}\r\n\r\n".encode() + await request.body()
+        msg = email.parser.BytesParser(policy=email.policy.default).parsebytes(raw)
+        content, purpose = b"", "batch"
+        for part in msg.iter_parts():
+            if part.get_param("name", header="content-disposition") == "file":
+                content = part.get_payload(decode=True)
+            elif part.get_param("name", header="content-disposition") == "purpose":
+                purpose = part.get_content().strip()
+        file_id = f"file-{uuid.uuid4().hex[:12]}"
+        files[file_id] = content
+        return file_object(file_id, purpose)
+
+    @app.get("/v1/files/{file_id}/content")
+    async def file_content(file_id: str):
+        calls["files.content"] += 1
+        return PlainTextResponse(files[file_id].decode("utf-8"))
+
+    def batch_view(batch: Dict[str, Any]) -> Dict[str, Any]:
+        elapsed = time.time() - batch["started"]
+        total = len(batch["lines"])
+        status = "completed" if elapsed >= batch["duration"] else ("validating" if elapsed < 0.1 else "in_progress")
+        if status == "completed" and batch.get("output_file_id") is None:
+            out, err = [], []
+            for line in batch["lines"]:
+                req = json.loads(line)
+                if random.random() < config.fail_rate:
+                    err.append({"id": f"batch_req_{uuid.uuid4().hex[:8]}", "custom_id": req["custom_id"],
+                                "response": None, "error": {"code": "server_error", "message": "fake failure"}})
+                    continue
+                fmt = ((req.get("body") or {}).get("text") or {}).get("format")
+                out.append({"id": f"batch_req_{uuid.uuid4().hex[:8]}", "custom_id": req["custom_id"], "error": None,
+                            "response": {"status_code": 200, "request_id": uuid.uuid4().hex, "body": {
+                                "id": f"resp_{uuid.uuid4().hex[:12]}", "object": "response", "status": "completed",
+                                "output": [{"type": "message", "role": "assistant", "content": [
+                                    {"type": "output_text", "text": _output_text(fmt), "annotations": []}]}],
+                            }}})
+            for key, rows in (("output_file_id", out), ("error_file_id", err)):
+                if rows:
+                    file_id = f"file-{uuid.uuid4().hex[:12]}"
+                    files[file_id] = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows).encode()
+                    batch[key] = file_id
+            batch["failed"] = len(err)
+        done = total if status == "completed" else int(total * min(1.0, elapsed / batch["duration"]))
+        return {
+            "id": batch["id"], "object": "batch", "endpoint": batch["endpoint"], "input_file_id": batch["input_file_id"],
+            "completion_window": "24h", "status": status, "created_at": int(batch["started"]),
+            "output_file_id": batch.get("output_file_id"), "error_file_id": batch.get("error_file_id"),
+            "errors": None, "metadata": batch.get("metadata"),
+            "request_counts": {"total": total, "completed": done - batch.get("failed", 0),
+                               "failed": batch.get("failed", 0)},
+        }
+
+    @app.post("/v1/batches")
+    async def create_batch(request: Request):
+        calls["batches.create"] += 1
+        body = await request.json()
+        batch = {
+            "id": f"batch_{uuid.uuid4().hex[:12]}",
+            "endpoint": body["endpoint"],
+            "input_file_id": body["input_file_id"],
+            "metadata": body.get("metadata"),
+            "lines": [ln for ln in files[body["input_file_id"]].decode("utf-8").splitlines() if ln.strip()],
+            "started": time.time(),
+            "duration": duration() * 2,
+        }
+        batches[batch["id"]] = batch
+        return batch_view(batch)
+
+    @app.get("/v1/batches/{batch_id}")
+    async def retrieve_batch(batch_id: str):
+        calls["batches.retrieve"] += 1
+        return batch_view(batches[batch_id])
+
+    return app
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake OpenAI Assistants server for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--run-sec", type=float, default=FakeConfig.run_sec)
+    parser.add_argument("--jitter", type=float, default=FakeConfig.jitter)
+    parser.add_argument("--fail-rate", type=float, default=FakeConfig.fail_rate)
+    parser.add_argument("--http-error-rate", type=float, default=FakeConfig.http_error_rate)
+    parser.add_argument("--thread-create-sec", type=float, default=FakeConfig.thread_create_sec)
+    parser.add_argument("--sec-per-char", type=float, default=FakeConfig.sec_per_char)
+    args = parser.parse_args(argv)
+
+    config = FakeConfig(
+        run_sec=args.run_sec,
+        jitter=args.jitter,
+        fail_rate=args.fail_rate,
+        http_error_rate=args.http_error_rate,
+        thread_create_sec=args.thread_create_sec,
+        sec_per_char=args.sec_per_char,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
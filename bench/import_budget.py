@@ -0,0 +1,81 @@
+"""
+콜드 스타트 import 시간 점검.
+
+새 인터프리터에서 `python -X importtime -c "import app.main"` 을 여러 번 실행해
+app.main 의 누적 import 시간(중앙값)이 예산 안인지, 지연 import 대상(openai 등)이
+시작 시점에 불려오지 않는지 확인한다. 예산을 넘기면 종료 코드 1 (CI 에서 그대로 사용).
+
+    python -m bench.import_budget --budget-ms 600
+    python -m bench.import_budget --top 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 첫 요청 전까지 import 되면 안 되는 최상위 패키지
+DEFERRED = ("openai", "httpx", "dotenv")
+
+
+def measure(module: str, env: Dict[str, str]) -> List[Tuple[str, int, int]]:
+    """(모듈, self us, cumulative us) 목록. -X importtime 출력은 stderr 로 나온다."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr[-2000:])
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the cold-start import time of app.main")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "600")))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="show the slowest N modules (cumulative)")
+    parser.add_argument("--no-lambda", action="store_true", help="do not simulate the Lambda environment")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    if not args.no_lambda:
+        # Lambda 와 같은 조건: .env 미사용, 백그라운드 작업 큐 비활성
+        env.setdefault("AWS_LAMBDA_FUNCTION_NAME", "import-budget")
+        env.setdefault("OPENAI_PREWARM", "0")
+
+    measure(args.module, env)  # .pyc 생성용 1회
+    totals = []
+    rows: List[Tuple[str, int, int]] = []
+    for _ in range(args.runs):
+        rows = measure(args.module, env)
+        totals.append(next(c for name, _, c in rows if name == args.module) / 1000)
+    median_ms = statistics.median(totals)
+
+    print(f"{args.module}: median {median_ms:.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {self_us / 1000:7.1f} ms self  {name}")
+
+    failures = []
+    loaded = {name.split(".")[0] for name, _, _ in rows}
+    for pkg in DEFERRED:
+        if pkg in loaded:
+            failures.append(f"{pkg} is imported at startup (should be deferred to first use)")
+    if median_ms > args.budget_ms:
+        failures.append(f"import time {median_ms:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+    for f in failures:
+        print("FAIL:", f)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""
+/assistant/* 엔드포인트 부하 테스트.
+
+가짜 OpenAI 서버(bench.fake_openai)와 앱(uvicorn app.main:app)을 각각 별도 프로세스로 띄우고,
+엔드포인트별로 동시 요청을 보내 지연 시간(p50/p95/p99), RPS, 요청당 upstream 호출 수,
+앱 프로세스 메모리(RSS)를 측정한다.
+
+    python -m bench.run_bench --requests 200 --concurrency 20 --run-sec 1.5
+    python -m bench.run_bench --endpoints diagnosis,chat --fail-rate 0.05 --env ASSISTANT_BACKEND=stream
+    python -m bench.run_bench --json baseline.json
+
+기본적으로 결과 캐시/채팅 인덱스를 끄고 요청마다 입력을 바꿔서 매번 upstream 까지 가는 경로를 잰다.
+(--cache 를 주면 앱 기본 설정 그대로, --repeat 를 주면 모든 요청이 같은 입력)
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ANSWERS = [
+    "두께감이 있고 육감적이다",
+    "피부가 탄탄하고 쫀득한 느낌이다",
+    "근육이 붙기 쉽다",
+    "목이 약간 짧은 편이다",
+    "허리가 짧고 골반까지 직선적인 느낌이다",
+    "가슴이 높고 볼륨감이 있다",
+    "어깨가 넓고 직선적인 느낌이다",
+    "엉덩이 라인이 둥글고 볼륨감이 있다",
+    "팔이 단단하고 근육감이 있다",
+    "손이 작고 두께감이 있다",
+    "손목이 가늘고 둥근 편이다",
+    "허벅지가 단단하고 탄력 있다",
+    "무릎이 작고 매끈하다",
+    "얇은 니트가 잘 어울린다",
+    "상체가 먼저 찐다",
+]
+
+
+def _diagnosis_body(i: int, unique: bool) -> Dict[str, Any]:
+    answers = list(ANSWERS)
+    if unique:
+        answers[0] = f"{answers[0]} ({i})"
+    return {"answers": answers, "height": 164.5, "weight": 55.2, "gender": "여성"}
+
+
+def _chat_body(i: int, unique: bool) -> Dict[str, Any]:
+    answer = f"두께감이 있고, 육감적입니다. ({i})" if unique else "두께감이 있고, 육감적입니다."
+    return {"question": "1. 전체적인 골격의 인상은 어떠한가요?", "answer": answer}
+
+
+def _content_body(i: int, unique: bool) -> Dict[str, Any]:
+    return {
+        "name": f"사용자{i}" if unique else "전여진",
+        "body_type": "웨이브",
+        "height": 160,
+        "weight": 40,
+        "body_feature": "체형이 너무 얇다",
+        "recommendation_items": ["상의", "하의"],
+        "recommended_situation": "IR발표",
+        "recommended_style": "IR 발표에 어울리는 스타일",
+        "avoid_style": "스트릿,힙한 스타일",
+        "budget": "20만원",
+    }
+
+
+# 이름 → (경로, 요청 본문 생성기)
+ENDPOINTS: Dict[str, tuple] = {
+    "diagnosis": ("/assistant/diagnosis", _diagnosis_body),
+    "body-result": ("/assistant/body-result", _diagnosis_body),
+    "chat": ("/assistant/chat", _chat_body),
+    "create-content": ("/assistant/create-content", _content_body),
+    "create-content-stream": ("/assistant/create-content/stream", _content_body),
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _rss_kb(pid: int) -> Dict[str, Optional[int]]:
+    """리눅스 /proc 기준 현재/최대 RSS(kB). 다른 OS 에서는 None."""
+    out: Dict[str, Optional[int]] = {"rss_kb": None, "peak_rss_kb": None}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    out["rss_kb"] = int(line.split()[1])
+                elif line.startswith("VmHWM:"):
+                    out["peak_rss_kb"] = int(line.split()[1])
+    except OSError:
+        pass
+    return out
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    k = (len(values) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def _wait_ready(url: str, proc: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"process exited early ({proc.returncode}): {url}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server not ready: {url}")
+
+
+def _start(cmd: List[str], env: Dict[str, str], ready_url: str) -> subprocess.Popen:
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env)
+    try:
+        _wait_ready(ready_url, proc)
+    except Exception:
+        proc.kill()
+        raise
+    return proc
+
+
+async def _one(client: httpx.AsyncClient, name: str, path: str, body: Dict[str, Any], poll_sec: float) -> Dict[str, Any]:
+    """요청 하나를 보내고 (지연 시간, 상태 코드, 첫 바이트 시간, 후속 폴링 수) 를 반환."""
+    started = time.perf_counter()
+    ttfb = None
+    polls = 0
+    if name == "create-content-stream":
+        async with client.stream("POST", path, json=body) as resp:
+            status = resp.status_code
+            async for chunk in resp.aiter_raw():
+                if ttfb is None and chunk:
+                    ttfb = time.perf_counter() - started
+                if b"event: error" in chunk:
+                    status = 599  # 스트림 도중 실패
+    else:
+        resp = await client.post(path, json=body)
+        status = resp.status_code
+        # 202 면 결과가 나올 때까지 클라이언트처럼 폴링
+        job_id = resp.json().get("job_id") if status == 202 else None
+        while status == 202:
+            await asyncio.sleep(poll_sec)
+            polls += 1
+            resp = await client.get("/assistant/run-result", params={"job_id": job_id})
+            status = resp.status_code
+            if status == 425:
+                status = 202
+    return {"latency": time.perf_counter() - started, "status": status, "ttfb": ttfb, "polls": polls}
+
+
+async def _load(
+    base_url: str,
+    name: str,
+    requests: int,
+    concurrency: int,
+    unique: bool,
+    poll_sec: float,
+    offset: int = 0,
+) -> Dict[str, Any]:
+    path, make_body = ENDPOINTS[name]
+    sem = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        async def run(i: int):
+            async with sem:
+                try:
+                    return await _one(client, name, path, make_body(offset + i, unique), poll_sec)
+                except httpx.HTTPError as e:
+                    return {"latency": None, "status": type(e).__name__, "ttfb": None, "polls": 0}
+
+        started = time.perf_counter()
+        samples = await asyncio.gather(*(run(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+    return {"samples": samples, "elapsed": elapsed}
+
+
+def _summarize(name: str, load: Dict[str, Any], upstream: Dict[str, int], mem: Dict[str, Any]) -> Dict[str, Any]:
+    samples = load["samples"]
+    ok = [s["latency"] for s in samples if s["status"] == 200]
+    ttfb = [s["ttfb"] for s in samples if s["status"] == 200 and s["ttfb"] is not None]
+    statuses: Dict[str, int] = {}
+    for s in samples:
+        statuses[str(s["status"])] = statuses.get(str(s["status"]), 0) + 1
+    n = len(samples)
+    ms = lambda v: round(v * 1000, 1) if v is not None else None  # noqa: E731
+    return {
+        "endpoint": name,
+        "requests": n,
+        "ok": len(ok),
+        "statuses": statuses,
+        "rps": round(len(ok) / load["elapsed"], 2) if load["elapsed"] else None,
+        "p50_ms": ms(_percentile(ok, 0.5)),
+        "p95_ms": ms(_percentile(ok, 0.95)),
+        "p99_ms": ms(_percentile(ok, 0.99)),
+        "max_ms": ms(max(ok)) if ok else None,
+        "ttfb_p50_ms": ms(_percentile(ttfb, 0.5)),
+        "client_polls_per_req": round(sum(s["polls"] for s in samples) / n, 2) if n else 0,
+        "upstream_per_req": round(sum(v for k, v in upstream.items() if k != "http_500") / n, 2) if n else 0,
+        "upstream": {k: round(v / n, 2) for k, v in sorted(upstream.items())} if n else {},
+        **mem,
+    }
+
+
+def _print_table(rows: List[Dict[str, Any]]) -> None:
+    cols = [
+        ("endpoint", 22), ("ok", 5), ("requests", 8), ("rps", 7), ("p50_ms", 8), ("p95_ms", 8),
+        ("p99_ms", 8), ("ttfb_p50_ms", 11), ("upstream_per_req", 16), ("rss_kb", 8), ("rss_delta_kb", 12),
+    ]
+    print(" ".join(c.rjust(w) for c, w in cols))
+    for r in rows:
+        print(" ".join(str(r.get(c) if r.get(c) is not None else "-").rjust(w) for c, w in cols))
+    for r in rows:
+        print(f"  {r['endpoint']}: statuses={r['statuses']} upstream/req={r['upstream']}")
+
+
+def _env_pairs(values: List[str]) -> Dict[str, str]:
+    out = {}
+    for v in values:
+        key, _, val = v.partition("=")
+        out[key] = val
+    return out
+
+
+def run(args: argparse.Namespace, on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+    fake_port = args.fake_port or _free_port()
+    app_port = _free_port()
+    fake_url = f"http://127.0.0.1:{fake_port}"
+    app_url = f"http://127.0.0.1:{app_port}"
+    tmpdir = tempfile.mkdtemp(prefix="bench-")
+
+    env = dict(os.environ)
+    env.update({
+        "OPENAI_BASE_URL": f"{fake_url}/v1",
+        "OPENAI_API_KEY": env.get("OPENAI_API_KEY") or "bench",
+        "OPENAI_BODY_ASSISTANT_ID": "asst_bench_body",
+        "OPENAI_STYLE_ASSISTANT_ID": "asst_bench_style",
+        "OPENAI_CHAT_ASSISTANT_ID": "asst_bench_chat",
+        "JOB_STORE_PATH": os.path.join(tmpdir, "jobs.sqlite3"),
+        "PYTHONPATH": ROOT + os.pathsep + env.get("PYTHONPATH", ""),
+    })
+    if not args.cache:
+        env.update({"RESULT_CACHE_BACKEND": "none", "CHAT_INDEX_ENABLED": "0"})
+    if args.workers:
+        # 워커끼리 공유하는 SQLite 파일도 임시 디렉터리에
+        env.update({
+            "RESULT_CACHE_URL": os.path.join(tmpdir, "result_cache.sqlite3"),
+            "CHAT_SESSION_PATH": os.path.join(tmpdir, "chat_sessions.sqlite3"),
+        })
+    env.update(_env_pairs(args.env))
+
+    procs = []
+    try:
+        if not args.fake_port:
+            procs.append(_start(
+                [sys.executable, "-m", "bench.fake_openai", "--port", str(fake_port),
+                 "--run-sec", str(args.run_sec), "--jitter", str(args.jitter),
+                 "--fail-rate", str(args.fail_rate), "--http-error-rate", str(args.http_error_rate),
+                 "--thread-create-sec", str(args.thread_create_sec), "--sec-per-char", str(args.sec_per_char)],
+                env, f"{fake_url}/_stats",
+            ))
+        if args.workers:
+            # 운영 서버 모드 (워커 프로세스 여러 개). RSS 는 감독 프로세스 것만 잡힌다
+            app_cmd = [sys.executable, "-m", "app.cli.serve", "--host", "127.0.0.1", "--port", str(app_port),
+                       "--workers", str(args.workers), "--log-level", "warning"]
+        else:
+            app_cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(app_port), "--log-level", "warning"]
+        app_proc = _start(app_cmd + list(args.app_arg), env, f"{app_url}/openapi.json")
+        procs.append(app_proc)
+
+        rows = []
+        for name in args.endpoints.split(","):
+            name = name.strip()
+            if name not in ENDPOINTS:
+                raise SystemExit(f"unknown endpoint: {name} (choose from {', '.join(ENDPOINTS)})")
+            unique = not args.repeat
+            # 워밍업: 커넥션/폴링 이력 등을 채운 뒤 측정
+            if args.warmup:
+                asyncio.run(_load(app_url, name, args.warmup, args.concurrency, unique, args.poll_sec, offset=10**6))
+            httpx.post(f"{fake_url}/_reset")
+            mem_before = _rss_kb(app_proc.pid)
+            load = asyncio.run(_load(app_url, name, args.requests, args.concurrency, unique, args.poll_sec))
+            upstream = httpx.get(f"{fake_url}/_stats").json()
+            mem_after = _rss_kb(app_proc.pid)
+            delta = None
+            if mem_after["rss_kb"] is not None and mem_before["rss_kb"] is not None:
+                delta = mem_after["rss_kb"] - mem_before["rss_kb"]
+            row = _summarize(name, load, upstream, {**mem_after, "rss_delta_kb": delta})
+            rows.append(row)
+            if on_result:
+                on_result(row)
+        return rows
+    finally:
+        for p in reversed(procs):
+            p.terminate()
+            try:
+                p.wait(10)
+            except subprocess.TimeoutExpired:
+                p.kill()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Load-test /assistant/* against a fake OpenAI server")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="comma separated: " + ", ".join(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=100, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=5, help="unmeasured requests per endpoint before measuring")
+    parser.add_argument("--run-sec", type=float, default=1.0, help="fake run duration (median)")
+    parser.add_argument("--jitter", type=float, default=0.3, help="lognormal sigma of run duration")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of runs ending as failed")
+    parser.add_argument("--http-error-rate", type=float, default=0.0, help="fraction of upstream calls answered 500")
+    parser.add_argument("--thread-create-sec", type=float, default=0.0,
+                        help="extra fake latency of thread creation (threads.create / create_and_run)")
+    parser.add_argument("--sec-per-char", type=float, default=0.0,
+                        help="extra fake run time per output character (models output-token cost)")
+    parser.add_argument("--fake-port", type=int, default=0, help="use an already running fake server")
+    parser.add_argument("--poll-sec", type=float, default=1.0, help="client polling interval after 202")
+    parser.add_argument("--cache", action="store_true", help="keep the app's result cache / chat index enabled")
+    parser.add_argument("--repeat", action="store_true", help="send identical payloads instead of unique ones")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="extra app env var")
+    parser.add_argument("--app-arg", action="append", default=[], help="extra uvicorn argument")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="run the app with python -m app.cli.serve and this many workers (0 = plain uvicorn)")
+    parser.add_argument("--json", help="write results to this file")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    rows = run(args)
+    _print_table(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": rows}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+import os
+
+# app 모듈은 import 시점에 환경변수를 읽으므로 테스트 수집 전에 기본값을 정해 둔다
+os.environ.setdefault("SKIP_DOTENV", "1")  # 개발자 .env (실제 키/assistant id) 를 읽지 않음
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("OPENAI_PREWARM", "0")
+os.environ.setdefault("JOB_QUEUE_ENABLED", "0")
+os.environ.setdefault("TIMING_LOG_ENABLED", "0")
+os.environ.setdefault("OPENAI_BODY_ASSISTANT_ID", "asst_body")
+os.environ.setdefault("OPENAI_STYLE_ASSISTANT_ID", "asst_style")
+os.environ.setdefault("OPENAI_CHAT_ASSISTANT_ID", "asst_chat")
+# 가짜 서버의 run 은 수십 ms 안에 끝나므로 폴링 간격도 그에 맞춰 줄인다
+os.environ.setdefault("POLL_FIRST_DELAY_SEC", "0.01")
+os.environ.setdefault("POLL_MIN_INTERVAL_SEC", "0.01")
+os.environ.setdefault("POLL_MAX_INTERVAL_SEC", "0.05")
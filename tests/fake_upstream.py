@@ -0,0 +1,43 @@
+"""
+테스트용 upstream: bench/fake_openai.py 의 가짜 서버를 네트워크 없이(ASGI 전송) 현재 루프의 OpenAI 클라이언트에 연결한다.
+
+    async def main():
+        fake = use_fake_openai(run_sec=0.02)
+        ...
+        assert (await upstream_calls())["threads.create_and_run"] == 1
+"""
+import asyncio
+from typing import Any, Dict
+
+import httpx
+from fastapi import FastAPI
+from openai import AsyncOpenAI
+
+from app.services import openai_client
+from bench.fake_openai import FakeConfig, create_app
+
+
+def use_fake_openai(**config: Any) -> FastAPI:
+    """현재 이벤트 루프의 get_async_client() 가 가짜 서버를 호출하도록 바꾸고 그 앱을 반환."""
+    fake = create_app(FakeConfig(**{"run_sec": 0.02, "jitter": 0.0, **config}))
+    openai_client._clients[asyncio.get_running_loop()] = AsyncOpenAI(
+        api_key="sk-test",
+        base_url="http://fake-openai/v1",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake), base_url="http://fake-openai"),
+    )
+    return fake
+
+
+async def upstream_calls() -> Dict[str, int]:
+    """가짜 서버가 받은 엔드포인트별 호출 수 (GET /_stats)."""
+    client = openai_client.get_async_client()
+    response = await client._client.get("http://fake-openai/_stats")
+    return response.json()
+
+
+def app_client() -> httpx.AsyncClient:
+    """app.main 의 FastAPI 앱을 같은 루프에서 호출하는 클라이언트 (가짜 upstream 과 같은 루프를 공유해야 함)."""
+    from app.main import app
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver")
@@ -0,0 +1,67 @@
+import asyncio
+import json
+
+import pytest
+
+from app.services.assistant_backend import BACKENDS, AssistantBackend, get_backend
+from app.services.assistant_service import CHAT_RESPONSE_FORMAT
+from bench.fake_openai import CHAT
+from tests.fake_upstream import upstream_calls, use_fake_openai
+
+
+@pytest.mark.parametrize("name", ["poll", "stream", "responses"])
+def test_backend_returns_final_text_and_continues_conversation(name):
+    backend = BACKENDS[name]
+
+    async def main():
+        use_fake_openai()
+        text, handle = await backend.run_turn("asst_chat", "1번 질문", response_format=CHAT_RESPONSE_FORMAT, timeout_sec=5)
+        _, next_handle = await backend.run_turn(
+            "asst_chat", "2번 질문", conversation=handle, response_format=CHAT_RESPONSE_FORMAT, timeout_sec=5
+        )
+        return text, handle, next_handle, await upstream_calls()
+
+    text, handle, next_handle, calls = asyncio.run(main())
+    assert json.loads(text) == CHAT
+    if name == "responses":
+        assert calls["responses.create"] == 2
+        assert next_handle != handle
+    else:
+        # 두 번째 턴은 같은 thread 에 새 메시지만 보낸다
+        assert next_handle == handle
+        assert calls["threads.create_and_run"] == 1
+
+
+def test_stream_backend_needs_no_polling():
+    async def main():
+        use_fake_openai()
+        await BACKENDS["stream"].run("asst_chat", "질문", response_format=CHAT_RESPONSE_FORMAT, timeout_sec=5)
+        return await upstream_calls()
+
+    calls = asyncio.run(main())
+    assert "runs.retrieve" not in calls
+    assert "messages.list" not in calls
+
+
+def test_get_backend_prefers_endpoint_setting(monkeypatch):
+    monkeypatch.setenv("ASSISTANT_BACKEND", "stream")
+    monkeypatch.setenv("ASSISTANT_BACKEND_CHAT", "responses")
+    assert get_backend("chat").name == "responses"
+    assert get_backend("diagnosis").name == "stream"
+    monkeypatch.setenv("ASSISTANT_BACKEND", "grpc")
+    with pytest.raises(ValueError):
+        get_backend("diagnosis")
+
+
+def test_default_backend_is_polling(monkeypatch):
+    monkeypatch.delenv("ASSISTANT_BACKEND", raising=False)
+    monkeypatch.delenv("ASSISTANT_BACKEND_CONTENT", raising=False)
+    assert get_backend("content").name == "poll"
+
+
+def test_incomplete_backend_fails_at_construction():
+    class Incomplete(AssistantBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
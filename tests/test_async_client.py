@@ -0,0 +1,39 @@
+import asyncio
+
+from app.services import openai_client
+from app.services.assistant_service import diagnose_body_type_with_assistant_async
+from app.services.openai_client import get_async_client, run_sync
+from bench.fake_openai import DIAGNOSIS
+from tests.fake_upstream import upstream_calls, use_fake_openai
+
+ANSWERS = ["두께감이 있고 육감적이다"] * 17
+
+
+def test_client_is_reused_within_a_loop_and_separate_per_loop():
+    async def clients():
+        return get_async_client(), get_async_client()
+
+    first, again = asyncio.run(clients())
+    assert first is again
+    other, _ = asyncio.run(clients())
+    assert other is not first
+
+
+def test_run_sync_reuses_one_background_loop():
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    assert run_sync(current_loop()) is run_sync(current_loop())
+    assert run_sync(current_loop()) is openai_client._sync_loop
+
+
+def test_async_diagnosis_runs_through_upstream_and_parses_json():
+    async def main():
+        use_fake_openai()
+        result = await diagnose_body_type_with_assistant_async(ANSWERS, 171.3, 60.2, "여성", use_cache=False)
+        return result, await upstream_calls()
+
+    result, calls = asyncio.run(main())
+    assert result == DIAGNOSIS
+    assert calls["threads.create_and_run"] == 1
+    assert calls["messages.list"] == 1
@@ -0,0 +1,89 @@
+import asyncio
+import json
+
+from app.services import batch_diagnosis
+from app.services.batch_diagnosis import (
+    BatchStore, collect_openai_batch, parse_jsonl, result_line, run_batch, submit_openai_batch,
+)
+from bench.fake_openai import DIAGNOSIS
+from tests.fake_upstream import app_client, upstream_calls, use_fake_openai
+
+
+def _record(**extra):
+    return json.dumps({"answers": ["일괄 진단"] * 17, "height": 165, "weight": 55, "gender": "여성", **extra},
+                      ensure_ascii=False)
+
+
+def test_parse_jsonl_keeps_ids_and_isolates_bad_lines():
+    rows = list(parse_jsonl([_record(id="a"), "", "{not json", _record(), json.dumps({"answers": []})]))
+    assert [r[0] for r in rows] == ["a", "3", "4", "5"]
+    assert rows[0][1]["height"] == 165.0 and rows[0][2] is None
+    assert rows[1][1] is None and rows[1][2].startswith("invalid record")
+    assert rows[3][2].startswith("invalid record")
+
+
+def test_result_line_shapes():
+    assert json.loads(result_line("1", {"body_type": "웨이브"})) == {"id": "1", "ok": True, "result": {"body_type": "웨이브"}}
+    assert json.loads(result_line("2", error="boom")) == {"id": "2", "ok": False, "error": "boom"}
+
+
+def _run(lines, **kwargs):
+    async def main():
+        use_fake_openai()
+        out = [json.loads(line) async for line in run_batch(parse_jsonl(lines), **kwargs)]
+        return out, await upstream_calls()
+
+    return asyncio.run(main())
+
+
+def test_batch_bypasses_cache_and_skips_done_items():
+    saved = {}
+    out, calls = _run(
+        [_record(id="a"), _record(id="b"), _record(id="c"), "oops"],
+        concurrency=2,
+        done={"c": {"body_type": "내추럴"}},
+        on_success=lambda item_id, result: saved.setdefault(item_id, result),
+    )
+    by_id = {row["id"]: row for row in out}
+    assert by_id["a"]["result"] == DIAGNOSIS and by_id["b"]["result"] == DIAGNOSIS
+    assert by_id["c"]["result"] == {"body_type": "내추럴"}
+    assert by_id["4"]["ok"] is False
+    assert set(saved) == {"a", "b"}
+    # 같은 입력이어도 기본은 캐시/병합 없이 항목마다 assistant 호출
+    assert calls["threads.create_and_run"] == 2
+
+
+def test_batch_can_reuse_cache():
+    out, calls = _run([_record(id="a"), _record(id="b")], concurrency=1, use_cache=True)
+    assert [row["ok"] for row in out] == [True, True]
+    assert calls.get("threads.create_and_run", 0) <= 1
+
+
+def test_http_batch_resumes_with_batch_id(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_diagnosis, "_store", BatchStore(str(tmp_path / "batch.sqlite3")))
+    body = "\n".join([_record(id="a"), _record(id="b")])
+
+    async def main():
+        use_fake_openai()
+        async with app_client() as client:
+            first = await client.post("/assistant/diagnosis/batch", content=body)
+            batch_id = first.headers["x-batch-id"]
+            second = await client.post("/assistant/diagnosis/batch", params={"batch_id": batch_id}, content=body)
+        return first, second, await upstream_calls()
+
+    first, second, calls = asyncio.run(main())
+    assert first.headers["content-type"] == "application/x-ndjson"
+    assert len(first.text.splitlines()) == 2
+    assert sorted(json.loads(line)["id"] for line in second.text.splitlines()) == ["a", "b"]
+    assert calls["threads.create_and_run"] == 2
+
+
+def test_openai_batch_api_round_trip():
+    async def main():
+        use_fake_openai()
+        batch_id = await submit_openai_batch([("a", json.loads(_record())), ("b", json.loads(_record()))])
+        return [json.loads(line) async for line in collect_openai_batch(batch_id, poll_sec=0.02)]
+
+    out = asyncio.run(main())
+    assert sorted(row["id"] for row in out) == ["a", "b"]
+    assert all(row["ok"] and row["result"] == DIAGNOSIS for row in out)
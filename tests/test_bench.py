@@ -0,0 +1,68 @@
+import time
+
+import pytest
+from starlette.testclient import TestClient
+
+from bench.fake_openai import FakeConfig, create_app
+from bench.run_bench import _percentile, _summarize
+
+
+def _client(**config) -> TestClient:
+    return TestClient(create_app(FakeConfig(**{"run_sec": 0.05, "jitter": 0.0, **config})))
+
+
+def test_fake_run_progresses_to_completed_with_answer():
+    client = _client(queued_frac=0.5)
+    run = client.post("/v1/threads/runs", json={
+        "assistant_id": "asst", "thread": {"messages": [{"role": "user", "content": "q"}]},
+    }).json()
+    assert run["status"] == "queued"
+    time.sleep(0.06)
+    path = f"/v1/threads/{run['thread_id']}/runs/{run['id']}"
+    assert client.get(path).json()["status"] == "completed"
+    messages = client.get(f"/v1/threads/{run['thread_id']}/messages", params={"run_id": run["id"]}).json()["data"]
+    assert [m["role"] for m in messages] == ["assistant"]
+    assert client.get("/_stats").json() == {"threads.create_and_run": 1, "runs.retrieve": 1, "messages.list": 1}
+
+
+def test_fake_run_can_be_cancelled_and_fail():
+    client = _client(run_sec=10)
+    run = client.post("/v1/threads/runs", json={"assistant_id": "asst", "thread": {}}).json()
+    client.post(f"/v1/threads/{run['thread_id']}/runs/{run['id']}/cancel")
+    assert client.get(f"/v1/threads/{run['thread_id']}/runs/{run['id']}").json()["status"] == "cancelled"
+
+    client = _client(run_sec=0.0, fail_rate=1.0)
+    run = client.post("/v1/threads/runs", json={"assistant_id": "asst", "thread": {}}).json()
+    view = client.get(f"/v1/threads/{run['thread_id']}/runs/{run['id']}").json()
+    assert view["status"] == "failed"
+    assert view["last_error"]["code"] == "server_error"
+
+
+def test_fake_injects_http_errors_but_not_on_control_endpoints():
+    client = _client(http_error_rate=1.0)
+    assert client.post("/v1/threads", json={}).status_code == 500
+    assert client.get("/_stats").status_code == 200
+    client.post("/_reset")
+    assert client.get("/_stats").json() == {}
+
+
+def test_percentile_interpolates():
+    assert _percentile([], 0.5) is None
+    assert _percentile([3.0, 1.0, 2.0], 0.5) == 2.0
+    assert _percentile([1.0, 2.0], 0.5) == pytest.approx(1.5)
+    assert _percentile([1.0, 2.0, 3.0, 4.0, 5.0], 0.99) == pytest.approx(4.96)
+
+
+def test_summary_counts_only_successful_latencies():
+    samples = [
+        {"latency": 0.1, "status": 200, "ttfb": None, "polls": 0},
+        {"latency": 0.3, "status": 200, "ttfb": None, "polls": 2},
+        {"latency": None, "status": "ReadTimeout", "ttfb": None, "polls": 0},
+        {"latency": 0.2, "status": 503, "ttfb": None, "polls": 0},
+    ]
+    row = _summarize("diagnosis", {"samples": samples, "elapsed": 1.0}, {"runs.retrieve": 8, "http_500": 4}, {})
+    assert row["ok"] == 2
+    assert row["statuses"] == {"200": 2, "ReadTimeout": 1, "503": 1}
+    assert row["p50_ms"] == pytest.approx(200.0)
+    assert row["client_polls_per_req"] == 0.5
+    assert row["upstream_per_req"] == 2.0
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from app.api import assistant as assistant_api
+from app.services import assistant_service
+from app.services.body_type_classifier import BodyTypeClassifier, body_type_classifier
+from app.services.diagnosis_templates import load_templates
+from tests.fake_upstream import app_client, upstream_calls, use_fake_openai
+
+STRAIGHT_ANSWERS = ["근육이 잘 붙고 탄탄하다", "상체가 먼저 찐다", "허리가 짧다", "목이 짧은 편", "두께감이 있다"]
+
+
+def _classifier():
+    rules = [
+        {"pattern": "탄탄(?!하지않)", "weights": [1, 0]},
+        {"pattern": "부드럽", "weights": [0, 1]},
+    ]
+    return BodyTypeClassifier(["A", "B"], rules, version="test")
+
+
+def test_scores_and_confidence():
+    guess = _classifier().classify(["탄탄해요!", "탄 탄", "부드럽다"])
+    assert guess.body_type == "A"
+    assert guess.scores == {"A": 2.0, "B": 1.0}
+    assert guess.confidence == pytest.approx(1 / 3, abs=1e-4)
+
+
+def test_negation_and_answer_boundaries():
+    classifier = _classifier()
+    assert classifier.classify(["탄탄하지 않다"]).body_type is None
+    # 단서는 응답 경계를 넘지 않는다
+    assert classifier.classify(["탄", "탄"]) == (None, 0.0, {"A": 0.0, "B": 0.0})
+
+
+def test_confident_threshold_and_rule_validation():
+    classifier = _classifier()
+    assert classifier.confident(["탄탄"], 0.6).body_type == "A"
+    assert classifier.confident(["탄탄", "부드럽"], 0.6) is None
+    with pytest.raises(ValueError, match="expected 2 weights"):
+        BodyTypeClassifier(["A", "B"], [{"pattern": "x", "weights": [1]}])
+
+
+def test_shipped_rules_recognise_a_clear_straight_profile():
+    guess = body_type_classifier.confident(STRAIGHT_ANSWERS)
+    assert guess is not None and guess.body_type == "스트레이트"
+
+
+def test_skip_fast_path_answers_without_upstream(monkeypatch):
+    monkeypatch.setattr(assistant_service, "BODY_TYPE_FAST_PATH", "skip")
+
+    async def main():
+        use_fake_openai()
+        data = await assistant_service.diagnose_body_type_with_assistant_async(STRAIGHT_ANSWERS, 165, 55, "여성")
+        return data, await upstream_calls()
+
+    data, calls = asyncio.run(main())
+    assert data["body_type"] == "스트레이트"
+    assert data["type_description"] == load_templates()["스트레이트"]["type_description"]
+    assert calls.get("threads.create_and_run", 0) == 0
+
+
+def test_fallback_replaces_upstream_failure(monkeypatch):
+    monkeypatch.setattr(assistant_api, "BODY_TYPE_FALLBACK_ENABLED", True)
+    payload = {"answers": STRAIGHT_ANSWERS + ["대체 응답"], "height": 165, "weight": 55, "gender": "여성"}
+
+    async def main():
+        use_fake_openai(fail_rate=1.0)
+        async with app_client() as client:
+            fallback = await client.post("/assistant/diagnosis", json=payload)
+            # 확신도가 낮으면 대체 응답 없이 원래 오류 그대로
+            with pytest.raises(RuntimeError, match="status=failed"):
+                await client.post("/assistant/diagnosis", json={**payload, "answers": ["잘 모르겠다"]})
+        return fallback
+
+    fallback = asyncio.run(main())
+    assert fallback.status_code == 200
+    assert fallback.json()["body_type"] == "스트레이트"
+    assert fallback.headers["X-Diagnosis-Fallback"] == body_type_classifier.version
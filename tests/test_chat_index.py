@@ -0,0 +1,71 @@
+import json
+
+from app.services.chat_index import ChatAnswerIndex, normalize_text, polarity_differs
+
+QUESTION = "1. 근육이 붙기 쉬운 편인가요?"
+RESPONSE = {"isSuccess": True, "selected": "근육이 잘 붙는다", "message": "확인되었습니다.", "nextQuestion": "2. 다음 질문"}
+
+
+def _index(**kwargs) -> ChatAnswerIndex:
+    index = ChatAnswerIndex(**kwargs)
+    index.add(QUESTION, "근육이 잘 붙는다", RESPONSE)
+    index.add(QUESTION, "근육이 잘 붙지 않는다", {**RESPONSE, "selected": "근육이 잘 붙지 않는다"})
+    return index
+
+
+def test_normalization_ignores_spacing_punctuation_and_politeness():
+    assert normalize_text(" 근육이 잘 붙습니다. ") == normalize_text("근육이잘붙다")
+    assert normalize_text("육감적입니다") == normalize_text("육감적이다")
+
+
+def test_exact_match_returns_copy_of_stored_response():
+    index = _index()
+    hit = index.lookup(QUESTION, "근육이 잘 붙는다!")
+    assert hit == RESPONSE
+    hit["selected"] = "changed"
+    assert index.lookup(QUESTION, "근육이 잘 붙는다")["selected"] == "근육이 잘 붙는다"
+    assert index.lookup("없는 질문", "근육이 잘 붙는다") is None
+
+
+def test_fuzzy_match_is_off_by_default():
+    assert _index().lookup(QUESTION, "근육이 꽤 잘 붙는다") is None
+
+
+def test_fuzzy_match_refuses_opposite_answers():
+    assert polarity_differs(normalize_text("근육이 잘 붙는다"), normalize_text("근육이 잘 안 붙는다"))
+    index = _index(fuzzy=True, threshold=0.8)
+    assert index.lookup(QUESTION, "근육이 잘 붙는 편") == RESPONSE
+    assert index.lookup(QUESTION, "근육이 잘 안 붙는다") is None
+    assert index.refused == 1
+
+
+def test_learning_only_for_survey_questions_and_capped():
+    index = _index(learn_max=2)
+    index.learn("설문에 없는 질문", "아무 답", RESPONSE)
+    assert index.lookup("설문에 없는 질문", "아무 답") is None
+
+    index.learn(QUESTION, "첫째", {**RESPONSE, "selected": ""})
+    index.learn(QUESTION, "둘째", {**RESPONSE, "selected": ""})
+    index.learn(QUESTION, "셋째", {**RESPONSE, "selected": ""})
+    assert index.lookup(QUESTION, "첫째") is None
+    assert index.lookup(QUESTION, "셋째") is not None
+    # 설문 파일 항목은 내보내지도 덮어쓰지도 않는다
+    index.learn(QUESTION, "근육이 잘 붙는다", {**RESPONSE, "message": "덮어쓰기"})
+    assert index.lookup(QUESTION, "근육이 잘 붙는다") == RESPONSE
+
+
+def test_failed_llm_match_is_not_learned():
+    index = _index()
+    index.learn(QUESTION, "모르겠어요", {**RESPONSE, "isSuccess": False})
+    assert index.lookup(QUESTION, "모르겠어요") is None
+
+
+def test_load_jsonl(tmp_path):
+    path = tmp_path / "survey.jsonl"
+    path.write_text(
+        json.dumps({"question": QUESTION, "answer": "근육이 잘 붙는다", "response": RESPONSE}, ensure_ascii=False) + "\n\n",
+        encoding="utf-8",
+    )
+    index = ChatAnswerIndex()
+    assert index.load(str(path)) == 1
+    assert index.lookup(QUESTION, "근육이 잘 붙는다") == RESPONSE
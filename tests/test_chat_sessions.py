@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services import chat_sessions as chat_sessions_module
+from app.services.assistant_service import CHAT_INSTRUCTIONS, _build_chat_prompt, chat_body_assistant_async
+from app.services.chat_index import chat_index
+from app.services.chat_sessions import ChatSessionStore, SQLiteChatSessionStore
+from app.services.openai_client import get_async_client
+from bench.fake_openai import CHAT
+from tests.fake_upstream import upstream_calls, use_fake_openai
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return ChatSessionStore(ttl_sec=60, max_sessions=2)
+    return SQLiteChatSessionStore(str(tmp_path / "sessions.sqlite3"), ttl_sec=60, max_sessions=2)
+
+
+def test_session_maps_to_latest_conversation(store):
+    assert store.get("s1") is None
+    store.save("s1", "thread_a", reused=False)
+    store.save("s1", "thread_a", reused=True)
+    assert store.get("s1") == "thread_a"
+    assert store.stats()["started"] == 1
+    assert store.stats()["reused"] == 1
+    store.forget("s1")
+    assert store.get("s1") is None
+
+
+def test_expired_and_exhausted_sessions_start_over(store, monkeypatch):
+    store.ttl_sec = -1
+    store.save("old", "thread_a", reused=False)
+    assert store.get("old") is None
+    store.ttl_sec = 60
+    monkeypatch.setattr(chat_sessions_module, "CHAT_SESSION_MAX_TURNS", 2)
+    store.save("long", "thread_b", reused=False)
+    store.save("long", "thread_b", reused=True)
+    assert store.get("long") is None
+    assert store.stats()["expired"] >= 1
+
+
+def test_session_count_is_capped(store):
+    for i in range(3):
+        store.save(f"s{i}", f"thread_{i}", reused=False)
+        time.sleep(0.01)
+    assert store.get("s0") is None
+    assert store.get("s2") == "thread_2"
+
+
+def test_sqlite_sessions_are_shared_between_processes(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    SQLiteChatSessionStore(path).save("s1", "thread_a", reused=False)
+    assert SQLiteChatSessionStore(path).get("s1") == "thread_a"
+
+
+def test_static_instructions_lead_every_prompt():
+    first = _build_chat_prompt("1. 골격의 인상은?", "두께감이 있다")
+    other = _build_chat_prompt("7. 손의 크기는?", "작다")
+    assert first.startswith(CHAT_INSTRUCTIONS) and other.startswith(CHAT_INSTRUCTIONS)
+    # OpenAI 프롬프트 캐시는 1024 토큰 이상 접두사부터 (한국어는 대략 글자당 1토큰 미만)
+    assert len(CHAT_INSTRUCTIONS) > 1000
+    assert not _build_chat_prompt("7. 손의 크기는?", "작다", with_instructions=False).startswith(CHAT_INSTRUCTIONS)
+
+
+async def _thread_prompts(thread_id):
+    messages = (await get_async_client().beta.threads.messages.list(thread_id=thread_id, order="asc")).data
+    return [m.content[0].text.value for m in messages if m.role == "user"]
+
+
+def test_session_turns_share_one_thread_and_send_instructions_once():
+    async def main():
+        use_fake_openai()
+        first = await chat_body_assistant_async("1. 세션 질문", "첫 응답", session_id="session-reuse")
+        second = await chat_body_assistant_async("2. 세션 질문", "둘째 응답", session_id="session-reuse")
+        thread_id = chat_sessions_module.chat_sessions.get("session-reuse")
+        return first, second, await _thread_prompts(thread_id), await upstream_calls()
+
+    first, second, prompts, calls = asyncio.run(main())
+    assert first == second == CHAT
+    assert calls["threads.create_and_run"] == 1
+    assert calls["runs.create"] == 1
+    assert prompts[0].startswith(CHAT_INSTRUCTIONS)
+    assert prompts[1] == _build_chat_prompt("2. 세션 질문", "둘째 응답", with_instructions=False)
+
+
+def test_index_hit_does_not_skip_session_turn():
+    question, answer = "3. 인덱스에 있는 질문", "인덱스에 있는 응답"
+    chat_index.add(question, answer, {**CHAT, "message": "from index"})
+
+    async def main():
+        use_fake_openai()
+        stateless = await chat_body_assistant_async(question, answer)
+        calls_before = dict(await upstream_calls())
+        session = await chat_body_assistant_async(question, answer, session_id="session-index")
+        thread_id = chat_sessions_module.chat_sessions.get("session-index")
+        return stateless, calls_before, session, await _thread_prompts(thread_id)
+
+    stateless, calls_before, session, prompts = asyncio.run(main())
+    assert stateless["message"] == "from index"
+    assert calls_before == {}
+    # 세션 턴은 인덱스에 있어도 thread 에 기록되어야 이후 턴이 맥락을 잃지 않는다
+    assert session == CHAT
+    assert len(prompts) == 1 and prompts[0].endswith(f"- 응답: {answer}")
+
+
+def test_failed_turn_forgets_session():
+    async def main():
+        use_fake_openai(fail_rate=1.0)
+        with pytest.raises(RuntimeError):
+            await chat_body_assistant_async("4. 실패 질문", "응답", session_id="session-fail")
+        return chat_sessions_module.chat_sessions.get("session-fail")
+
+    assert asyncio.run(main()) is None
@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen, circuit_breaker, is_failure,
+)
+from app.services.deadline import DeadlineExceeded
+from app.services.rate_limiter import UpstreamBusy
+from tests.fake_upstream import app_client, upstream_calls, use_fake_openai
+
+
+class _HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"http {status_code}")
+        self.status_code = status_code
+
+
+def test_is_failure_classification():
+    assert is_failure(None) is False
+    assert is_failure(RuntimeError("run failed")) is True
+    assert is_failure(_HTTPError(500)) is True
+    assert is_failure(_HTTPError(429)) is True
+    assert is_failure(_HTTPError(400)) is None
+    assert is_failure(asyncio.CancelledError()) is None
+    assert is_failure(UpstreamBusy("busy", 1)) is None
+    assert is_failure(DeadlineExceeded(), elapsed=0.1) is None
+    assert is_failure(DeadlineExceeded(), elapsed=60) is True
+
+
+def _fail(breaker, assistant_id="a"):
+    probe = breaker.before(assistant_id)
+    breaker.after(assistant_id, probe, RuntimeError("boom"))
+
+
+def test_opens_on_failure_rate_and_recovers_through_half_open():
+    breaker = CircuitBreaker(enabled=True, min_calls=2, failure_rate=0.5, open_sec=0.05, half_open_probes=1)
+    breaker.after("a", breaker.before("a"))
+    assert breaker.state("a") == CLOSED
+    _fail(breaker)
+    assert breaker.state("a") == OPEN
+    with pytest.raises(CircuitOpen) as info:
+        breaker.before("a")
+    assert 0 < info.value.retry_after <= 0.05
+    assert breaker.retry_after("a") > 0
+
+    time.sleep(0.06)
+    assert breaker.state("a") == HALF_OPEN
+    probe = breaker.before("a")
+    assert probe is True
+    with pytest.raises(CircuitOpen):
+        breaker.before("a")  # probe 는 하나만
+    breaker.after("a", probe)
+    assert breaker.state("a") == CLOSED
+    assert breaker.stats()["assistants"]["a"]["calls"] == 0
+
+
+def test_failed_probe_reopens_and_other_assistants_are_unaffected():
+    breaker = CircuitBreaker(enabled=True, min_calls=1, open_sec=0.02)
+    _fail(breaker)
+    time.sleep(0.03)
+    _fail(breaker)
+    stats = breaker.stats()["assistants"]["a"]
+    assert stats["state"] == OPEN and stats["opened"] == 2 and stats["last_error"] == "RuntimeError: boom"
+    assert breaker.before("b") is False
+
+
+def test_disabled_breaker_never_opens():
+    breaker = CircuitBreaker(enabled=False, min_calls=1)
+    for _ in range(3):
+        _fail(breaker)
+    assert breaker.state("a") == CLOSED and breaker.retry_after("a") == 0.0
+
+
+def test_open_circuit_returns_503_without_calling_upstream(monkeypatch):
+    monkeypatch.setattr(circuit_breaker, "enabled", True)
+    monkeypatch.setattr(circuit_breaker, "min_calls", 2)
+    monkeypatch.setattr(circuit_breaker, "open_sec", 30.0)
+    monkeypatch.setattr(circuit_breaker, "_circuits", {})
+
+    def payload(i):
+        return {"answers": [f"서킷 {i}"], "height": 165, "weight": 55, "gender": "여성"}
+
+    async def main():
+        use_fake_openai(fail_rate=1.0)
+        async with app_client() as client:
+            healthy = (await client.get("/health")).json()
+            for i in range(2):
+                with pytest.raises(RuntimeError):
+                    await client.post("/assistant/diagnosis", json=payload(i))
+            rejected = await client.post("/assistant/diagnosis", json=payload(2))
+            degraded = (await client.get("/health")).json()
+        return healthy, rejected, degraded, await upstream_calls()
+
+    healthy, rejected, degraded, calls = asyncio.run(main())
+    assert healthy == {"status": "ok", "circuits": {}}
+    assert rejected.status_code == 503
+    assert int(rejected.headers["Retry-After"]) >= 1
+    assert calls["threads.create_and_run"] == 2
+    assert degraded == {"status": "degraded", "circuits": {"asst_body": OPEN}}
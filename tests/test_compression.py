@@ -0,0 +1,106 @@
+import asyncio
+import gzip
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+from app.services import compression
+from app.services.compression import CompressionMiddleware, check_encodings, compression_stats, negotiate
+
+BIG = {"text": "체형의 장점을 살리는 코디를 추천드립니다. " * 100}
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("gzip, br", "br"),                 # 같은 q 면 서버 선호 순서
+    ("br;q=0.5, gzip", "gzip"),         # q 가 높은 쪽
+    ("br;q=0, gzip;q=0", None),         # q=0 은 거절
+    ("*", "br"),
+    ("*, br;q=0", "gzip"),              # 이름을 적은 q 가 * 보다 우선
+    ("identity", None),
+    ("gzip;q=abc", None),               # 잘못된 q 는 허용하지 않음
+])
+def test_negotiate(accept, expected):
+    assert negotiate(accept, ["br", "gzip"]) == expected
+
+
+def test_br_without_brotli_fails_loudly(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    with pytest.raises(ValueError, match="brotli"):
+        CompressionMiddleware(FastAPI(), encodings=["br", "gzip"])
+    with pytest.raises(ValueError, match="zstd"):
+        check_encodings(["zstd"])
+    assert check_encodings(["gzip"]) == ["gzip"]
+    assert compression.available_encodings(["br", "gzip"]) == ["gzip"]
+
+
+def _app(encodings):
+    app = FastAPI()
+
+    @app.get("/big")
+    async def big():
+        return JSONResponse(BIG)
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/vary")
+    async def vary():
+        return JSONResponse(BIG, headers={"Vary": "Origin"})
+
+    @app.get("/stream")
+    async def stream():
+        return StreamingResponse(iter([b"data: 1\n\n"] * 200), media_type="text/event-stream")
+
+    @app.get("/encoded")
+    async def encoded():
+        return PlainTextResponse(gzip.compress(b"x" * 2000), headers={"Content-Encoding": "gzip"})
+
+    app.add_middleware(CompressionMiddleware, min_size=1024, encodings=encodings)
+    return app
+
+
+def _get(app, path, accept="gzip"):
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path, headers={"Accept-Encoding": accept})
+
+    return asyncio.run(main())
+
+
+def test_gzip_round_trip_and_headers():
+    before = compression_stats.stats()["responses"].get("gzip", 0)
+    response = _get(_app(["gzip"]), "/big")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(str(BIG).encode())
+    assert response.json() == BIG  # httpx 가 gzip 을 풀어 준다
+    assert compression_stats.stats()["responses"]["gzip"] == before + 1
+
+
+def test_small_and_unaccepted_bodies_are_sent_as_is_with_vary():
+    app = _app(["gzip"])
+    small = _get(app, "/small")
+    assert "content-encoding" not in small.headers and small.headers["vary"] == "Accept-Encoding"
+    plain = _get(app, "/big", accept="identity")
+    assert "content-encoding" not in plain.headers and plain.headers["vary"] == "Accept-Encoding"
+    assert _get(app, "/vary").headers["vary"] == "Origin, Accept-Encoding"
+
+
+def test_streams_and_encoded_bodies_are_untouched():
+    app = _app(["gzip"])
+    stream = _get(app, "/stream")
+    assert "content-encoding" not in stream.headers and "vary" not in stream.headers
+    assert stream.text == "data: 1\n\n" * 200
+    encoded = _get(app, "/encoded")
+    assert encoded.headers["content-encoding"] == "gzip" and encoded.text == "x" * 2000
+
+
+def test_brotli_round_trip():
+    pytest.importorskip("brotli")
+    response = _get(_app(["br", "gzip"]), "/big", accept="br, gzip")
+    assert response.headers["content-encoding"] == "br"
+    assert response.json() == BIG  # brotli 가 있으면 httpx 가 br 도 풀어 준다
@@ -0,0 +1,54 @@
+import asyncio
+import json
+
+from bench.fake_openai import CONTENT
+from tests.fake_upstream import app_client, use_fake_openai
+
+REQUEST = {
+    "name": "전여진",
+    "body_type": "웨이브",
+    "height": 160,
+    "weight": 40,
+    "body_feature": "체형이 너무 얇다",
+    "recommendation_items": ["상의", "하의"],
+    "recommended_situation": "IR발표",
+    "recommended_style": "IR 발표에 어울리는 스타일",
+    "avoid_style": "스트릿,힙한 스타일",
+    "budget": "20만원",
+}
+
+
+def _events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        name, data = block.split("\n")
+        events.append((name.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+def _stream(**fake_config):
+    async def main():
+        use_fake_openai(**fake_config)
+        async with app_client() as client:
+            return await client.post("/assistant/create-content/stream", json=REQUEST)
+
+    return asyncio.run(main())
+
+
+def test_stream_sends_deltas_then_done():
+    response = _stream(stream_chunks=8)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    events = _events(response.text)
+    assert events[-1] == ("done", {})
+    deltas = [data["text"] for name, data in events[:-1]]
+    assert len(deltas) > 1
+    assert "".join(deltas) == CONTENT
+
+
+def test_failed_run_is_reported_as_error_event():
+    events = _events(_stream(fail_rate=1.0).text)
+    name, data = events[-1]
+    assert name == "error"
+    assert "status=failed" in data["message"]
@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services import deadline
+from app.services.deadline import (
+    DeadlineExceeded, budget, clamp, deadline_scope, detached_task, remaining, request_timeout,
+)
+from tests.fake_upstream import app_client, upstream_calls, use_fake_openai
+
+
+class _LambdaContext:
+    def __init__(self, remaining_ms):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
+
+
+def test_request_timeout_takes_the_shortest_source(monkeypatch):
+    monkeypatch.setattr(deadline, "DEADLINE_SAFETY_SEC", 0.5)
+    monkeypatch.setattr(deadline, "REQUEST_TIMEOUT_SEC", 90.0)
+    monkeypatch.setattr(deadline, "API_GATEWAY_TIMEOUT_SEC", 29.0)
+
+    assert request_timeout({"headers": []}) == pytest.approx(89.5)
+    assert request_timeout({"headers": [(b"x-request-timeout-ms", b"3000")]}) == pytest.approx(2.5)
+    assert request_timeout({"headers": [(b"x-request-timeout-ms", b"nope")]}) == pytest.approx(89.5)
+
+    # Lambda: 남은 실행 시간과 API Gateway 타임아웃(요청 수신 시각 기준) 중 짧은 쪽
+    lambda_scope = {
+        "headers": [],
+        "aws.context": _LambdaContext(120_000),
+        "aws.event": {"requestContext": {"requestTimeEpoch": (time.time() - 10) * 1000}},
+    }
+    assert request_timeout(lambda_scope) == pytest.approx(18.5, abs=0.1)
+    assert request_timeout({**lambda_scope, "aws.context": _LambdaContext(5_000)}) == pytest.approx(4.5)
+
+    monkeypatch.setattr(deadline, "REQUEST_TIMEOUT_SEC", 0.0)
+    assert request_timeout({"headers": []}) is None
+
+
+def test_clamp_and_budget():
+    assert remaining() is None and clamp(3) == 3 and budget(None) is None
+    with deadline_scope(1):
+        assert clamp(None) == pytest.approx(1, abs=0.05)
+        assert clamp(0.2) == 0.2
+    with deadline_scope(-1):
+        assert clamp(5) == 0.0
+        with pytest.raises(DeadlineExceeded):
+            budget(5)
+
+
+def test_tasks_inherit_deadline_unless_detached():
+    async def left():
+        return remaining()
+
+    async def main():
+        with deadline_scope(5):
+            inherited = await asyncio.create_task(left())
+            detached = await detached_task(left())
+        return inherited, detached
+
+    inherited, detached = asyncio.run(main())
+    assert inherited is not None and 0 < inherited <= 5
+    assert detached is None
+
+
+def test_request_deadline_header_turns_slow_upstream_into_504():
+    async def main():
+        use_fake_openai(run_sec=3)
+        async with app_client() as client:
+            started = time.monotonic()
+            response = await client.post(
+                "/assistant/chat",
+                json={"question": "마감 테스트 질문", "answer": "마감 테스트 응답"},
+                headers={"x-request-timeout-ms": "800"},
+            )
+            return response, time.monotonic() - started, await upstream_calls()
+
+    response, elapsed, calls = asyncio.run(main())
+    assert response.status_code == 504
+    assert elapsed < 2  # upstream run(3s)을 끝까지 기다리지 않는다
+    assert calls["threads.create_and_run"] == 1
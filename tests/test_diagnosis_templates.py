@@ -0,0 +1,62 @@
+import asyncio
+import json
+
+import pytest
+
+from app.services import assistant_service, diagnosis_templates
+from app.services.diagnosis_templates import (
+    BODY_TYPES, PERSONALIZED_FIELDS, TEMPLATE_FIELDS, build_delta_prompt, load_templates, merge,
+)
+from bench.fake_openai import DIAGNOSIS_DELTA
+from tests.fake_upstream import use_fake_openai
+
+
+def test_shipped_templates_cover_every_type_and_field():
+    types = load_templates("v1")
+    for body_type in BODY_TYPES:
+        assert all(types[body_type][field] for field in TEMPLATE_FIELDS)
+
+
+def test_merge_prepends_personal_sentences_only_to_personalized_fields():
+    template = load_templates("v1")["웨이브"]
+    data = merge({"body_type": "웨이브", "detailed_features": "  골반이 넓습니다. ", "type_description": "무시"}, "v1")
+    assert data["body_type"] == "웨이브"
+    assert data["detailed_features"] == f"골반이 넓습니다. {template['detailed_features']}"
+    assert data["type_description"] == template["type_description"]
+    assert data["attraction_points"] == template["attraction_points"]  # delta 에 없으면 템플릿만
+    with pytest.raises(ValueError, match="body_type"):
+        merge({"body_type": "모름"}, "v1")
+
+
+def test_incomplete_template_file_fails_on_load(tmp_path, monkeypatch):
+    types = {t: {f: "문단" for f in TEMPLATE_FIELDS} for t in BODY_TYPES}
+    del types["내추럴"]["avoid_styles"]
+    (tmp_path / "broken.json").write_text(json.dumps({"types": types}, ensure_ascii=False), encoding="utf-8")
+    monkeypatch.setattr(diagnosis_templates, "DIAGNOSIS_TEMPLATE_DIR", str(tmp_path))
+    with pytest.raises(ValueError, match="내추럴 is missing avoid_styles"):
+        load_templates("broken")
+
+
+def test_delta_prompt_asks_only_for_personalized_fields():
+    prompt = build_delta_prompt(["어깨가 넓다"], 165, 55, "여성")
+    assert all(f"- {field}:" in prompt for field in PERSONALIZED_FIELDS)
+    assert "type_description" not in prompt
+    assert "1. 어깨가 넓다" in prompt
+    assert "웨이브(으)로 확정" in build_delta_prompt(["a"], 165, 55, "여성", body_type="웨이브")
+
+
+def test_templated_diagnosis_against_fake_upstream(monkeypatch):
+    monkeypatch.setattr(assistant_service, "DIAGNOSIS_TEMPLATES_ENABLED", True)
+
+    async def main():
+        use_fake_openai()
+        return await assistant_service.diagnose_body_type_with_assistant_async(
+            ["템플릿 진단"] * 17, 165, 55, "여성", use_cache=False
+        )
+
+    data = asyncio.run(main())
+    template = load_templates()["스트레이트"]
+    assert data["body_type"] == DIAGNOSIS_DELTA["body_type"]
+    assert data["detailed_features"] == f"{DIAGNOSIS_DELTA['detailed_features']} {template['detailed_features']}"
+    assert data["recommended_styles"] == template["recommended_styles"]
+    assert set(data) == {"body_type", *TEMPLATE_FIELDS}
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from app.services import assistant_service, hedging
+from app.services.hedging import Hedger
+from bench.fake_openai import CHAT
+from tests.fake_upstream import app_client, upstream_calls, use_fake_openai
+
+
+@pytest.fixture(autouse=True)
+def _short_delay(monkeypatch):
+    monkeypatch.setattr(hedging, "CHAT_HEDGE_DELAY_SEC", 0.02)
+    monkeypatch.setattr(hedging, "CHAT_HEDGE_MIN_DELAY_SEC", 0.0)
+
+
+def _sleeper(sec, value, log):
+    async def run():
+        log.append(value)
+        try:
+            await asyncio.sleep(sec)
+        except asyncio.CancelledError:
+            log.append(f"{value}:cancelled")
+            raise
+        return value
+
+    return run
+
+
+def test_fast_primary_is_not_hedged():
+    hedger = Hedger(burst=3)
+    log = []
+    assert asyncio.run(hedger.call(_sleeper(0, "primary", log), _sleeper(0, "backup", log))) == "primary"
+    assert log == ["primary"]
+    assert hedger.stats()["hedged"] == 0
+
+
+def test_slow_primary_is_hedged_and_loser_cancelled():
+    hedger = Hedger(burst=3)
+    log = []
+
+    async def main():
+        return await hedger.call(_sleeper(1, "primary", log), _sleeper(0.01, "backup", log))
+
+    assert asyncio.run(main()) == "backup"
+    assert "primary:cancelled" in log
+    stats = hedger.stats()
+    assert stats["hedged"] == 1 and stats["hedge_wins"] == 1
+
+
+def test_hedges_are_bounded_by_budget():
+    hedger = Hedger(budget_pct=0, burst=1)
+    log = []
+
+    async def main():
+        for _ in range(3):
+            await hedger.call(_sleeper(0.04, "primary", log), _sleeper(0.01, "backup", log))
+
+    asyncio.run(main())
+    stats = hedger.stats()
+    assert stats["calls"] == 3 and stats["hedged"] == 1 and stats["skipped_budget"] == 2
+
+
+def test_primary_error_is_raised_when_both_fail():
+    hedger = Hedger(burst=3)
+
+    async def primary():
+        await asyncio.sleep(0.03)
+        raise ValueError("primary")
+
+    async def backup():
+        raise KeyError("backup")
+
+    with pytest.raises(ValueError, match="primary"):
+        asyncio.run(hedger.call(primary, backup))
+
+
+def test_delay_follows_observed_quantile(monkeypatch):
+    monkeypatch.setattr(hedging, "CHAT_HEDGE_MIN_SAMPLES", 3)
+    hedger = Hedger(quantile=0.5)
+    assert hedger.delay() == 0.02  # 관측값이 모이기 전에는 고정 지연
+    hedger._latencies.extend([0.3, 0.1, 0.2, 0.4])
+    assert hedger.delay() == 0.3
+
+
+def test_stateless_chat_turn_is_hedged_against_fake_upstream(monkeypatch):
+    hedger = Hedger(burst=3)
+    monkeypatch.setattr(assistant_service, "CHAT_HEDGE_ENABLED", True)
+    monkeypatch.setattr(assistant_service, "chat_hedger", hedger)
+
+    async def main():
+        use_fake_openai(run_sec=0.1)
+        async with app_client() as client:
+            response = await client.post("/assistant/chat", json={"question": "hedge 질문", "answer": "hedge 응답"})
+        return response, await upstream_calls()
+
+    response, calls = asyncio.run(main())
+    assert response.status_code == 200 and response.json() == CHAT
+    assert calls["threads.create_and_run"] == 2
+    assert hedger.stats()["hedged"] == 1
@@ -0,0 +1,40 @@
+"""
+Lambda 콜드 스타트 import 예산. 새 인터프리터에서 `python -X importtime -c "import app.main"` 으로 잰다.
+느린 CI 에서는 IMPORT_BUDGET_MS 로 예산을 조정한다.
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+from bench.import_budget import DEFERRED, ROOT, measure
+
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "600"))
+RUNS = 5
+
+
+def _lambda_env():
+    return dict(os.environ, PYTHONPATH=ROOT, AWS_LAMBDA_FUNCTION_NAME="import-budget-test", OPENAI_PREWARM="0")
+
+
+def test_app_import_time_is_within_budget():
+    env = _lambda_env()
+    measure("app.main", env)  # .pyc 생성용 1회
+    totals = []
+    for _ in range(RUNS):
+        rows = measure("app.main", env)
+        totals.append(next(c for name, _, c in rows if name == "app.main") / 1000)
+    median_ms = statistics.median(totals)
+    assert median_ms <= IMPORT_BUDGET_MS, f"import app.main median {median_ms:.1f} ms > budget {IMPORT_BUDGET_MS:.0f} ms"
+
+
+def test_openai_and_httpx_are_not_imported_at_startup():
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         f"import sys, app.main; print(','.join(m for m in {DEFERRED!r} if m in sys.modules))"],
+        cwd=ROOT, env=_lambda_env(), capture_output=True, text=True,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    assert "openai" in DEFERRED and "httpx" in DEFERRED
+    assert loaded == []
@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services import job_queue as job_queue_module
+from app.services.job_queue import JobQueue
+from app.services.job_store import JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite3"))
+
+
+def test_claim_is_exclusive_and_release_requeues(store):
+    job = store.create("body_result", {"answers": ["a"]})
+    assert job["status"] == "queued"
+    assert store.claim(job["id"])
+    assert not store.claim(job["id"])
+    assert store.get(job["id"])["attempts"] == 1
+    store.release(job["id"])
+    assert store.get(job["id"])["status"] == "queued"
+
+
+def test_stale_running_job_is_requeued_unless_heartbeating(store):
+    stale = store.create("body_result", {})
+    alive = store.create("body_result", {})
+    store.claim(stale["id"])
+    store.claim(alive["id"])
+    time.sleep(0.05)
+    assert store.heartbeat(alive["id"])
+    assert store.requeue_stale(stale_sec=0.03) == [stale["id"]]
+    assert store.get(alive["id"])["status"] == "running"
+    assert not store.heartbeat(stale["id"])
+
+
+def test_purge_removes_only_old_finished_jobs(store):
+    done = store.create("body_result", {})
+    failed = store.create("body_result", {})
+    queued = store.create("body_result", {})
+    store.complete(done["id"], {"body_type": "웨이브"})
+    store.fail(failed["id"], "boom")
+    assert store.purge(older_than_sec=-1) == 2
+    assert store.get(done["id"]) is None
+    assert store.get(queued["id"])["status"] == "queued"
+
+
+def test_store_file_is_opened_lazily(tmp_path):
+    path = tmp_path / "lazy.sqlite3"
+    queue = JobQueue(path=str(path), workers=1)
+    assert not path.exists()
+    queue.store
+    assert path.exists()
+
+
+def _handler(monkeypatch, fn):
+    monkeypatch.setitem(job_queue_module.JOB_HANDLERS, "body_result", fn)
+
+
+def test_submit_then_wait_returns_completed_result(monkeypatch, store):
+    async def handler(payload):
+        await asyncio.sleep(0.01)
+        return {"echo": payload["answers"]}
+
+    _handler(monkeypatch, handler)
+
+    async def main():
+        queue = JobQueue(workers=2, store=store)
+        job = await queue.submit("body_result", {"answers": ["a", "b"]})
+        done = await queue.wait(job["id"], timeout_sec=2)
+        await queue.stop(drain_sec=0)
+        return done, queue
+
+    done, queue = asyncio.run(main())
+    assert done["status"] == "completed"
+    assert done["result"] == {"echo": ["a", "b"]}
+    assert queue._done == {}
+
+
+def test_failed_handler_marks_job_failed(monkeypatch, store):
+    async def handler(payload):
+        raise ValueError("JSON 파싱 실패")
+
+    _handler(monkeypatch, handler)
+
+    async def main():
+        queue = JobQueue(workers=1, store=store)
+        job = await queue.submit("body_result", {})
+        done = await queue.wait(job["id"], timeout_sec=2)
+        await queue.stop(drain_sec=0)
+        return done
+
+    done = asyncio.run(main())
+    assert done["status"] == "failed"
+    assert "JSON 파싱 실패" in done["error"]
+
+
+def test_restart_picks_up_unfinished_jobs_and_stop_releases_running(monkeypatch, store):
+    started = []
+
+    async def slow(payload):
+        started.append(payload["n"])
+        await asyncio.sleep(10)
+
+    _handler(monkeypatch, slow)
+    leftover = store.create("body_result", {"n": 1})
+
+    async def main():
+        queue = JobQueue(workers=1, store=store)
+        await queue.start()
+        await asyncio.sleep(0.05)
+        await queue.stop(drain_sec=0.01)
+
+    asyncio.run(main())
+    assert started == [1]
+    # 종료로 중단된 작업은 다음 프로세스가 바로 가져갈 수 있게 queued 로 돌아간다
+    assert store.get(leftover["id"])["status"] == "queued"
+
+
+def test_unknown_job_kind_is_rejected(store):
+    with pytest.raises(ValueError):
+        asyncio.run(JobQueue(workers=1, store=store).submit("unknown", {}))
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.services.metrics import Family, Registry, clear_snapshots, current_spans, request_scope, span
+from tests.fake_upstream import app_client, use_fake_openai
+
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    registry = Registry()
+    hist = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+    hist.observe(0.05, route="/a")
+    hist.observe(0.5, route="/a")
+    hist.observe(5, route="/a")
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum{route="/a"} 5.55' in lines
+    assert 'latency_seconds_count{route="/a"} 3' in lines
+
+
+def test_counter_escapes_label_values():
+    registry = Registry()
+    registry.counter("calls_total", "Calls").inc(call='say "hi"\n')
+    assert 'calls_total{call="say \\"hi\\"\\n"} 1' in registry.render()
+
+
+def test_broken_collector_does_not_hide_other_metrics():
+    registry = Registry()
+    registry.counter("ok_total", "Ok").inc()
+
+    @registry.collector
+    def broken():
+        raise KeyError("missing")
+
+    @registry.collector
+    def gauge():
+        return [("queue_depth", "gauge", "Depth", [({}, 3)])]
+
+    text = registry.render()
+    assert "ok_total 1" in text
+    assert "queue_depth 3" in text
+
+
+def test_spans_are_collected_per_request_and_record_errors():
+    with request_scope("POST") as info:
+        info["route"] = "/assistant/diagnosis"
+        with span("prompt_build", "asst"):
+            pass
+        with pytest.raises(ValueError):
+            with span("json_parse", "asst"):
+                raise ValueError("bad json")
+        spans = list(current_spans())
+    assert current_spans() is None
+    assert [s["phase"] for s in spans] == ["prompt_build", "json_parse"]
+    assert spans[1]["error"] == "ValueError"
+    assert spans[0]["assistant"] == "asst"
+
+
+def test_metrics_endpoint_reports_route_latency_and_upstream_calls():
+    async def main():
+        use_fake_openai()
+        async with app_client() as client:
+            await client.post("/assistant/diagnosis", json={
+                "answers": ["메트릭 테스트"] * 17, "height": 165, "weight": 55, "gender": "여성",
+            })
+            return await client.get("/metrics")
+
+    response = asyncio.run(main())
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert 'http_request_duration_seconds_count{method="POST",route="/assistant/diagnosis",status="200"}' in text
+    assert 'upstream_calls_total{assistant="asst_body",call="create_and_run"}' in text
+    assert "# TYPE singleflight_calls_total counter" in text
+
+
+def _worker_registry(calls, depth):
+    registry = Registry()
+    registry.counter("upstream_calls_total", "Calls").inc(calls, call="run")
+    registry.histogram("latency_seconds", "Latency", buckets=(1,)).observe(0.5, route="/a")
+
+    @registry.collector
+    def gauge():
+        return [("queue_depth", "gauge", "Depth", [({}, depth)])]
+
+    return registry
+
+
+def _dead_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def test_multiprocess_render_sums_counters_and_keeps_live_gauges_per_worker(tmp_path):
+    other, dead = os.getppid(), _dead_pid()
+    for pid, registry in ((other, _worker_registry(2, 5)), (dead, _worker_registry(4, 9))):
+        with open(tmp_path / f"{pid}.json", "w", encoding="utf-8") as f:
+            json.dump([family.to_json() for family in registry.families()], f)
+    (tmp_path / "junk.json").write_text("{}")
+
+    lines = _worker_registry(1, 3).render(str(tmp_path)).splitlines()
+    # counter/histogram 은 끝난 워커 값까지 합계
+    assert 'upstream_calls_total{call="run"} 7' in lines
+    assert 'latency_seconds_count{route="/a"} 3' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 3' in lines
+    # gauge 는 살아 있는 워커별
+    assert f'queue_depth{{worker="{os.getpid()}"}} 3' in lines
+    assert f'queue_depth{{worker="{other}"}} 5' in lines
+    assert not any(f'worker="{dead}"' in line for line in lines)
+    assert lines.count("# TYPE upstream_calls_total counter") == 1
+
+
+def test_snapshot_loop_writes_until_cancelled_and_serve_clears_old_snapshots(tmp_path):
+    registry = _worker_registry(1, 0)
+    counter = registry._metrics[0]
+    directory = str(tmp_path / "metrics")
+
+    async def main():
+        task = asyncio.create_task(registry.snapshot_loop(60, directory))
+        await asyncio.sleep(0.01)
+        counter.inc(call="run")
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(main())
+    with open(os.path.join(directory, f"{os.getpid()}.json"), encoding="utf-8") as f:
+        families = {d["name"]: Family.from_json(d) for d in json.load(f)}
+    # 취소될 때 마지막 값을 한 번 더 쓴다
+    assert families["upstream_calls_total"].values == {(("call", "run"),): 2}
+
+    clear_snapshots(directory)
+    assert os.listdir(directory) == []
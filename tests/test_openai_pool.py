@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+
+from app.cli.serve import worker_env
+from app.services import openai_client
+from app.services.openai_client import _build_transport, pool_stats
+from bench.import_budget import ROOT
+
+
+def _pool_size(**env) -> int:
+    base = {k: v for k, v in os.environ.items() if not k.startswith(("OPENAI_POOL_", "UPSTREAM_"))}
+    proc = subprocess.run(
+        [sys.executable, "-c", "from app.services.openai_client import OPENAI_POOL_MAX_CONNECTIONS as n; print(n)"],
+        cwd=ROOT, env={**base, "PYTHONPATH": ROOT, **env}, capture_output=True, text=True, check=True,
+    )
+    return int(proc.stdout)
+
+
+def test_pool_size_is_bounded_without_a_run_limit():
+    assert _pool_size() == 200
+    assert _pool_size(OPENAI_POOL_TOTAL_CONNECTIONS="64") == 64
+
+
+def test_pool_size_follows_run_slots_and_explicit_setting():
+    assert _pool_size(UPSTREAM_MAX_CONCURRENT_RUNS="10") == 20
+    assert _pool_size(UPSTREAM_MAX_CONCURRENT_RUNS="10", OPENAI_POOL_MAX_CONNECTIONS="7") == 7
+
+
+def test_workers_split_the_connection_budget():
+    assert worker_env(4, {})["OPENAI_POOL_TOTAL_CONNECTIONS"] == "50"
+    assert worker_env(3, {"OPENAI_POOL_TOTAL_CONNECTIONS": "100"})["OPENAI_POOL_TOTAL_CONNECTIONS"] == "34"
+    assert "OPENAI_POOL_TOTAL_CONNECTIONS" not in worker_env(1, {})
+
+
+def test_transport_uses_pool_limits_and_long_keepalive(monkeypatch):
+    monkeypatch.setattr(openai_client, "OPENAI_POOL_MAX_CONNECTIONS", 12)
+    monkeypatch.setattr(openai_client, "OPENAI_POOL_MAX_KEEPALIVE", 6)
+    pool = _build_transport()._pool
+    assert pool._max_connections == 12
+    assert pool._max_keepalive_connections == 6
+    assert pool._keepalive_expiry == openai_client.OPENAI_KEEPALIVE_EXPIRY_SEC
+    assert pool in pool_stats._pools
+
+
+def test_http2_falls_back_without_h2(monkeypatch):
+    monkeypatch.setattr(openai_client, "OPENAI_HTTP2", True)
+    monkeypatch.setitem(sys.modules, "h2", None)  # import h2 → ImportError
+    assert _build_transport()._pool._http2 is False
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from app.services.deadline import DeadlineExceeded, deadline_scope
+from app.services.rate_limiter import TokenBucket, UpstreamBusy, UpstreamLimiter
+
+
+def test_bucket_allows_burst_then_schedules_waits():
+    bucket = TokenBucket(rpm=60, burst=2)  # 1 token/s
+    assert bucket.reserve(None) == 0.0
+    assert bucket.reserve(None) == 0.0
+    assert bucket.reserve(None) == pytest.approx(1.0, abs=0.05)
+    assert bucket.reserve(None) == pytest.approx(2.0, abs=0.05)
+
+
+def test_bucket_does_not_reserve_past_max_wait_and_refunds():
+    bucket = TokenBucket(rpm=60, burst=1)
+    bucket.reserve(None)
+    before = bucket.tokens
+    assert bucket.reserve(0.5) is None
+    assert bucket.tokens == pytest.approx(before, abs=0.05)
+    bucket.reserve(None)
+    bucket.refund()
+    assert bucket.tokens == pytest.approx(before, abs=0.05)
+
+
+def test_unlimited_by_default_admits_many_concurrent_runs():
+    limiter = UpstreamLimiter(max_concurrent_runs=0, rpm=0, burst=1)
+
+    async def run():
+        async with limiter.run_slot("asst"):
+            await asyncio.sleep(0.01)
+            return limiter.in_flight["asst"]
+
+    async def main():
+        return max(await asyncio.gather(*(run() for _ in range(300))))
+
+    assert asyncio.run(main()) == 300
+    assert limiter.shed == 0
+
+
+def test_concurrency_cap_sheds_after_queue_wait():
+    limiter = UpstreamLimiter(max_concurrent_runs=2, rpm=0, burst=1, queue_wait_sec=0.05)
+
+    async def run():
+        async with limiter.run_slot("asst"):
+            await asyncio.sleep(0.2)
+
+    async def main():
+        return await asyncio.gather(*(run() for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert [type(r) for r in results].count(UpstreamBusy) == 1
+    assert limiter.stats()["admitted"] == 2
+    assert limiter.in_flight["asst"] == 0
+
+
+def test_rate_limit_shed_has_retry_after():
+    limiter = UpstreamLimiter(max_concurrent_runs=0, rpm=6, burst=1, queue_wait_sec=0.1)
+
+    async def main():
+        async with limiter.run_slot("asst"):
+            pass
+        async with limiter.run_slot("asst"):
+            pass
+
+    with pytest.raises(UpstreamBusy) as e:
+        asyncio.run(main())
+    assert e.value.retry_after == pytest.approx(10.0)
+
+
+def test_cancelled_wait_refunds_its_token():
+    limiter = UpstreamLimiter(max_concurrent_runs=0, rpm=60, burst=1, queue_wait_sec=5)
+
+    async def main():
+        async with limiter.run_slot("asst"):
+            pass
+        waiter = asyncio.ensure_future(limiter.run_slot("asst").__aenter__())
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return limiter.bucket.tokens
+
+    assert asyncio.run(main()) == pytest.approx(0.05, abs=0.05)
+
+
+def test_throttle_does_not_consume_token_it_cannot_use_before_deadline():
+    limiter = UpstreamLimiter(max_concurrent_runs=0, rpm=60, burst=1)
+
+    async def main():
+        await limiter.throttle()
+        with deadline_scope(0.2):
+            await limiter.throttle()
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(main())
+    assert limiter.bucket.tokens == pytest.approx(0.0, abs=0.3)
+
+
+def test_saturated_when_someone_is_waiting_or_cap_is_reached():
+    limiter = UpstreamLimiter(max_concurrent_runs=1, rpm=0, burst=1)
+
+    async def main():
+        assert not limiter.saturated("asst")
+        async with limiter.run_slot("asst"):
+            return limiter.saturated("asst"), limiter.saturated("other")
+
+    assert asyncio.run(main()) == (True, False)
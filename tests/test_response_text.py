@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.response_text import extract_json, latest_assistant_text, loads, message_text
+
+
+def test_loads_accepts_bytes_and_control_characters():
+    assert loads(b' {"a": 1} ') == {"a": 1}
+    # orjson 이 거부하는 문자열 속 개행도 표준 json(strict=False)으로 읽는다
+    assert loads('{"a": "줄\n바꿈"}') == {"a": "줄\n바꿈"}
+
+
+@pytest.mark.parametrize("raw", [
+    '{"body_type": "웨이브"}',
+    '```json\n{"body_type": "웨이브"}\n```',
+    '설명\n```\n{"body_type": "웨이브"}\n```\n끝',
+    '```json\n{"body_type": "웨이브"}',
+])
+def test_extract_json_handles_code_blocks(raw):
+    assert extract_json(raw) == {"body_type": "웨이브"}
+
+
+def test_extract_json_keeps_backticks_inside_values():
+    assert extract_json('{"tip": "```코드```"}') == {"tip": "```코드```"}
+
+
+def test_extract_json_raises_on_invalid_json():
+    with pytest.raises(ValueError):
+        extract_json("not json")
+
+
+def _sdk_message(role, created_at, value):
+    text = SimpleNamespace(value=value)
+    return SimpleNamespace(role=role, created_at=created_at, content=[SimpleNamespace(text=None), SimpleNamespace(text=text)])
+
+
+def test_latest_assistant_text_ignores_list_order():
+    messages = [
+        _sdk_message("assistant", 2, "  최신  "),
+        {"role": "user", "created_at": 3, "content": [{"text": {"value": "질문"}}]},
+        {"role": "assistant", "created_at": 1, "content": [{"text": {"value": "예전"}}]},
+    ]
+    assert latest_assistant_text(messages) == "최신"
+    assert latest_assistant_text(reversed(messages)) == "최신"
+
+
+def test_message_text_and_missing_text():
+    assert message_text({"content": [{"text": "plain"}]}) == "plain"
+    assert message_text({"content": [{"image_file": {}}]}) is None
+    with pytest.raises(ValueError, match="No assistant message"):
+        latest_assistant_text([{"role": "user", "content": []}])
+    with pytest.raises(ValueError, match="no text content"):
+        latest_assistant_text([{"role": "assistant", "content": [{"image_file": {}}]}])
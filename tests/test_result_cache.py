@@ -0,0 +1,92 @@
+import time
+
+import pytest
+
+from app.services.result_cache import MemoryCache, NullCache, ResultCache, SQLiteCache, make_key
+
+ANSWERS = ["두께감이 있고 육감적이다", "탄력이 있다"]
+
+
+def test_key_ignores_formatting_and_small_measurement_noise():
+    key = make_key("diagnosis:asst", ANSWERS, 164.4, 55.2, "여성")
+    assert make_key("diagnosis:asst", [" 두께감이 있고  육감적이다.", "탄력이 있다"], 163.6, 54.9, "여성 ") == key
+
+
+def test_key_separates_namespace_answers_and_measurements():
+    key = make_key("diagnosis:asst", ANSWERS, 164.4, 55.2, "여성")
+    assert make_key("body_result:asst", ANSWERS, 164.4, 55.2, "여성") != key
+    assert make_key("diagnosis:asst", list(reversed(ANSWERS)), 164.4, 55.2, "여성") != key
+    assert make_key("diagnosis:asst", ANSWERS, 164.6, 55.2, "여성") != key
+    assert make_key("diagnosis:asst", ANSWERS, 164.4, 55.2, "남성") != key
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path):
+    if request.param == "memory":
+        return MemoryCache(ttl_sec=60, max_entries=2)
+    return SQLiteCache(str(tmp_path / "cache.sqlite3"), ttl_sec=60, max_entries=2)
+
+
+def test_hit_miss_and_copy_on_read(cache):
+    assert cache.get("a") is None
+    cache.set("a", {"body_type": "웨이브", "tips": ["a"]})
+    first = cache.get("a")
+    first["tips"].append("b")
+    assert cache.get("a") == {"body_type": "웨이브", "tips": ["a"]}
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    cache.set("a", {"v": 1})
+    time.sleep(0.01)
+    cache.set("b", {"v": 2})
+    time.sleep(0.01)
+    cache.get("a")
+    time.sleep(0.01)
+    cache.set("c", {"v": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    assert cache.get("c") == {"v": 3}
+
+
+def test_expired_entry_is_a_miss(cache):
+    cache.ttl_sec = -1
+    cache.set("a", {"v": 1})
+    assert cache.get("a") is None
+
+
+def test_null_cache_never_hits():
+    cache = NullCache()
+    cache.set("a", {"v": 1})
+    assert cache.get("a") is None
+
+
+def test_incomplete_cache_fails_at_construction():
+    class Incomplete(ResultCache):
+        backend = "incomplete"
+
+        def _get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_repeated_diagnosis_is_served_from_cache():
+    import asyncio
+
+    from app.services.assistant_service import diagnose_body_type_with_assistant_async
+    from tests.fake_upstream import upstream_calls, use_fake_openai
+
+    answers = ["캐시 테스트 답변"] * 17
+
+    async def main():
+        use_fake_openai()
+        first = await diagnose_body_type_with_assistant_async(answers, 170.2, 61.0, "여성")
+        second = await diagnose_body_type_with_assistant_async(answers, 169.8, 60.9, "여성")
+        return first, second, await upstream_calls()
+
+    first, second, calls = asyncio.run(main())
+    assert first == second
+    assert calls["threads.create_and_run"] == 1
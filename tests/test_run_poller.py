@@ -0,0 +1,120 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import run_poller
+from app.services.run_poller import CompletionStats, RunPoller, RunTimeout, get_run_poller
+from tests.fake_upstream import upstream_calls, use_fake_openai
+
+
+@pytest.fixture
+def intervals(monkeypatch):
+    for name, value in (
+        ("POLL_FIRST_DELAY_SEC", 0.5), ("POLL_MIN_INTERVAL_SEC", 0.3), ("POLL_MAX_INTERVAL_SEC", 3.0),
+        ("POLL_DENSE_CHECKS", 6), ("POLL_BACKOFF_RATIO", 0.15),
+        ("POLL_FIRST_CHECK_QUANTILE", 0.1), ("POLL_FIRST_CHECK_SCALE", 0.8),
+    ):
+        monkeypatch.setattr(run_poller, name, value)
+
+
+def test_without_history_intervals_back_off_with_elapsed_time(intervals):
+    stats = CompletionStats()
+    assert stats.first_delay("asst") == 0.5
+    assert stats.next_interval("asst", 1.0) == 0.3  # 최소 간격
+    assert stats.next_interval("asst", 10.0) == pytest.approx(1.5)
+    assert stats.next_interval("asst", 60.0) == 3.0  # 최대 간격
+
+
+def test_history_moves_first_check_and_densifies_likely_window(intervals):
+    stats = CompletionStats(size=100)
+    for i in range(100):
+        stats.record("asst", 4.0 + i * 0.06)  # 4s ~ 10s
+    p10, p90 = stats.quantile("asst", 0.1), stats.quantile("asst", 0.9)
+    assert stats.first_delay("asst") == pytest.approx(p10 * 0.8)
+    assert stats.next_interval("asst", 5.0) == pytest.approx((p90 - p10) / 6)
+    # p90 이후에는 다시 경과 시간 비례
+    assert stats.next_interval("asst", 12.0) == pytest.approx(12.0 * 0.15)
+    # 다른 assistant 의 이력은 섞이지 않는다
+    assert stats.first_delay("other") == 0.5
+
+
+def test_concurrent_runs_share_one_poller_loop():
+    async def main():
+        use_fake_openai(run_sec=0.05)
+        from app.services.openai_client import get_async_client
+
+        client = get_async_client()
+        runs = [
+            await client.beta.threads.create_and_run(
+                assistant_id="asst_chat", thread={"messages": [{"role": "user", "content": "q"}]}
+            )
+            for _ in range(10)
+        ]
+        poller = get_run_poller()
+        results = await asyncio.gather(*(
+            poller.wait(r.thread_id, r.id, assistant_id="asst_poll_test", timeout_sec=5) for r in runs
+        ))
+        return results, poller, await upstream_calls()
+
+    results, poller, calls = asyncio.run(main())
+    assert {r.status for r in results} == {"completed"}
+    assert poller.pending == 0
+    # run 마다 폴링 루프를 돌리지 않으므로 retrieve 는 run 수의 몇 배 이내
+    assert calls["runs.retrieve"] < 10 * 8
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def _poll_with(monkeypatch, responses, timeout_sec=2.0):
+    """runs.retrieve 가 responses 를 차례로 돌려주는(Exception 이면 raise) 클라이언트로 wait 한 번."""
+    calls = []
+
+    async def retrieve(**kwargs):
+        item = responses[min(len(calls), len(responses) - 1)]
+        calls.append(item)
+        if isinstance(item, Exception):
+            raise item
+        return SimpleNamespace(status=item, last_error=None)
+
+    client = SimpleNamespace(beta=SimpleNamespace(threads=SimpleNamespace(runs=SimpleNamespace(retrieve=retrieve))))
+    monkeypatch.setattr(run_poller, "get_async_client", lambda: client)
+
+    async def main():
+        return await RunPoller().wait("thread", "run", assistant_id="asst_retry_test", timeout_sec=timeout_sec)
+
+    try:
+        return asyncio.run(main()), calls
+    except Exception as e:
+        return e, calls
+
+
+def test_transient_retrieve_errors_are_retried(monkeypatch):
+    result, calls = _poll_with(monkeypatch, [_StatusError(503), _StatusError(429), "in_progress", "completed"])
+    assert result.status == "completed"
+    assert len(calls) == 4
+
+
+def test_client_errors_fail_immediately(monkeypatch):
+    error, calls = _poll_with(monkeypatch, [_StatusError(404), "completed"])
+    assert isinstance(error, _StatusError)
+    assert len(calls) == 1
+
+
+def test_consecutive_transient_errors_are_capped(monkeypatch):
+    monkeypatch.setattr(run_poller, "POLL_MAX_CONSECUTIVE_ERRORS", 3)
+    error, calls = _poll_with(monkeypatch, [_StatusError(500)])
+    assert isinstance(error, _StatusError)
+    assert len(calls) == 3
+
+
+def test_failed_run_and_timeout(monkeypatch):
+    error, _ = _poll_with(monkeypatch, ["failed"])
+    assert isinstance(error, RuntimeError) and "status=failed" in str(error)
+    error, _ = _poll_with(monkeypatch, ["in_progress"], timeout_sec=0.1)
+    assert isinstance(error, RunTimeout)
+    assert error.status == "in_progress"
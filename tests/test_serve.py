@@ -0,0 +1,60 @@
+import logging
+import os
+
+from app.cli import serve
+from app.cli.serve import cpu_count, worker_env
+
+
+def test_single_worker_keeps_environment():
+    assert worker_env(1, {"UPSTREAM_RPM": "600"}) == {}
+
+
+def test_limits_are_split_across_workers():
+    env = worker_env(4, {
+        "UPSTREAM_MAX_CONCURRENT_RUNS": "10",
+        "UPSTREAM_RPM": "600",
+        "UPSTREAM_BURST": "0",
+    })
+    assert env["UPSTREAM_MAX_CONCURRENT_RUNS"] == "3"  # 개수는 올림한 정수
+    assert env["UPSTREAM_RPM"] == "150"
+    assert "UPSTREAM_BURST" not in env  # 0 = 제한 없음
+    assert env["OPENAI_POOL_TOTAL_CONNECTIONS"] == "50"
+
+
+def test_in_memory_state_moves_to_shared_sqlite():
+    env = worker_env(2, {})
+    assert env["RESULT_CACHE_BACKEND"] == "sqlite" and env["RESULT_CACHE_URL"] == "result_cache.sqlite3"
+    assert env["CHAT_SESSION_PATH"] == "chat_sessions.sqlite3"
+    assert env["METRICS_MULTIPROC_DIR"] == "metrics_multiproc"
+
+    configured = worker_env(2, {"RESULT_CACHE_BACKEND": "redis", "CHAT_SESSION_PATH": "/data/s.sqlite3"})
+    assert "RESULT_CACHE_BACKEND" not in configured and "CHAT_SESSION_PATH" not in configured
+    assert worker_env(2, {"METRICS_MULTIPROC_DIR": "/tmp/m"}).get("METRICS_MULTIPROC_DIR") is None
+
+
+def test_cpu_count_respects_cgroup_quota(monkeypatch):
+    monkeypatch.setattr(serve, "_cgroup_cpu_quota", lambda: 1.5)
+    assert cpu_count() <= 2
+    monkeypatch.setattr(serve, "_cgroup_cpu_quota", lambda: None)
+    assert cpu_count() >= 1
+
+
+def test_main_logs_startup_and_runs_uvicorn(monkeypatch, caplog):
+    calls = []
+    monkeypatch.setattr(serve.uvicorn, "run", lambda app, **kwargs: calls.append((app, kwargs)))
+    with caplog.at_level(logging.INFO, logger="app.serve"):
+        serve.main(["--workers", "1", "--port", "9001"])
+    assert [app for app, _ in calls] == ["app.main:app"]
+    assert calls[0][1]["workers"] == 1 and calls[0][1]["port"] == 9001
+    assert any(r.name == "app.serve" and "1 worker(s)" in r.getMessage() for r in caplog.records)
+
+
+def test_multi_worker_main_clears_metrics_snapshots(monkeypatch, tmp_path):
+    directory = tmp_path / "metrics"
+    directory.mkdir()
+    (directory / "123.json").write_text("[]")
+    monkeypatch.setattr(os, "environ", {"METRICS_MULTIPROC_DIR": str(directory)})
+    monkeypatch.setattr(serve.uvicorn, "run", lambda app, **kwargs: None)
+    serve.main(["--workers", "2"])
+    assert list(directory.iterdir()) == []
+    assert os.environ["RESULT_CACHE_BACKEND"] == "sqlite"  # 워커가 물려받을 환경
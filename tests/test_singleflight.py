@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from app.services.deadline import DeadlineExceeded, deadline_scope, remaining
+from app.services.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_run_and_get_independent_copies():
+    flight = SingleFlight()
+    runs = []
+
+    async def fn():
+        runs.append(1)
+        await asyncio.sleep(0.02)
+        return {"body_type": "웨이브", "tips": ["a"]}
+
+    async def main():
+        results = await asyncio.gather(*(flight.do("k", fn) for _ in range(5)))
+        results[0]["tips"].append("b")
+        return results
+
+    results = asyncio.run(main())
+    assert len(runs) == 1
+    assert results[1] == {"body_type": "웨이브", "tips": ["a"]}
+    assert flight.stats() == {"inflight": 0, "started": 1, "shared": 4}
+
+
+def test_shared_run_does_not_inherit_first_callers_deadline():
+    flight = SingleFlight()
+
+    async def fn():
+        await asyncio.sleep(0.1)
+        return {"deadline": remaining()}
+
+    async def first():
+        with deadline_scope(0.03):
+            await flight.do("k", fn)
+
+    async def retry():
+        await asyncio.sleep(0.01)
+        with deadline_scope(5):
+            return await flight.do("k", fn)
+
+    async def main():
+        return await asyncio.gather(first(), retry(), return_exceptions=True)
+
+    first_result, retry_result = asyncio.run(main())
+    # 먼저 온 요청은 자기 마감에서 끝나고, 나중에 합류한 재시도는 같은 run 의 결과를 받는다
+    assert isinstance(first_result, DeadlineExceeded)
+    assert retry_result == {"deadline": None}
+    assert flight.stats()["started"] == 1
+
+
+def test_run_is_cancelled_when_last_waiter_leaves():
+    flight = SingleFlight()
+
+    async def main():
+        state = {"cancelled": False}
+
+        async def fn():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                state["cancelled"] = True
+                raise
+
+        with deadline_scope(0.02):
+            with pytest.raises(DeadlineExceeded):
+                await flight.do("k", fn)
+        await asyncio.sleep(0)
+        return state["cancelled"]
+
+    assert asyncio.run(main())
+    assert flight.stats()["inflight"] == 0
+
+
+def test_expired_deadline_does_not_start_a_run():
+    flight = SingleFlight()
+
+    async def fn():
+        raise AssertionError("should not run")
+
+    async def main():
+        with deadline_scope(-1):
+            await flight.do("k", fn)
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(main())
+    assert flight.stats()["started"] == 0
+
+
+def test_errors_are_shared_and_not_cached():
+    flight = SingleFlight()
+    runs = []
+
+    async def fn():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        first = await asyncio.gather(flight.do("k", fn), flight.do("k", fn), return_exceptions=True)
+        second = await asyncio.gather(flight.do("k", fn), return_exceptions=True)
+        return first + second
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert len(runs) == 2
@@ -0,0 +1,107 @@
+import asyncio
+
+from app.services import assistant_service
+from app.services.speculation import SpeculationStore
+from bench.fake_openai import DIAGNOSIS
+from tests.fake_upstream import app_client, upstream_calls, use_fake_openai
+
+
+def test_same_key_is_handed_over_once():
+    store = SpeculationStore(ttl_sec=60)
+    runs = []
+
+    async def fn():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return {"body_type": "웨이브"}
+
+    async def main():
+        assert store.start("s1", "k", fn) == "started"
+        assert store.start("s1", "k", fn) == "running"
+        task = store.take("s1", "k")
+        result = await task
+        return result, store.take("s1", "k")
+
+    result, again = asyncio.run(main())
+    assert result == {"body_type": "웨이브"}
+    assert again is None  # 결과는 한 번만 이어받음
+    assert len(runs) == 1
+    assert store.stats()["hits"] == 1
+
+
+def test_changed_input_cancels_the_speculative_run():
+    store = SpeculationStore(ttl_sec=60)
+
+    async def main():
+        state = {"cancelled": 0}
+
+        async def fn():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                state["cancelled"] += 1
+                raise
+
+        store.start("s1", "k1", fn)
+        await asyncio.sleep(0)
+        assert store.start("s1", "k2", fn) == "started"  # 마지막에 응답을 고친 경우
+        await asyncio.sleep(0)
+        assert store.take("s1", "k1") is None  # 최종 입력이 또 다르면 이어받지 않고 취소
+        await asyncio.sleep(0)
+        return state["cancelled"]
+
+    assert asyncio.run(main()) == 2
+    stats = store.stats()
+    assert stats["restarted"] == 1 and stats["misses"] == 1 and stats["wasted"] == 2 and stats["size"] == 0
+
+
+def test_failed_and_overflowing_runs_are_dropped():
+    store = SpeculationStore(ttl_sec=60, max_sessions=1)
+
+    async def boom():
+        raise ValueError("upstream")
+
+    async def ok():
+        await asyncio.sleep(1)
+
+    async def main():
+        store.start("s1", "k", boom)
+        await asyncio.sleep(0.01)
+        failed = store.take("s1", "k")
+        store.start("s2", "k", ok)
+        store.start("s3", "k", ok)  # max_sessions=1 → 가장 오래된 s2 는 취소
+        await asyncio.sleep(0)
+        return failed, store.take("s2", "k")
+
+    failed, evicted = asyncio.run(main())
+    assert failed is None and evicted is None
+    assert store.stats()["size"] == 1
+
+
+def test_body_result_takes_over_prefetched_run(monkeypatch):
+    monkeypatch.setattr(assistant_service, "BODY_RESULT_PREFETCH_ENABLED", True)
+    payload = {"answers": ["미리 시작"] * 17, "height": 171, "weight": 60, "gender": "여성", "session_id": "spec-1"}
+
+    async def main():
+        use_fake_openai(run_sec=0.05)
+        async with app_client() as client:
+            too_few = await client.post("/assistant/body-result/prefetch", json={**payload, "answers": ["미리 시작"] * 3})
+            started = await client.post("/assistant/body-result/prefetch", json=payload)
+            final = await client.post("/assistant/body-result", json=payload)
+        return too_few.json(), started.json(), final, await upstream_calls()
+
+    too_few, started, final, calls = asyncio.run(main())
+    assert too_few == {"status": "too_few_answers"}
+    assert started == {"status": "started"}
+    assert final.status_code == 200 and final.json() == DIAGNOSIS
+    # 최종 요청은 미리 시작한 run 을 이어받으므로 assistant run 은 한 번
+    assert calls["threads.create_and_run"] == 1
+
+
+def test_prefetch_requires_session_id():
+    async def main():
+        async with app_client() as client:
+            return await client.post("/assistant/body-result/prefetch",
+                                     json={"answers": ["a"] * 17, "height": 160, "weight": 50, "gender": "여성"})
+
+    assert asyncio.run(main()).status_code == 422
@@ -0,0 +1,90 @@
+import asyncio
+
+from app.services import assistant_backend
+from app.services.standby_threads import StandbyThreadPool
+from bench.fake_openai import CHAT
+from tests.fake_upstream import app_client, upstream_calls, use_fake_openai
+
+
+async def _settle():
+    for _ in range(20):
+        await asyncio.sleep(0.01)
+
+
+def test_pool_fills_hands_out_and_refills():
+    pool = StandbyThreadPool(size=2, max_age_sec=60)
+
+    async def main():
+        use_fake_openai()
+        pool.start(["asst_a", None])
+        await _settle()
+        first = pool.acquire("asst_a")
+        second = pool.acquire("asst_a")
+        await _settle()
+        idle = pool.stats()["idle"]["asst_a"]
+        await pool.stop()
+        return first, second, idle, await upstream_calls()
+
+    first, second, idle, calls = asyncio.run(main())
+    assert first and second and first != second
+    assert idle == 2  # 꺼낸 만큼 다시 채움
+    assert calls["threads.create"] == 4
+    # 종료 시 남은 빈 thread 는 삭제
+    assert calls["threads.delete"] == 2
+    stats = pool.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 0 and stats["idle"] == {}
+
+
+def test_empty_pool_misses_without_waiting():
+    pool = StandbyThreadPool(size=1, max_age_sec=60)
+
+    async def main():
+        use_fake_openai()
+        thread_id = pool.acquire("asst_a")
+        await _settle()
+        await pool.stop()
+        return thread_id
+
+    assert asyncio.run(main()) is None
+    assert pool.stats()["misses"] == 1
+
+
+def test_stale_threads_are_evicted_and_deleted():
+    pool = StandbyThreadPool(size=1, max_age_sec=0.05)
+
+    async def main():
+        use_fake_openai()
+        pool.start(["asst_a"])
+        await _settle()
+        await asyncio.sleep(0.06)
+        thread_id = pool.acquire("asst_a")
+        await _settle()
+        await pool.stop()
+        return thread_id, await upstream_calls()
+
+    thread_id, calls = asyncio.run(main())
+    assert thread_id is None
+    assert pool.stats()["evicted"] >= 1
+    assert calls["threads.delete"] >= 1
+
+
+def test_chat_turn_runs_on_standby_thread(monkeypatch):
+    pool = StandbyThreadPool(size=1, max_age_sec=60)
+    monkeypatch.setattr(assistant_backend, "STANDBY_THREADS_ENABLED", True)
+    monkeypatch.setattr(assistant_backend, "standby_threads", pool)
+
+    async def main():
+        use_fake_openai()
+        pool.start(["asst_chat"])
+        await _settle()
+        async with app_client() as client:
+            response = await client.post("/assistant/chat", json={"question": "대기 thread 질문", "answer": "응답"})
+        await pool.stop()
+        return response, await upstream_calls()
+
+    response, calls = asyncio.run(main())
+    assert response.status_code == 200 and response.json() == CHAT
+    # thread 생성 없이 runs.create 로 실행
+    assert calls["runs.create"] == 1
+    assert calls.get("threads.create_and_run", 0) == 0
+    assert pool.stats()["hits"] == 1